@@ -4,22 +4,186 @@ import sqlite3
 from dataclasses import asdict
 from datetime import date
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 
-from database.models import Transaction
+from database.models import Recurrence, Transaction
 from database.models_investments import PiggyBank
 from database.models_user import User, FinancialProfile
 from database.models_budgets import Budget, Goal
 
 
+# Colunas de dados de cada tabela vinculada a um perfil (sem id/usuario_id/perfil_id).
+# Usadas pelas cópias em lote (INSERT ... SELECT) de backup/restauração e clonagem.
+PROFILE_TABLES: Dict[str, Tuple[str, ...]] = {
+	"transacoes": (
+		"tipo", "categoria", "subcategoria", "descricao", "valor", "data", "data_registro",
+		"recorrente", "recorrente_id", "pago", "notas", "tags", "anexo_caminho",
+	),
+	"cofrinhos": (
+		"nome", "instituicao", "percent_cdi", "cdi_aa", "principal", "aporte_mensal",
+		"data_inicio", "aplicar_impostos", "created_at",
+	),
+	"orcamentos": (
+		"categoria", "limite_mensal", "mes", "ano", "ativo", "descricao", "data_criacao",
+	),
+	"metas_financeiras": (
+		"nome", "valor_alvo", "valor_atual", "data_inicio", "data_alvo", "ativo",
+		"descricao", "prioridade", "data_criacao",
+	),
+	"recorrencias": (
+		"tipo", "categoria", "descricao", "valor", "frequencia", "intervalo", "dia", "data_inicio",
+		"data_fim", "ocorrencias", "valor_ultima", "tags", "ativo", "gerado_ate", "data_criacao",
+	),
+}
+
+# Tabelas de PROFILE_TABLES referenciadas por id de outras linhas do perfil. Nas cópias em lote
+# os ids mudam; o par (id antigo, id novo) de cada linha copiada dessas tabelas fica em
+# temp.profile_id_map para traduzir as referências (ver map_copied_ids).
+ID_MAPPED_TABLES: Tuple[str, ...] = ("transacoes", "cofrinhos", "metas_financeiras", "recorrencias")
+
+# Colunas de PROFILE_TABLES que guardam o id de outra tabela do perfil (coluna -> tabela),
+# traduzidas depois da cópia por remap_profile_links
+PROFILE_LINKS: Dict[str, Dict[str, str]] = {
+	"transacoes": {"recorrente_id": "recorrencias"},
+}
+
+# Aportes das metas: não têm usuario_id/perfil_id (pertencem ao perfil pela meta), então são
+# copiados depois de PROFILE_TABLES, com meta_id, transacao_id e cofrinho_id traduzidos.
+GOAL_CONTRIBUTION_COLUMNS: Tuple[str, ...] = (
+	"meta_id", "transacao_id", "cofrinho_id", "valor", "data", "descricao", "data_registro",
+)
+
+# Prioridade das metas como número para ordenação (o texto ordenaria alfabeticamente)
+GOAL_PRIORITY_RANK_SQL = "CASE prioridade WHEN 'alta' THEN 3 WHEN 'media' THEN 2 WHEN 'baixa' THEN 1 ELSE 0 END"
+
+
+def start_id_map(conn: sqlite3.Connection) -> None:
+	"""(Re)cria temp.profile_id_map, vazia, para uma cópia de perfil."""
+	conn.execute("DROP TABLE IF EXISTS temp.profile_id_map")
+	conn.execute(
+		"""
+		CREATE TEMP TABLE profile_id_map (
+			tabela TEXT NOT NULL,
+			old_id INTEGER NOT NULL,
+			new_id INTEGER NOT NULL,
+			inserido INTEGER NOT NULL DEFAULT 1,
+			PRIMARY KEY (tabela, old_id)
+		) WITHOUT ROWID
+		"""
+	)
+
+
+def max_table_id(conn: sqlite3.Connection, table: str) -> int:
+	return int(conn.execute(f"SELECT COALESCE(MAX(id), 0) FROM main.{table}").fetchone()[0])
+
+
+def map_copied_ids(
+	conn: sqlite3.Connection, table: str, after_id: int, source_sql: str, params: Iterable[Any] = ()
+) -> None:
+	"""
+	Registra em profile_id_map as linhas inseridas em table depois de after_id, pareadas com os
+	ids de origem de source_sql (colunas old_id e pos, pos na ordem em que foram inseridas).
+	Dentro de uma transação o AUTOINCREMENT numera as linhas inseridas em sequência, então o
+	id novo é o primeiro id inserido mais a posição.
+	"""
+	conn.execute(
+		f"""
+		INSERT INTO temp.profile_id_map (tabela, old_id, new_id)
+		SELECT ?, old_id, (SELECT MIN(id) FROM main.{table} WHERE id > ?) + ord - 1
+		FROM (SELECT old_id, row_number() OVER (ORDER BY pos) AS ord FROM ({source_sql}))
+		WHERE old_id IS NOT NULL
+		""",
+		(table, int(after_id), *params),
+	)
+
+
+def remap_profile_links(conn: sqlite3.Connection) -> None:
+	"""
+	Traduz as colunas de PROFILE_LINKS das linhas inseridas na cópia (inserido = 1 no mapa) para
+	os ids novos; referências a registros fora da cópia viram NULL.
+	"""
+	for table, links in PROFILE_LINKS.items():
+		for column, target in links.items():
+			conn.execute(
+				f"""
+				UPDATE main.{table}
+				SET {column} = (
+					SELECT p.new_id FROM temp.profile_id_map p WHERE p.tabela = ? AND p.old_id = {table}.{column}
+				)
+				WHERE {column} IS NOT NULL
+				AND id IN (SELECT new_id FROM temp.profile_id_map WHERE tabela = ? AND inserido = 1)
+				""",
+				(target, table),
+			)
+
+
+def copy_goal_contributions(
+	conn: sqlite3.Connection, source_sql: str, params: Iterable[Any] = (), skip_existing: bool = False
+) -> int:
+	"""
+	Insere os aportes de source_sql (id e GOAL_CONTRIBUTION_COLUMNS com os ids de origem),
+	traduzidos por profile_id_map. Aportes de metas fora do mapa são ignorados; transação ou
+	cofrinho fora do mapa viram NULL. As metas inseridas na cópia já trazem valor_atual
+	consolidado, então o acréscimo dos triggers é desfeito nelas. Com skip_existing (mesclagem),
+	aportes já presentes na meta de destino (mesma transação ou, sem transação, mesma data e
+	valor) são ignorados. Retorna o número de aportes inseridos.
+	"""
+	conn.execute("DROP TABLE IF EXISTS temp._goal_totals")
+	conn.execute(
+		"""
+		CREATE TEMP TABLE _goal_totals AS
+		SELECT m.id, m.valor_atual FROM main.metas_financeiras m
+		JOIN temp.profile_id_map p ON p.tabela = 'metas_financeiras' AND p.new_id = m.id AND p.inserido = 1
+		"""
+	)
+	where = ""
+	if skip_existing:
+		where = """
+		WHERE NOT EXISTS (
+			SELECT 1 FROM main.aportes_meta e
+			WHERE e.meta_id = mm.new_id AND (
+				e.transacao_id = mt.new_id
+				OR (mt.new_id IS NULL AND e.transacao_id IS NULL AND date(e.data) = date(a.data) AND round(e.valor, 2) = round(a.valor, 2))
+			)
+		)
+		"""
+	cur = conn.execute(
+		f"""
+		INSERT INTO main.aportes_meta ({", ".join(GOAL_CONTRIBUTION_COLUMNS)})
+		SELECT mm.new_id, mt.new_id, mc.new_id, a.valor, a.data, a.descricao, COALESCE(a.data_registro, CURRENT_TIMESTAMP)
+		FROM ({source_sql}) a
+		JOIN temp.profile_id_map mm ON mm.tabela = 'metas_financeiras' AND mm.old_id = a.meta_id
+		LEFT JOIN temp.profile_id_map mt ON mt.tabela = 'transacoes' AND mt.old_id = a.transacao_id
+		LEFT JOIN temp.profile_id_map mc ON mc.tabela = 'cofrinhos' AND mc.old_id = a.cofrinho_id
+		{where}
+		ORDER BY a.id
+		""",
+		tuple(params),
+	)
+	inserted = int(cur.rowcount)
+	conn.execute(
+		"""
+		UPDATE main.metas_financeiras
+		SET valor_atual = (SELECT t.valor_atual FROM temp._goal_totals t WHERE t.id = metas_financeiras.id)
+		WHERE id IN (SELECT id FROM temp._goal_totals)
+		"""
+	)
+	conn.execute("DROP TABLE temp._goal_totals")
+	return inserted
+
+
 class DbManager:
-	def __init__(self, db_path: Path):
+	def __init__(self, db_path: Path, read_only: bool = False):
 		self.db_path = str(db_path)
+		self.read_only = read_only
 		self.current_user_id: Optional[int] = None
 		self.current_profile_id: Optional[int] = None
 
 	def _connect(self) -> sqlite3.Connection:
-		conn = sqlite3.connect(self.db_path)
+		if self.read_only:
+			conn = sqlite3.connect(f"{Path(self.db_path).resolve().as_uri()}?mode=ro", uri=True)
+		else:
+			conn = sqlite3.connect(self.db_path)
 		conn.row_factory = sqlite3.Row
 		conn.execute("PRAGMA foreign_keys = ON;")
 		return conn
@@ -144,6 +308,94 @@ class DbManager:
 		);
 		""")
 
+		# CDI histórico (global, não pertence a perfil): uma linha por dia útil, taxa em % a.a. base 252.
+		# A chave primária em data é o índice das buscas por período.
+		conn.execute("""
+		CREATE TABLE IF NOT EXISTS taxas_cdi (
+			data DATE PRIMARY KEY,
+			taxa_aa REAL NOT NULL,
+			fonte TEXT
+		) WITHOUT ROWID;
+		""")
+
+		# Aportes das metas: cada linha soma em metas_financeiras.valor_atual pelos triggers abaixo,
+		# então o progresso é lido direto da meta, sem somar o histórico. Opcionalmente ligada à
+		# transação (ou ao cofrinho) de origem; apagar a transação apaga o aporte e desconta da meta.
+		# Não está em PROFILE_TABLES (não tem perfil_id): as cópias de perfil a tratam à parte
+		# (copy_goal_contributions), mantendo o valor_atual consolidado das metas.
+		conn.execute("""
+		CREATE TABLE IF NOT EXISTS aportes_meta (
+			id INTEGER PRIMARY KEY AUTOINCREMENT,
+			meta_id INTEGER NOT NULL,
+			transacao_id INTEGER,
+			cofrinho_id INTEGER,
+			valor REAL NOT NULL,
+			data DATE NOT NULL,
+			descricao TEXT,
+			data_registro TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+			FOREIGN KEY (meta_id) REFERENCES metas_financeiras(id) ON DELETE CASCADE,
+			FOREIGN KEY (transacao_id) REFERENCES transacoes(id) ON DELETE CASCADE,
+			FOREIGN KEY (cofrinho_id) REFERENCES cofrinhos(id) ON DELETE SET NULL,
+			UNIQUE(meta_id, transacao_id)
+		);
+		""")
+		conn.execute("""
+		CREATE TRIGGER IF NOT EXISTS trg_aportes_meta_insert AFTER INSERT ON aportes_meta
+		BEGIN
+			UPDATE metas_financeiras SET valor_atual = valor_atual + NEW.valor WHERE id = NEW.meta_id;
+		END;
+		""")
+		conn.execute("""
+		CREATE TRIGGER IF NOT EXISTS trg_aportes_meta_delete AFTER DELETE ON aportes_meta
+		BEGIN
+			UPDATE metas_financeiras SET valor_atual = valor_atual - OLD.valor WHERE id = OLD.meta_id;
+		END;
+		""")
+		conn.execute("""
+		CREATE TRIGGER IF NOT EXISTS trg_aportes_meta_update AFTER UPDATE OF valor, meta_id ON aportes_meta
+		BEGIN
+			UPDATE metas_financeiras SET valor_atual = valor_atual - OLD.valor WHERE id = OLD.meta_id;
+			UPDATE metas_financeiras SET valor_atual = valor_atual + NEW.valor WHERE id = NEW.meta_id;
+		END;
+		""")
+		# Aportes que cobrem a transação inteira acompanham a edição do valor e da data
+		conn.execute("""
+		CREATE TRIGGER IF NOT EXISTS trg_transacoes_aportes_meta AFTER UPDATE OF valor, data ON transacoes
+		BEGIN
+			UPDATE aportes_meta SET valor = NEW.valor WHERE transacao_id = NEW.id AND valor = OLD.valor;
+			UPDATE aportes_meta SET data = NEW.data WHERE transacao_id = NEW.id;
+		END;
+		""")
+
+		# Regras de transações recorrentes. As ocorrências viram linhas de transacoes (recorrente = 1,
+		# recorrente_id = regra) só até um horizonte, em lote; gerado_ate marca até onde já foram
+		# geradas e as posteriores são calculadas sob demanda (utils/recurrence.py).
+		# Em PROFILE_TABLES: nas cópias de perfil, transacoes.recorrente_id é traduzido (PROFILE_LINKS).
+		conn.execute("""
+		CREATE TABLE IF NOT EXISTS recorrencias (
+			id INTEGER PRIMARY KEY AUTOINCREMENT,
+			usuario_id INTEGER NOT NULL,
+			perfil_id INTEGER NOT NULL,
+			tipo TEXT NOT NULL,
+			categoria TEXT NOT NULL,
+			descricao TEXT,
+			valor REAL NOT NULL,
+			frequencia TEXT NOT NULL DEFAULT 'mensal',
+			intervalo INTEGER NOT NULL DEFAULT 1,
+			dia INTEGER,
+			data_inicio DATE NOT NULL,
+			data_fim DATE,
+			ocorrencias INTEGER,
+			valor_ultima REAL,
+			tags TEXT,
+			ativo BOOLEAN DEFAULT 1,
+			gerado_ate DATE,
+			data_criacao TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+			FOREIGN KEY (usuario_id) REFERENCES usuarios(id) ON DELETE CASCADE,
+			FOREIGN KEY (perfil_id) REFERENCES perfis_financeiros(id) ON DELETE CASCADE
+		);
+		""")
+
 		# Criar índices
 		conn.execute("CREATE INDEX IF NOT EXISTS idx_transacoes_usuario ON transacoes(usuario_id);")
 		conn.execute("CREATE INDEX IF NOT EXISTS idx_transacoes_perfil ON transacoes(perfil_id);")
@@ -155,6 +407,11 @@ class DbManager:
 		conn.execute("CREATE INDEX IF NOT EXISTS idx_orcamentos_categoria ON orcamentos(categoria);")
 		conn.execute("CREATE INDEX IF NOT EXISTS idx_metas_perfil ON metas_financeiras(perfil_id);")
 		conn.execute("CREATE INDEX IF NOT EXISTS idx_metas_ativo ON metas_financeiras(ativo);")
+		conn.execute("CREATE INDEX IF NOT EXISTS idx_metas_perfil_ativo_data ON metas_financeiras(perfil_id, ativo, data_alvo);")
+		conn.execute("CREATE INDEX IF NOT EXISTS idx_aportes_meta_meta_data ON aportes_meta(meta_id, data);")
+		conn.execute("CREATE INDEX IF NOT EXISTS idx_aportes_meta_transacao ON aportes_meta(transacao_id);")
+		conn.execute("CREATE INDEX IF NOT EXISTS idx_transacoes_recorrencia ON transacoes(recorrente_id, data);")
+		conn.execute("CREATE INDEX IF NOT EXISTS idx_recorrencias_perfil ON recorrencias(perfil_id, ativo);")
 
 		conn.commit()
 
@@ -166,8 +423,9 @@ class DbManager:
 		payload.pop("id", None)
 
 		sql = """
-		INSERT INTO transacoes (usuario_id, perfil_id, tipo, categoria, subcategoria, descricao, valor, data, pago, tags, anexo_caminho)
-		VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+		INSERT INTO transacoes (usuario_id, perfil_id, tipo, categoria, subcategoria, descricao, valor, data, pago, tags, anexo_caminho,
+			recorrente, recorrente_id)
+		VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
 		"""
 		with self._connect() as conn:
 			cur = conn.execute(
@@ -184,11 +442,12 @@ class DbManager:
 					1 if payload.get("pago", True) else 0,
 					payload.get("tags_json"),
 					payload.get("anexo_caminho"),
+					1 if payload.get("recorrente_id") is not None else 0,
+					payload.get("recorrente_id"),
 				),
 			)
 			conn.commit()
 			return int(cur.lastrowid)
-			return int(cur.lastrowid)
 
 	def list_last_transactions(self, limit: int = 10) -> List[Dict[str, Any]]:
 		sql = """
@@ -349,6 +608,141 @@ class DbManager:
 			conn.execute("DELETE FROM cofrinhos WHERE id = ? AND usuario_id = ?", (int(piggy_id), self.current_user_id))
 			conn.commit()
 
+	# ===== RECORRÊNCIAS =====
+	def add_recurrence(self, rule: Recurrence, gerado_ate: Optional[date] = None) -> int:
+		"""Cria uma regra; gerado_ate marca ocorrências já lançadas (ex.: a primeira, registrada à mão)"""
+		if not self.current_user_id or not self.current_profile_id:
+			raise ValueError("Usuário e perfil financeiro devem estar selecionados")
+
+		sql = """
+		INSERT INTO recorrencias
+		(usuario_id, perfil_id, tipo, categoria, descricao, valor, frequencia, intervalo, dia, data_inicio, data_fim,
+		ocorrencias, valor_ultima, tags, ativo, gerado_ate)
+		VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+		"""
+		with self._connect() as conn:
+			cur = conn.execute(
+				sql,
+				(
+					self.current_user_id,
+					self.current_profile_id,
+					rule.tipo,
+					rule.categoria,
+					rule.descricao,
+					float(rule.valor),
+					rule.frequencia,
+					max(1, int(rule.intervalo)),
+					rule.dia,
+					rule.data_inicio.isoformat(),
+					rule.data_fim.isoformat() if rule.data_fim else None,
+					rule.ocorrencias,
+					rule.valor_ultima,
+					rule.tags_json,
+					1 if rule.ativo else 0,
+					gerado_ate.isoformat() if gerado_ate else None,
+				),
+			)
+			conn.commit()
+			return int(cur.lastrowid)
+
+	def list_recurrences(self, ativas_apenas: bool = True) -> List[Dict[str, Any]]:
+		"""Regras do perfil atual, com gerado_ate"""
+		if not self.current_user_id or not self.current_profile_id:
+			return []
+
+		sql = """
+		SELECT id, tipo, categoria, descricao, valor, frequencia, intervalo, dia, data_inicio, data_fim,
+			ocorrencias, valor_ultima, tags, ativo, gerado_ate
+		FROM recorrencias
+		WHERE usuario_id = ? AND perfil_id = ?
+		"""
+		if ativas_apenas:
+			sql += " AND ativo = 1"
+		sql += " ORDER BY data_inicio, id"
+		with self._connect() as conn:
+			rows = conn.execute(sql, (self.current_user_id, self.current_profile_id)).fetchall()
+			return [dict(r) for r in rows]
+
+	def add_recurrence_occurrences(self, rows: Iterable[Dict[str, Any]], gerado_ate: Dict[int, date]) -> int:
+		"""
+		Lança ocorrências geradas (dicts com recorrente_id, tipo, categoria, descricao, valor, data,
+		tags) como transações não pagas e avança gerado_ate das regras, tudo em uma transação
+		"""
+		if not self.current_user_id or not self.current_profile_id:
+			raise ValueError("Usuário e perfil financeiro devem estar selecionados")
+
+		with self._connect() as conn:
+			cur = conn.executemany(
+				"""
+				INSERT INTO transacoes (usuario_id, perfil_id, tipo, categoria, descricao, valor, data, pago, tags,
+					recorrente, recorrente_id)
+				VALUES (?, ?, ?, ?, ?, ?, ?, 0, ?, 1, ?)
+				""",
+				(
+					(
+						self.current_user_id,
+						self.current_profile_id,
+						r["tipo"],
+						r["categoria"],
+						r["descricao"],
+						float(r["valor"]),
+						str(r["data"]),
+						r.get("tags"),
+						int(r["recorrente_id"]),
+					)
+					for r in rows
+				),
+			)
+			inserted = cur.rowcount
+			conn.executemany(
+				"UPDATE recorrencias SET gerado_ate = ? WHERE id = ? AND perfil_id = ?",
+				[(d.isoformat(), int(rule_id), self.current_profile_id) for rule_id, d in gerado_ate.items()],
+			)
+			conn.commit()
+			return int(inserted)
+
+	def delete_recurrence(self, rule_id: int, remover_futuras: bool = True, hoje: Optional[date] = None) -> None:
+		"""Apaga a regra; com remover_futuras, também as ocorrências não pagas a partir de hoje"""
+		with self._connect() as conn:
+			if remover_futuras:
+				conn.execute(
+					"""
+					DELETE FROM transacoes
+					WHERE recorrente_id = ? AND usuario_id = ? AND perfil_id = ? AND pago = 0 AND date(data) >= date(?)
+					""",
+					(int(rule_id), self.current_user_id, self.current_profile_id, (hoje or date.today()).isoformat()),
+				)
+			conn.execute(
+				"DELETE FROM recorrencias WHERE id = ? AND usuario_id = ?", (int(rule_id), self.current_user_id)
+			)
+			conn.commit()
+
+	# ===== CDI HISTÓRICO =====
+	def import_cdi_rates(self, rows: Iterable[Tuple[date, float]], fonte: Optional[str] = None) -> int:
+		"""Grava (data, taxa % a.a.) em taxas_cdi, substituindo datas já existentes. Retorna o nº de linhas."""
+		data = [(d.isoformat(), float(taxa), fonte) for d, taxa in rows]
+		with self._connect() as conn:
+			conn.executemany("INSERT OR REPLACE INTO taxas_cdi (data, taxa_aa, fonte) VALUES (?, ?, ?)", data)
+			conn.commit()
+		return len(data)
+
+	def list_cdi_rates(self, start: Optional[date] = None, end: Optional[date] = None) -> List[Tuple[str, float]]:
+		"""(data ISO, taxa % a.a.) em ordem de data, opcionalmente em [start, end)."""
+		sql = "SELECT data, taxa_aa FROM taxas_cdi"
+		params: List[str] = []
+		if start is not None and end is not None:
+			sql += " WHERE data >= ? AND data < ?"
+			params = [start.isoformat(), end.isoformat()]
+		sql += " ORDER BY data"
+		with self._connect() as conn:
+			return [(r[0], float(r[1])) for r in conn.execute(sql, params).fetchall()]
+
+	def get_cdi_range(self) -> Optional[Tuple[str, str, int]]:
+		"""(primeira data, última data, nº de dias) de taxas_cdi, ou None se vazia."""
+		with self._connect() as conn:
+			row = conn.execute("SELECT MIN(data), MAX(data), COUNT(*) FROM taxas_cdi").fetchone()
+		return (row[0], row[1], int(row[2])) if row and row[2] else None
+
 	def get_month_balance(self, year: int, month: int) -> Tuple[float, float, float]:
 		if not self.current_user_id or not self.current_profile_id:
 			return 0.0, 0.0, 0.0
@@ -404,6 +798,101 @@ class DbManager:
 			rows = conn.execute(sql, (self.current_user_id, self.current_profile_id, start.isoformat(), end.isoformat())).fetchall()
 			return [dict(r) for r in rows]
 
+	def get_monthly_balances(
+		self, start: date, end: date, somente_pagas: bool = True
+	) -> Dict[Tuple[int, int], Tuple[float, float, float]]:
+		"""Entradas, saídas e saldo de cada mês em [start, end), em uma única consulta agrupada
+		(somente_pagas=False inclui as transações ainda não pagas, para previsões)"""
+		if not self.current_user_id or not self.current_profile_id:
+			return {}
+
+		sql = """
+		SELECT CAST(strftime('%Y', data) AS INTEGER) AS ano, CAST(strftime('%m', data) AS INTEGER) AS mes,
+			COALESCE(SUM(CASE WHEN tipo='entrada' THEN valor ELSE 0 END), 0) AS entradas,
+			COALESCE(SUM(CASE WHEN tipo='saida' THEN valor ELSE 0 END), 0) AS saidas
+		FROM transacoes
+		WHERE usuario_id = ? AND perfil_id = ? AND date(data) >= date(?) AND date(data) < date(?)
+		"""
+		if somente_pagas:
+			sql += " AND pago = 1"
+		sql += " GROUP BY ano, mes"
+		with self._connect() as conn:
+			rows = conn.execute(sql, (self.current_user_id, self.current_profile_id, start.isoformat(), end.isoformat())).fetchall()
+			return {
+				(int(r["ano"]), int(r["mes"])): (float(r["entradas"]), float(r["saidas"]), float(r["entradas"]) - float(r["saidas"]))
+				for r in rows
+			}
+
+	def list_transactions_between(self, start: date, end: date) -> List[Dict[str, Any]]:
+		"""Transações em [start, end), no mesmo formato e ordem de list_month_transactions"""
+		if not self.current_user_id or not self.current_profile_id:
+			return []
+
+		sql = """
+		SELECT id, tipo, categoria, descricao, valor, data, pago
+		FROM transacoes
+		WHERE usuario_id = ? AND perfil_id = ? AND date(data) >= date(?) AND date(data) < date(?)
+		ORDER BY date(data) DESC, datetime(data_registro) DESC
+		"""
+		with self._connect() as conn:
+			rows = conn.execute(sql, (self.current_user_id, self.current_profile_id, start.isoformat(), end.isoformat())).fetchall()
+			return [dict(r) for r in rows]
+
+	def iter_transactions_between(self, start: date, end: date, batch_size: int = 1000) -> Iterator[Dict[str, Any]]:
+		"""Como list_transactions_between, mas lê do cursor em lotes (memória constante)"""
+		if not self.current_user_id or not self.current_profile_id:
+			return
+
+		sql = """
+		SELECT id, tipo, categoria, descricao, valor, data, pago
+		FROM transacoes
+		WHERE usuario_id = ? AND perfil_id = ? AND date(data) >= date(?) AND date(data) < date(?)
+		ORDER BY date(data) DESC, datetime(data_registro) DESC
+		"""
+		conn = self._connect()
+		try:
+			cur = conn.execute(sql, (self.current_user_id, self.current_profile_id, start.isoformat(), end.isoformat()))
+			while True:
+				rows = cur.fetchmany(batch_size)
+				if not rows:
+					break
+				for r in rows:
+					yield dict(r)
+		finally:
+			conn.close()
+
+	def count_transactions_between(self, start: date, end: date) -> int:
+		if not self.current_user_id or not self.current_profile_id:
+			return 0
+
+		sql = """
+		SELECT COUNT(*) FROM transacoes
+		WHERE usuario_id = ? AND perfil_id = ? AND date(data) >= date(?) AND date(data) < date(?)
+		"""
+		with self._connect() as conn:
+			return int(conn.execute(sql, (self.current_user_id, self.current_profile_id, start.isoformat(), end.isoformat())).fetchone()[0])
+
+	def get_category_totals_between(self, start: date, end: date) -> List[Dict[str, Any]]:
+		"""Total e quantidade de transações pagas por tipo e categoria em [start, end)"""
+		if not self.current_user_id or not self.current_profile_id:
+			return []
+
+		sql = """
+		SELECT tipo, categoria, COALESCE(SUM(valor), 0) AS total, COUNT(*) AS quantidade
+		FROM transacoes
+		WHERE usuario_id = ? AND perfil_id = ? AND date(data) >= date(?) AND date(data) < date(?) AND pago = 1
+		GROUP BY tipo, categoria
+		ORDER BY tipo, total DESC
+		"""
+		with self._connect() as conn:
+			rows = conn.execute(sql, (self.current_user_id, self.current_profile_id, start.isoformat(), end.isoformat())).fetchall()
+			return [dict(r) for r in rows]
+
+	def iter_month_transactions(self, year: int, month: int, batch_size: int = 1000) -> Iterator[Dict[str, Any]]:
+		start = date(year, month, 1)
+		end = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+		return self.iter_transactions_between(start, end, batch_size)
+
 	# ===== USUARIOS =====
 	def add_user(self, user: User) -> int:
 		sql = "INSERT INTO usuarios (nome, email, senha_hash, ativo) VALUES (?, ?, ?, ?)"
@@ -570,6 +1059,104 @@ class DbManager:
 			conn.execute("DELETE FROM perfis_financeiros WHERE id = ?", (profile_id,))
 			conn.commit()
 
+	def clone_profile(self, profile_id: int, new_name: str, filters: Optional[Dict[str, Any]] = None) -> int:
+		"""Duplica um perfil (mesmo usuário) copiando os dados com INSERT ... SELECT.
+
+		Tudo roda em uma única transação e com número fixo de comandos por tabela, independente do volume de dados.
+		Filtros opcionais:
+		- tabelas: tabelas a copiar (padrão: todas de PROFILE_TABLES)
+		- data_inicio / data_fim: intervalo (inclusivo) de transações e meses de orçamentos
+		- categorias: categorias de transações e orçamentos a copiar
+		Os aportes das metas são copiados junto com as metas; os que apontam para transações ou
+		cofrinhos fora da cópia ficam sem o vínculo, assim como as transações de recorrências
+		não copiadas.
+		"""
+		filters = filters or {}
+		tables = list(filters.get("tabelas") or PROFILE_TABLES.keys())
+		unknown = [t for t in tables if t not in PROFILE_TABLES]
+		if unknown:
+			raise ValueError(f"Tabelas inválidas para clonagem: {', '.join(unknown)}")
+
+		data_inicio: Optional[date] = filters.get("data_inicio")
+		data_fim: Optional[date] = filters.get("data_fim")
+		categorias = [str(c) for c in (filters.get("categorias") or [])]
+
+		with self._connect() as conn:
+			row = conn.execute("SELECT usuario_id FROM perfis_financeiros WHERE id = ?", (int(profile_id),)).fetchone()
+			if not row:
+				raise ValueError("Perfil financeiro não encontrado")
+			user_id = int(row["usuario_id"])
+			start_id_map(conn)
+			try:
+				cur = conn.execute(
+					"""
+					INSERT INTO perfis_financeiros
+					(usuario_id, nome, descricao, moeda, cdi_aa_padrao, ir_automatico, iof_automatico, ano_fiscal, ativo)
+					SELECT usuario_id, ?, descricao, moeda, cdi_aa_padrao, ir_automatico, iof_automatico, ano_fiscal, 1
+					FROM perfis_financeiros WHERE id = ?
+					""",
+					(new_name, int(profile_id)),
+				)
+				new_profile_id = int(cur.lastrowid)
+
+				for table in tables:
+					cols = ", ".join(PROFILE_TABLES[table])
+					where = ["usuario_id = ?", "perfil_id = ?"]
+					params: List[Any] = [user_id, int(profile_id)]
+					if table == "transacoes":
+						if data_inicio:
+							where.append("date(data) >= date(?)")
+							params.append(data_inicio.isoformat())
+						if data_fim:
+							where.append("date(data) <= date(?)")
+							params.append(data_fim.isoformat())
+					if table == "orcamentos":
+						if data_inicio:
+							where.append("ano * 100 + mes >= ?")
+							params.append(data_inicio.year * 100 + data_inicio.month)
+						if data_fim:
+							where.append("ano * 100 + mes <= ?")
+							params.append(data_fim.year * 100 + data_fim.month)
+					if categorias and table in ("transacoes", "orcamentos"):
+						where.append(f"categoria IN ({', '.join('?' for _ in categorias)})")
+						params.extend(categorias)
+
+					after_id = max_table_id(conn, table)
+					conn.execute(
+						f"""
+						INSERT INTO {table} (usuario_id, perfil_id, {cols})
+						SELECT usuario_id, ?, {cols} FROM {table}
+						WHERE {" AND ".join(where)}
+						ORDER BY id
+						""",
+						(new_profile_id, *params),
+					)
+					if table in ID_MAPPED_TABLES:
+						map_copied_ids(
+							conn, table, after_id, f"SELECT id AS old_id, id AS pos FROM {table} WHERE {' AND '.join(where)}", params
+						)
+
+				# Transações geradas por regras não copiadas ficam sem recorrente_id
+				remap_profile_links(conn)
+
+				# Aportes das metas copiadas (as transações e cofrinhos fora da cópia viram NULL)
+				if "metas_financeiras" in tables:
+					copy_goal_contributions(
+						conn,
+						"""
+						SELECT a.* FROM aportes_meta a JOIN metas_financeiras m ON m.id = a.meta_id
+						WHERE m.usuario_id = ? AND m.perfil_id = ?
+						""",
+						(user_id, int(profile_id)),
+					)
+				conn.commit()
+			except Exception:
+				conn.rollback()
+				raise
+			finally:
+				conn.execute("DROP TABLE IF EXISTS temp.profile_id_map")
+			return new_profile_id
+
 	# ===== ORÇAMENTOS =====
 	def add_budget(self, budget: Budget) -> int:
 		"""Adiciona um novo orçamento"""
@@ -649,6 +1236,64 @@ class DbManager:
 			conn.execute("DELETE FROM orcamentos WHERE id = ? AND usuario_id = ?", (budget_id, self.current_user_id))
 			conn.commit()
 
+	def get_budget_summary_between(self, start: date, end: date) -> List[Dict[str, Any]]:
+		"""
+		Como get_budget_summary, para todos os meses de [start, end), em uma única consulta.
+		Em meses cobertos só em parte (início ou fim no meio do mês), o gasto do trecho é
+		comparado com limite_periodo, o limite mensal proporcional aos dias cobertos.
+		"""
+		if not self.current_user_id or not self.current_profile_id:
+			return []
+
+		sql = """
+		WITH gastos AS (
+			SELECT categoria,
+				CAST(strftime('%Y', data) AS INTEGER) AS ano,
+				CAST(strftime('%m', data) AS INTEGER) AS mes,
+				SUM(valor) AS total
+			FROM transacoes
+			WHERE usuario_id = :usuario AND perfil_id = :perfil AND tipo = 'saida' AND pago = 1
+				AND date(data) >= date(:inicio) AND date(data) < date(:fim)
+			GROUP BY categoria, ano, mes
+		)
+		SELECT
+			o.ano,
+			o.mes,
+			o.categoria,
+			o.limite_mensal,
+			o.limite_periodo,
+			COALESCE(g.total, 0) AS gasto_atual,
+			CASE WHEN COALESCE(g.total, 0) > o.limite_periodo THEN 1 ELSE 0 END AS excedido
+		FROM (
+			SELECT ano, mes, categoria, limite_mensal,
+				limite_mensal
+					* (julianday(MIN(date(inicio, '+1 month'), date(:fim))) - julianday(MAX(inicio, date(:inicio))))
+					/ (julianday(date(inicio, '+1 month')) - julianday(inicio)) AS limite_periodo
+			FROM (
+				SELECT ano, mes, categoria, limite_mensal, printf('%04d-%02d-01', ano, mes) AS inicio
+				FROM orcamentos
+				WHERE usuario_id = :usuario AND perfil_id = :perfil AND ativo = 1
+					AND ano * 100 + mes >= :mes_ini AND ano * 100 + mes <= :mes_fim
+			)
+		) o
+		LEFT JOIN gastos g ON g.categoria = o.categoria AND g.ano = o.ano AND g.mes = o.mes
+		ORDER BY o.ano, o.mes, o.categoria
+		"""
+		last = date.fromordinal(end.toordinal() - 1)
+		with self._connect() as conn:
+			rows = conn.execute(
+				sql,
+				{
+					"usuario": self.current_user_id,
+					"perfil": self.current_profile_id,
+					"inicio": start.isoformat(),
+					"fim": end.isoformat(),
+					"mes_ini": start.year * 100 + start.month,
+					"mes_fim": last.year * 100 + last.month,
+				},
+			).fetchall()
+			return [dict(r) for r in rows]
+
 	def get_budget_summary(self, ano: int, mes: int) -> List[Dict[str, Any]]:
 		"""Retorna um resumo de cada orçamento com gastos atuais"""
 		if not self.current_user_id or not self.current_profile_id:
@@ -734,17 +1379,45 @@ class DbManager:
 		if ativas_apenas:
 			sql += " AND ativo = 1"
 		
-		sql += " ORDER BY prioridade DESC, data_alvo ASC"
+		sql += f" ORDER BY {GOAL_PRIORITY_RANK_SQL} DESC, data_alvo ASC"
 		
 		with self._connect() as conn:
 			rows = conn.execute(sql, (self.current_user_id, self.current_profile_id)).fetchall()
 			return [dict(r) for r in rows]
 
+	def list_goals_with_progress(self, ativas_apenas: bool = True, hoje: Optional[date] = None) -> List[Dict[str, Any]]:
+		"""
+		list_goals com o progresso calculado na própria consulta: progresso_percentual
+		(limitado a 100, como em get_goal_progress), faltam, dias_restantes até data_alvo
+		(negativo se vencida) e prioridade_ordem (alta=3, media=2, baixa=1)
+		"""
+		if not self.current_user_id or not self.current_profile_id:
+			return []
+
+		sql = f"""
+		SELECT id, nome, valor_alvo, valor_atual, data_inicio, data_alvo, ativo, descricao, prioridade,
+			CASE WHEN valor_alvo > 0 THEN MIN(100.0, valor_atual * 100.0 / valor_alvo) ELSE 0.0 END AS progresso_percentual,
+			MAX(0.0, valor_alvo - valor_atual) AS faltam,
+			CAST(julianday(date(data_alvo)) - julianday(date(?)) AS INTEGER) AS dias_restantes,
+			{GOAL_PRIORITY_RANK_SQL} AS prioridade_ordem
+		FROM metas_financeiras
+		WHERE usuario_id = ? AND perfil_id = ?
+		"""
+		if ativas_apenas:
+			sql += " AND ativo = 1"
+		sql += " ORDER BY prioridade_ordem DESC, data_alvo ASC"
+
+		with self._connect() as conn:
+			rows = conn.execute(
+				sql, ((hoje or date.today()).isoformat(), self.current_user_id, self.current_profile_id)
+			).fetchall()
+			return [dict(r) for r in rows]
+
 	def update_goal(self, goal_id: int, goal: Goal) -> None:
-		"""Atualiza uma meta financeira"""
+		"""Atualiza uma meta financeira; valor_atual não é alterado (é mantido pelos aportes)"""
 		sql = """
 		UPDATE metas_financeiras
-		SET nome = ?, valor_alvo = ?, valor_atual = ?, data_inicio = ?, data_alvo = ?, ativo = ?, descricao = ?, prioridade = ?
+		SET nome = ?, valor_alvo = ?, data_inicio = ?, data_alvo = ?, ativo = ?, descricao = ?, prioridade = ?
 		WHERE id = ? AND usuario_id = ?
 		"""
 		with self._connect() as conn:
@@ -753,7 +1426,6 @@ class DbManager:
 				(
 					goal.nome,
 					float(goal.valor_alvo),
-					float(goal.valor_atual),
 					goal.data_inicio.isoformat(),
 					goal.data_alvo.isoformat(),
 					1 if goal.ativo else 0,
@@ -786,3 +1458,132 @@ class DbManager:
 			"progresso_percentual": min(100, progresso),
 			"faltam": max(0, valor_alvo - valor_atual),
 		}
+
+	def _owned_goal(self, conn: sqlite3.Connection, goal_id: int) -> None:
+		row = conn.execute(
+			"SELECT 1 FROM metas_financeiras WHERE id = ? AND usuario_id = ?", (int(goal_id), self.current_user_id)
+		).fetchone()
+		if not row:
+			raise ValueError("Meta não encontrada")
+
+	def add_goal_contribution(
+		self,
+		goal_id: int,
+		valor: Optional[float] = None,
+		data: Optional[date] = None,
+		transacao_id: Optional[int] = None,
+		cofrinho_id: Optional[int] = None,
+		descricao: Optional[str] = None,
+	) -> int:
+		"""
+		Registra um aporte na meta (valor_atual é atualizado pelo trigger). Com transacao_id,
+		valor e data vêm da transação quando não informados.
+		"""
+		if not self.current_user_id:
+			raise ValueError("Usuário deve estar selecionado")
+		with self._connect() as conn:
+			self._owned_goal(conn, goal_id)
+			if transacao_id is not None:
+				tx = conn.execute(
+					"SELECT valor, data, descricao FROM transacoes WHERE id = ? AND usuario_id = ?",
+					(int(transacao_id), self.current_user_id),
+				).fetchone()
+				if not tx:
+					raise ValueError("Transação não encontrada")
+				valor = float(tx["valor"]) if valor is None else valor
+				data_txt = str(tx["data"])[:10] if data is None else data.isoformat()
+				descricao = descricao or tx["descricao"]
+			else:
+				if valor is None:
+					raise ValueError("Informe o valor do aporte")
+				data_txt = (data or date.today()).isoformat()
+			cur = conn.execute(
+				"""
+				INSERT INTO aportes_meta (meta_id, transacao_id, cofrinho_id, valor, data, descricao)
+				VALUES (?, ?, ?, ?, ?, ?)
+				""",
+				(int(goal_id), transacao_id, cofrinho_id, float(valor), data_txt, descricao),
+			)
+			conn.commit()
+			return int(cur.lastrowid)
+
+	def delete_goal_contribution(self, contribution_id: int) -> None:
+		"""Remove um aporte (o trigger desconta o valor da meta)"""
+		with self._connect() as conn:
+			conn.execute(
+				"""
+				DELETE FROM aportes_meta WHERE id = ?
+				AND meta_id IN (SELECT id FROM metas_financeiras WHERE usuario_id = ?)
+				""",
+				(int(contribution_id), self.current_user_id),
+			)
+			conn.commit()
+
+	def list_goal_contributions(
+		self, goal_id: int, start: Optional[date] = None, end: Optional[date] = None
+	) -> List[Dict[str, Any]]:
+		"""Aportes de uma meta em [start, end), por data"""
+		sql = """
+		SELECT a.id, a.meta_id, a.transacao_id, a.cofrinho_id, a.valor, a.data, a.descricao
+		FROM aportes_meta a JOIN metas_financeiras m ON m.id = a.meta_id
+		WHERE a.meta_id = ? AND m.usuario_id = ?
+		"""
+		params: List[Any] = [int(goal_id), self.current_user_id]
+		if start:
+			sql += " AND a.data >= ?"
+			params.append(start.isoformat())
+		if end:
+			sql += " AND a.data < ?"
+			params.append(end.isoformat())
+		sql += " ORDER BY a.data, a.id"
+		with self._connect() as conn:
+			return [dict(r) for r in conn.execute(sql, params).fetchall()]
+
+	def get_goal_contributions_by_month(
+		self, start: date, end: date, goal_id: Optional[int] = None
+	) -> Dict[Tuple[int, int, int], float]:
+		"""Total aportado por (meta_id, ano, mes) em [start, end), em uma única consulta agrupada"""
+		if not self.current_user_id or not self.current_profile_id:
+			return {}
+
+		sql = """
+		SELECT a.meta_id, CAST(strftime('%Y', a.data) AS INTEGER) AS ano, CAST(strftime('%m', a.data) AS INTEGER) AS mes,
+			SUM(a.valor) AS total
+		FROM aportes_meta a JOIN metas_financeiras m ON m.id = a.meta_id
+		WHERE m.usuario_id = ? AND m.perfil_id = ? AND a.data >= ? AND a.data < ?
+		"""
+		params: List[Any] = [self.current_user_id, self.current_profile_id, start.isoformat(), end.isoformat()]
+		if goal_id is not None:
+			sql += " AND a.meta_id = ?"
+			params.append(int(goal_id))
+		sql += " GROUP BY a.meta_id, ano, mes"
+		with self._connect() as conn:
+			return {
+				(int(r["meta_id"]), int(r["ano"]), int(r["mes"])): float(r["total"])
+				for r in conn.execute(sql, params).fetchall()
+			}
+
+	# ===== MANUTENÇÃO =====
+	def snapshot(self, dest: Path) -> Path:
+		"""Cópia consistente do banco inteiro (API de backup do SQLite), segura com o app aberto"""
+		dest.parent.mkdir(parents=True, exist_ok=True)
+		src = self._connect()
+		out = sqlite3.connect(str(dest))
+		try:
+			src.backup(out)
+		finally:
+			out.close()
+			src.close()
+		return dest
+
+	def vacuum(self) -> Tuple[int, int]:
+		"""Compacta o banco e atualiza as estatísticas do planejador. Retorna (bytes antes, bytes depois)"""
+		before = Path(self.db_path).stat().st_size
+		conn = self._connect()
+		try:
+			conn.execute("VACUUM")
+			conn.execute("ANALYZE")
+			conn.execute("PRAGMA optimize")
+		finally:
+			conn.close()
+		return before, Path(self.db_path).stat().st_size
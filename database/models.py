@@ -17,3 +17,23 @@ class Transaction:
 	pago: bool = True
 	tags_json: Optional[str] = None
 	anexo_caminho: Optional[str] = None
+	recorrente_id: Optional[int] = None  # regra de recorrencias que gerou a transação
+
+
+@dataclass(frozen=True)
+class Recurrence:
+	"""Regra de transação recorrente (assinaturas, salários, parcelamentos)"""
+	id: Optional[int]
+	tipo: str  # 'entrada' | 'saida'
+	categoria: str
+	descricao: Optional[str]
+	valor: float
+	frequencia: str  # 'semanal' | 'mensal' | 'anual'
+	data_inicio: date  # primeira ocorrência
+	dia: Optional[int] = None  # dia do mês (mensal); padrão: dia de data_inicio
+	intervalo: int = 1  # a cada N semanas/meses/anos
+	data_fim: Optional[date] = None  # inclusiva; None = sem fim
+	ocorrencias: Optional[int] = None  # limite de ocorrências (parcelas)
+	valor_ultima: Optional[float] = None  # valor da última ocorrência (ajuste de centavos das parcelas)
+	tags_json: Optional[str] = None
+	ativo: bool = True
@@ -0,0 +1 @@
+# pacote gefips (linha de comando, sem interface gráfica)
@@ -0,0 +1,5 @@
+from gefips.cli import main
+
+
+if __name__ == "__main__":
+	raise SystemExit(main())
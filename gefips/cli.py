@@ -0,0 +1,370 @@
+"""Linha de comando do GEFIPS (python -m gefips).
+
+Não importa PyQt5 nem backends Qt do matplotlib: serve para tarefas agendadas (cron)
+em servidores sem interface gráfica.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import date, datetime
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+
+from config import ensure_dirs, get_paths
+from database.db_manager import DbManager
+from utils.progress import OperationCancelled
+
+
+def _fail(msg: str) -> int:
+	print(f"erro: {msg}", file=sys.stderr)
+	return 1
+
+
+def _resolve_user(db: DbManager, ref: str) -> int:
+	user = db.get_user(int(ref)) if ref.isdigit() else db.get_user_by_name(ref)
+	if not user:
+		raise ValueError(f"Usuário não encontrado: {ref}")
+	return int(user.id)
+
+
+def _resolve_profile(db: DbManager, user_id: int, ref: str) -> int:
+	for profile in db.list_user_financial_profiles(user_id):
+		if str(profile.id) == ref or profile.nome == ref:
+			return int(profile.id)
+	raise ValueError(f"Perfil não encontrado: {ref}")
+
+
+def _select(db: DbManager, args: argparse.Namespace) -> Tuple[int, int]:
+	user_id = _resolve_user(db, args.user)
+	profile_id = _resolve_profile(db, user_id, args.profile)
+	db.set_current_user(user_id)
+	db.set_current_profile(profile_id)
+	return user_id, profile_id
+
+
+def _cmd_report(db: DbManager, args: argparse.Namespace) -> int:
+	from utils.reports import generate_monthly_report_pdf
+	from utils.reports_piggy import generate_piggy_projection_report_pdf, generate_portfolio_projection_report_pdf
+
+	_select(db, args)
+	out_dir = Path(args.out) if args.out else get_paths().exports_dir
+	if args.portfolio:
+		out = generate_portfolio_projection_report_pdf(db, out_dir, horizon_months=args.horizon)
+	elif args.piggy is not None:
+		model = None
+		if args.monte_carlo:
+			from utils.cdi_simulation import CdiModel
+
+			model = CdiModel(kappa=args.reversion, sigma=args.vol, theta=args.cdi_mean, n_paths=args.paths, seed=args.seed)
+		out = generate_piggy_projection_report_pdf(
+			db, out_dir, args.piggy, horizon_months=args.horizon, model=model, simulation_workers=args.workers
+		)
+	else:
+		today = date.today()
+		out = generate_monthly_report_pdf(db, out_dir, args.year or today.year, args.month or today.month)
+	print(out)
+	return 0
+
+
+def _parse_month(text: str) -> Tuple[int, int]:
+	try:
+		year, month = (int(part) for part in text.split("-"))
+	except ValueError:
+		raise ValueError(f"Mês inválido (use AAAA-MM): {text}")
+	if not 1 <= month <= 12:
+		raise ValueError(f"Mês inválido (use AAAA-MM): {text}")
+	return year, month
+
+
+def _cmd_reports(db: DbManager, args: argparse.Namespace) -> int:
+	from utils.reports_batch import generate_reports_batch
+
+	targets = None
+	if args.user:
+		user_id = _resolve_user(db, args.user)
+		if args.profile:
+			targets = [(user_id, _resolve_profile(db, user_id, args.profile))]
+		else:
+			targets = [(user_id, int(p.id)) for p in db.list_user_financial_profiles(user_id)]
+	start = _parse_month(args.start)
+	end = _parse_month(args.end) if args.end else start
+	out_dir = Path(args.out) if args.out else get_paths().exports_dir
+	print(generate_reports_batch(Path(db.db_path), out_dir, start, end, targets=targets, annual=args.annual, max_workers=args.workers, use_cache=not args.no_cache))
+	return 0
+
+
+def _parse_date(text: str) -> date:
+	try:
+		return date.fromisoformat(text)
+	except ValueError:
+		raise ValueError(f"Data inválida (use AAAA-MM-DD): {text}")
+
+
+def _cmd_export(db: DbManager, args: argparse.Namespace) -> int:
+	from utils.exports import EXPORTERS
+
+	_select(db, args)
+	start, end = _parse_date(args.start), _parse_date(args.end)
+	if end < start:
+		return _fail("--end anterior a --start")
+	out_dir = Path(args.out) if args.out else get_paths().exports_dir
+	for kind in args.kind:
+		print(EXPORTERS[kind](db, out_dir, start, end, fmt=args.format))
+	return 0
+
+
+def _cmd_cdi_import(db: DbManager, args: argparse.Namespace) -> int:
+	from utils.cdi_history import import_cdi_csv
+
+	total = 0
+	for path in args.files:
+		total += import_cdi_csv(db, Path(path), args.unit)
+	first, last, count = db.get_cdi_range()
+	print(f"{total} taxas importadas; histórico de {first} a {last} ({count} dias úteis)")
+	return 0
+
+
+def _cmd_backup(db: DbManager, args: argparse.Namespace) -> int:
+	from utils.backup import export_all_profiles, export_profile, export_profile_sqlite
+
+	out_dir = Path(args.out) if args.out else get_paths().backup_dir
+	if args.all:
+		print(export_all_profiles(Path(db.db_path), out_dir, max_workers=args.workers))
+		return 0
+	if not args.user or not args.profile:
+		return _fail("informe --user e --profile, ou use --all")
+	user_id, profile_id = _select(db, args)
+	exporter = export_profile_sqlite if args.format == "db" else export_profile
+	print(exporter(db, out_dir, user_id, profile_id))
+	return 0
+
+
+def _cmd_verify(db: DbManager, args: argparse.Namespace) -> int:
+	from utils.backup import verify_backup
+
+	status = 0
+	for path in args.files:
+		report = verify_backup(Path(path))
+		if report["ok"]:
+			print(f"{path}: ok ({report['format']}{'' if report['verified'] else ', sem checksums'})")
+		else:
+			print(f"{path}: FALHOU - {report['error']}")
+			status = 1
+	return status
+
+
+def _cmd_restore(db: DbManager, args: argparse.Namespace) -> int:
+	from utils.backup import merge_restore_profile, restore_profile, restore_profile_sqlite
+
+	backup_file = Path(args.file)
+	user_id = _resolve_user(db, args.user)
+	if args.merge_into:
+		profile_id = _resolve_profile(db, user_id, args.merge_into)
+		counts = merge_restore_profile(db, backup_file, user_id, profile_id)
+		print(json.dumps(counts, ensure_ascii=False, indent=2))
+		return 0
+	restorer = restore_profile_sqlite if backup_file.suffix.lower() == ".db" else restore_profile
+	print(restorer(db, backup_file, user_id))
+	return 0
+
+
+def _cmd_snapshot(db: DbManager, args: argparse.Namespace) -> int:
+	if args.dest:
+		dest = Path(args.dest)
+	else:
+		dest = get_paths().backup_dir / f"snapshot_{datetime.now().strftime('%Y%m%d-%H%M%S')}.db"
+	print(db.snapshot(dest))
+	return 0
+
+
+def _cmd_vacuum(db: DbManager, args: argparse.Namespace) -> int:
+	before, after = db.vacuum()
+	print(f"{before} -> {after} bytes")
+	return 0
+
+
+def _timed(label: str, fn: Callable[[], object], repeat: int) -> Tuple[str, float]:
+	best = float("inf")
+	for _ in range(max(1, repeat)):
+		started = time.perf_counter()
+		fn()
+		best = min(best, time.perf_counter() - started)
+	return label, best
+
+
+def _cmd_benchmark(db: DbManager, args: argparse.Namespace) -> int:
+	import numpy as np
+
+	from utils.backup import export_profile, verify_backup
+	from utils.investments import (
+		PROJECTION_CACHE,
+		cached_projection,
+		project_piggies,
+		project_piggy,
+		project_piggy_arrays,
+		project_piggy_daily,
+	)
+
+	user_id, profile_id = _select(db, args)
+	today = date.today()
+	year, month = args.year or today.year, args.month or today.month
+
+	results: List[Tuple[str, float]] = [
+		_timed("get_month_balance", lambda: db.get_month_balance(year, month), args.repeat),
+		_timed("list_month_transactions", lambda: db.list_month_transactions(year, month), args.repeat),
+		_timed("get_month_category_totals", lambda: db.get_month_category_totals(year, month, "saida"), args.repeat),
+		_timed("get_budget_summary", lambda: db.get_budget_summary(year, month), args.repeat),
+		_timed("list_goals", lambda: db.list_goals(ativas_apenas=False), args.repeat),
+		_timed(
+			"project_piggy (360 meses)",
+			lambda: project_piggy(today, 1000.0, 100.0, 0.11, horizon_months=360, aplicar_impostos=True),
+			args.repeat,
+		),
+		_timed(
+			"project_piggy_arrays (360 meses)",
+			lambda: project_piggy_arrays(today, 1000.0, 100.0, 0.11, horizon_months=360, aplicar_impostos=True),
+			args.repeat,
+		),
+		_timed(
+			"cached_projection (360 meses, acerto)",
+			lambda: cached_projection(today, 1000.0, 100.0, 0.11, horizon_months=360, aplicar_impostos=True),
+			args.repeat,
+		),
+		_timed(
+			"project_piggy_daily (10 anos, dias úteis)",
+			lambda: project_piggy_daily(today, 1000.0, 100.0, 0.11, horizon_months=120, aplicar_impostos=True),
+			args.repeat,
+		),
+		_timed(
+			"project_piggies (1000 aportes x 360 meses)",
+			lambda: project_piggies(today, 1000.0, np.linspace(0.0, 5000.0, 1000).reshape(-1, 1), 0.11, np.arange(1, 361), True),
+			args.repeat,
+		),
+	]
+	with tempfile.TemporaryDirectory() as tmp:
+		out = export_profile(db, Path(tmp), user_id, profile_id, filename="bench.json")
+		results.append(_timed("export_profile", lambda: export_profile(db, Path(tmp), user_id, profile_id, filename="bench.json"), args.repeat))
+		results.append(_timed("verify_backup", lambda: verify_backup(out), args.repeat))
+
+	width = max(len(label) for label, _ in results)
+	for label, seconds in results:
+		print(f"{label.ljust(width)}  {seconds * 1000:10.2f} ms")
+	info = PROJECTION_CACHE.info()
+	print(f"cache de projeções: {info['hits']} acertos, {info['misses']} faltas, {info['size']}/{info['maxsize']} itens")
+	return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+	parser = argparse.ArgumentParser(prog="gefips", description="GEFIPS - tarefas sem interface gráfica")
+	parser.add_argument("--db", help="caminho do banco (padrão: pasta de dados do GEFIPS)")
+	sub = parser.add_subparsers(dest="command", required=True)
+
+	def add_selection(p: argparse.ArgumentParser, required: bool = True) -> None:
+		p.add_argument("--user", required=required, help="nome ou id do usuário")
+		p.add_argument("--profile", required=required, help="nome ou id do perfil financeiro")
+
+	p = sub.add_parser("report", help="gera relatório PDF (mensal, de cofrinho ou da carteira)")
+	add_selection(p)
+	p.add_argument("--year", type=int)
+	p.add_argument("--month", type=int)
+	p.add_argument("--piggy", type=int, help="id do cofrinho (relatório de projeção)")
+	p.add_argument("--portfolio", action="store_true", help="relatório consolidado de todos os cofrinhos")
+	p.add_argument("--horizon", type=int, default=12, help="meses de projeção do cofrinho")
+	p.add_argument("--monte-carlo", action="store_true", help="inclui faixas P5/P50/P95 de cenários do CDI (com --piggy)")
+	p.add_argument("--paths", type=int, default=2000, help="trajetórias simuladas do CDI")
+	p.add_argument("--vol", type=float, default=1.5, help="volatilidade anual do CDI (p.p.)")
+	p.add_argument("--reversion", type=float, default=0.5, help="velocidade de reversão à média (por ano)")
+	p.add_argument("--cdi-mean", type=float, help="CDI de longo prazo (%% a.a.; padrão: CDI do cofrinho)")
+	p.add_argument("--seed", type=int, default=42)
+	p.add_argument("--workers", type=int, help="processos da simulação (padrão: nº de CPUs)")
+	p.add_argument("--out", help="pasta de saída (padrão: exports)")
+	p.set_defaults(func=_cmd_report)
+
+	p = sub.add_parser("reports", help="gera relatórios mensais em lote, em paralelo")
+	add_selection(p, required=False)
+	p.add_argument("--start", required=True, help="primeiro mês (AAAA-MM)")
+	p.add_argument("--end", help="último mês (AAAA-MM, padrão: --start)")
+	p.add_argument("--annual", action="store_true", help="inclui o relatório anual de cada ano do período")
+	p.add_argument("--workers", type=int, help="processos do lote (padrão: nº de CPUs)")
+	p.add_argument("--no-cache", action="store_true", help="renderiza tudo, mesmo meses sem alteração")
+	p.add_argument("--out", help="pasta de saída (padrão: exports)")
+	p.set_defaults(func=_cmd_reports)
+
+	p = sub.add_parser("export", help="exporta planilhas (XLSX/CSV) de um período")
+	add_selection(p)
+	p.add_argument("--start", required=True, help="data inicial (AAAA-MM-DD)")
+	p.add_argument("--end", required=True, help="data final, inclusive (AAAA-MM-DD)")
+	p.add_argument(
+		"--kind",
+		nargs="+",
+		choices=("transacoes", "categorias", "orcamentos"),
+		default=["transacoes"],
+		help="o que exportar (padrão: transacoes)",
+	)
+	p.add_argument("--format", choices=("xlsx", "csv"), default="xlsx")
+	p.add_argument("--out", help="pasta de saída (padrão: exports)")
+	p.set_defaults(func=_cmd_export)
+
+	p = sub.add_parser("cdi-import", help="importa CDI histórico de arquivos CSV (data;taxa)")
+	p.add_argument("files", nargs="+", help="CSVs, ex.: séries 12, 4389 ou 4391 do SGS do Banco Central")
+	p.add_argument("--unit", choices=["aa", "ad", "am"], default="ad", help="unidade da taxa: %% a.a., %% a.d. ou %% a.m.")
+	p.set_defaults(func=_cmd_cdi_import)
+
+	p = sub.add_parser("backup", help="exporta um perfil ou todos os perfis")
+	add_selection(p, required=False)
+	p.add_argument("--all", action="store_true", help="todos os perfis de todos os usuários, em paralelo")
+	p.add_argument("--workers", type=int, help="processos do lote (padrão: nº de CPUs)")
+	p.add_argument("--format", choices=("json", "db"), default="json")
+	p.add_argument("--out", help="pasta de saída (padrão: backup)")
+	p.set_defaults(func=_cmd_backup)
+
+	p = sub.add_parser("verify", help="verifica checksums de arquivos de backup")
+	p.add_argument("files", nargs="+")
+	p.set_defaults(func=_cmd_verify)
+
+	p = sub.add_parser("restore", help="restaura um backup em novo perfil ou mescla em um existente")
+	p.add_argument("file")
+	p.add_argument("--user", required=True, help="nome ou id do usuário de destino")
+	p.add_argument("--merge-into", help="perfil existente onde mesclar (ignora duplicados)")
+	p.set_defaults(func=_cmd_restore)
+
+	p = sub.add_parser("snapshot", help="cópia consistente do banco inteiro")
+	p.add_argument("--dest", help="arquivo de destino (padrão: backup/snapshot_<data>.db)")
+	p.set_defaults(func=_cmd_snapshot)
+
+	p = sub.add_parser("vacuum", help="compacta o banco e atualiza estatísticas")
+	p.set_defaults(func=_cmd_vacuum)
+
+	p = sub.add_parser("benchmark", help="mede o tempo das operações principais em um perfil")
+	add_selection(p)
+	p.add_argument("--year", type=int)
+	p.add_argument("--month", type=int)
+	p.add_argument("--repeat", type=int, default=3)
+	p.set_defaults(func=_cmd_benchmark)
+
+	return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+	args = build_parser().parse_args(argv)
+	if args.db:
+		db_path = Path(args.db)
+	else:
+		paths = get_paths()
+		ensure_dirs(paths)
+		db_path = paths.db_path
+	try:
+		db = DbManager(db_path)
+		db.init_schema()
+		return int(args.func(db, args) or 0)
+	except OperationCancelled:
+		return _fail("operação cancelada")
+	except sqlite3.Error as e:
+		return _fail(f"banco de dados: {e}")
+	except (ValueError, OSError) as e:
+		return _fail(str(e))
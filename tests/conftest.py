@@ -0,0 +1,23 @@
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from database.db_manager import DbManager  # noqa: E402
+from database.models_user import FinancialProfile, User  # noqa: E402
+
+
+@pytest.fixture
+def db(tmp_path: Path) -> DbManager:
+	"""Banco temporário com um usuário e um perfil selecionados."""
+	manager = DbManager(tmp_path / "gefips.db")
+	manager.init_schema()
+	user_id = manager.add_user(User(nome="ana", senha_hash="x"))
+	profile_id = manager.add_financial_profile(FinancialProfile(user_id=user_id, nome="Casa"))
+	manager.set_current_user(user_id)
+	manager.set_current_profile(profile_id)
+	return manager
@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import json
+from datetime import date
+
+import pytest
+
+from database.models import Transaction
+from database.models_budgets import Budget
+from database.models_investments import PiggyBank
+from database.models_user import FinancialProfile
+from utils.backup import (
+	checksum_path,
+	export_profile,
+	export_profile_sqlite,
+	merge_restore_profile,
+	restore_profile,
+	restore_profile_sqlite,
+	verify_backup,
+)
+
+
+def _profile_names(db):
+	return sorted(p.nome for p in db.list_user_financial_profiles(db.current_user_id))
+
+
+def test_repeated_restores_get_numbered_names(db, tmp_path):
+	db.add_transaction(Transaction(None, "saida", "Mercado", None, "Feira", 80.0, date(2026, 3, 1)))
+	source = db.current_profile_id
+	json_file = export_profile(db, tmp_path, db.current_user_id, source)
+	sqlite_file = export_profile_sqlite(db, tmp_path, db.current_user_id, source)
+
+	restore_profile(db, json_file, db.current_user_id)
+	restore_profile_sqlite(db, sqlite_file, db.current_user_id)
+	restore_profile(db, json_file, db.current_user_id)
+	restore_profile_sqlite(db, sqlite_file, db.current_user_id, "cópia")
+	restore_profile(db, json_file, db.current_user_id, "cópia")
+
+	assert _profile_names(db) == [
+		"Casa",
+		"Casa (Restaurado 2)",
+		"Casa (Restaurado 3)",
+		"Casa (Restaurado)",
+		"Casa cópia",
+		"Casa cópia 2",
+	]
+
+
+def _json_backup(db, tmp_path):
+	db.add_transaction(Transaction(None, "saida", "Mercado", None, "Feira", 80.0, date(2026, 3, 1)))
+	return export_profile(db, tmp_path, db.current_user_id, db.current_profile_id)
+
+
+def test_verify_detects_flipped_byte_and_truncation(db, tmp_path):
+	backup = _json_backup(db, tmp_path)
+	assert verify_backup(backup)["verified"]
+
+	body = backup.read_bytes()
+	pos = body.index(b"Feira")
+	backup.write_bytes(body[:pos] + b"G" + body[pos + 1:])
+	report = verify_backup(backup)
+	assert not report["ok"] and report["bad_chunks"] == [0]
+	with pytest.raises(ValueError, match="corrompido"):
+		restore_profile(db, backup, db.current_user_id)
+
+	backup.write_bytes(body[:-10])
+	assert "truncado" in verify_backup(backup)["error"]
+
+
+def test_backup_without_checksums_is_refused_unless_version_1(db, tmp_path):
+	backup = _json_backup(db, tmp_path)
+	checksum_path(backup).unlink()
+	report = verify_backup(backup)
+	assert not report["ok"] and "Checksums ausentes" in report["error"]
+	with pytest.raises(ValueError, match="corrompido"):
+		restore_profile(db, backup, db.current_user_id)
+
+	# backups da versão 1 nunca tiveram checksums
+	payload = json.loads(backup.read_text(encoding="utf-8"))
+	payload["version"] = 1
+	backup.write_text(json.dumps(payload), encoding="utf-8")
+	assert verify_backup(backup) == {"ok": True, "format": "json-legado", "verified": False, "bad_chunks": [], "error": None}
+	db.set_current_profile(restore_profile(db, backup, db.current_user_id))
+	assert db.count_transactions_between(date(2026, 1, 1), date(2027, 1, 1)) == 1
+
+	# "version" fora do início não escapa da verificação
+	payload["version"] = 2
+	backup.write_text(json.dumps({"exported_at": payload.pop("exported_at"), **payload}), encoding="utf-8")
+	with pytest.raises(ValueError, match="checksums ausentes"):
+		restore_profile(db, backup, db.current_user_id)
+
+
+def _row_counts(db, profile_id: int):
+	with db._connect() as conn:
+		return {
+			table: conn.execute(f"SELECT COUNT(*) FROM {table} WHERE perfil_id = ?", (profile_id,)).fetchone()[0]
+			for table in ("transacoes", "cofrinhos", "orcamentos")
+		}
+
+
+@pytest.mark.parametrize("export", [export_profile, export_profile_sqlite])
+def test_merge_is_idempotent_and_keeps_repeated_rows(db, tmp_path, export):
+	feira = Transaction(None, "saida", "Mercado", None, "Feira", 80.0, date(2026, 3, 1))
+	db.add_transaction(feira)
+	db.add_transaction(feira)  # duas compras iguais no mesmo dia são dois registros
+	db.add_transaction(Transaction(None, "entrada", "Salário", None, "Março", 5000.0, date(2026, 3, 5), pago=True))
+	db.add_budget(Budget(None, "Mercado", 900.0, 3, 2026))
+	db.add_piggy_bank(PiggyBank(None, "Reserva", "Banco", 100.0, 10.0, 1000.0, 0.0, date(2026, 1, 1)))
+	source = db.current_profile_id
+	backup = export(db, tmp_path, db.current_user_id, source)
+
+	ignored = merge_restore_profile(db, backup, db.current_user_id, source)
+	assert ignored["transacoes"] == {"inseridos": 0, "ignorados": 3, "conflitantes": 0}
+	assert _row_counts(db, source) == {"transacoes": 3, "cofrinhos": 1, "orcamentos": 1}
+
+	target = db.add_financial_profile(FinancialProfile(user_id=db.current_user_id, nome="Destino"))
+	first = merge_restore_profile(db, backup, db.current_user_id, target)
+	assert first["transacoes"] == {"inseridos": 3, "ignorados": 0, "conflitantes": 0}
+	assert first["orcamentos"] == first["cofrinhos"] == {"inseridos": 1, "ignorados": 0, "conflitantes": 0}
+
+	second = merge_restore_profile(db, backup, db.current_user_id, target)
+	assert all(c["inseridos"] == 0 and c["conflitantes"] == 0 for c in second.values())
+	assert _row_counts(db, target) == {"transacoes": 3, "cofrinhos": 1, "orcamentos": 1}
+
+	# mesma chave com outros campos diferentes: conflito, e o destino não é alterado
+	with db._connect() as conn:
+		conn.execute("UPDATE transacoes SET pago = 0 WHERE perfil_id = ? AND categoria = 'Salário'", (target,))
+		conn.commit()
+	third = merge_restore_profile(db, backup, db.current_user_id, target)
+	assert third["transacoes"] == {"inseridos": 0, "ignorados": 2, "conflitantes": 1}
+	with db._connect() as conn:
+		assert conn.execute("SELECT pago FROM transacoes WHERE perfil_id = ? AND categoria = 'Salário'", (target,)).fetchone()[0] == 0
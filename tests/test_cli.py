@@ -0,0 +1,14 @@
+from __future__ import annotations
+
+from gefips.cli import main
+
+
+def test_errors_exit_with_one_line_message(db, tmp_path, capsys):
+	assert main(["--db", str(db.db_path), "restore", str(tmp_path), "--user", "ana"]) == 1
+	assert capsys.readouterr().err.startswith("erro: ")
+
+	not_a_db = tmp_path / "texto.db"
+	not_a_db.write_text("isto não é um banco SQLite " * 100)
+	assert main(["--db", str(not_a_db), "restore", str(tmp_path), "--user", "ana"]) == 1
+	err = capsys.readouterr().err
+	assert err.startswith("erro: banco de dados:") and err.count("\n") == 1
@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+from dataclasses import replace
+from datetime import date
+
+import pytest
+
+from database.models import Transaction
+from database.models_budgets import Goal
+from database.models_investments import PiggyBank
+from utils.backup import export_profile, export_profile_sqlite, merge_restore_profile, restore_profile, restore_profile_sqlite
+
+
+def _goal(db, nome="Viagem", atual=100.0) -> int:
+	return db.add_goal(Goal(None, nome, 5000.0, atual, date(2026, 1, 1), date(2027, 1, 1), prioridade="alta"))
+
+
+def _atual(db, goal_id: int) -> float:
+	return float(db.get_goal(goal_id)["valor_atual"])
+
+
+def _tx(valor=300.0, data=date(2026, 3, 10)) -> Transaction:
+	return Transaction(None, "saida", "Investimento", None, "Reserva", valor, data)
+
+
+def _aporte(db, contribution_id: int):
+	with db._connect() as conn:
+		return conn.execute("SELECT * FROM aportes_meta WHERE id = ?", (contribution_id,)).fetchone()
+
+
+def test_insert_and_delete_update_goal_total(db):
+	goal = _goal(db)
+	first = db.add_goal_contribution(goal, valor=250.0, data=date(2026, 2, 1))
+	db.add_goal_contribution(goal, valor=50.0, data=date(2026, 2, 15))
+	assert _atual(db, goal) == pytest.approx(400.0)
+
+	db.delete_goal_contribution(first)
+	assert _atual(db, goal) == pytest.approx(150.0)
+
+
+def test_update_moves_value_between_goals(db):
+	origem, destino = _goal(db, "Viagem"), _goal(db, "Carro", atual=0.0)
+	aporte = db.add_goal_contribution(origem, valor=80.0, data=date(2026, 2, 1))
+	with db._connect() as conn:
+		conn.execute("UPDATE aportes_meta SET valor = 120.0 WHERE id = ?", (aporte,))
+		conn.commit()
+	assert _atual(db, origem) == pytest.approx(220.0)
+
+	with db._connect() as conn:
+		conn.execute("UPDATE aportes_meta SET meta_id = ? WHERE id = ?", (destino, aporte))
+		conn.commit()
+	assert _atual(db, origem) == pytest.approx(100.0)
+	assert _atual(db, destino) == pytest.approx(120.0)
+
+
+def test_linked_transaction_edit_follows_contribution(db):
+	goal = _goal(db)
+	tx = _tx()
+	tx_id = db.add_transaction(tx)
+	aporte = db.add_goal_contribution(goal, transacao_id=tx_id)
+	assert _atual(db, goal) == pytest.approx(400.0)
+
+	db.update_transaction(tx_id, replace(tx, valor=350.0, data=date(2026, 3, 20)))
+	row = _aporte(db, aporte)
+	assert row["valor"] == pytest.approx(350.0)
+	assert row["data"] == "2026-03-20"
+	assert _atual(db, goal) == pytest.approx(450.0)
+
+
+def test_partial_contribution_keeps_its_value_on_transaction_edit(db):
+	goal = _goal(db)
+	tx = _tx()
+	tx_id = db.add_transaction(tx)
+	aporte = db.add_goal_contribution(goal, valor=100.0, transacao_id=tx_id)
+
+	db.update_transaction(tx_id, replace(tx, valor=500.0))
+	assert _aporte(db, aporte)["valor"] == pytest.approx(100.0)
+	assert _atual(db, goal) == pytest.approx(200.0)
+
+
+def test_deleting_transaction_cascades_to_contribution(db):
+	goal = _goal(db)
+	tx_id = db.add_transaction(_tx())
+	aporte = db.add_goal_contribution(goal, transacao_id=tx_id)
+
+	db.delete_transaction(tx_id)
+	assert _aporte(db, aporte) is None
+	assert _atual(db, goal) == pytest.approx(100.0)
+
+
+def _profile_with_contributions(db):
+	goal = _goal(db)
+	tx_id = db.add_transaction(_tx())
+	piggy = db.add_piggy_bank(PiggyBank(None, "Reserva", "Banco", 100.0, 10.0, 1000.0, 0.0, date(2026, 1, 1)))
+	db.add_goal_contribution(goal, transacao_id=tx_id)
+	db.add_goal_contribution(goal, valor=40.0, data=date(2026, 4, 1), cofrinho_id=piggy)
+	return goal
+
+
+def _contributions(db, profile_id: int):
+	with db._connect() as conn:
+		goals = [
+			(r["nome"], round(float(r["valor_atual"]), 2))
+			for r in conn.execute("SELECT nome, valor_atual FROM metas_financeiras WHERE perfil_id = ? ORDER BY nome", (profile_id,))
+		]
+		rows = [
+			tuple(r)
+			for r in conn.execute(
+				"""
+				SELECT m.nome, a.valor, a.data, t.perfil_id, c.perfil_id
+				FROM aportes_meta a
+				JOIN metas_financeiras m ON m.id = a.meta_id
+				LEFT JOIN transacoes t ON t.id = a.transacao_id
+				LEFT JOIN cofrinhos c ON c.id = a.cofrinho_id
+				WHERE m.perfil_id = ? ORDER BY a.valor
+				""",
+				(profile_id,),
+			)
+		]
+	return goals, rows
+
+
+def test_clone_copies_contributions_without_double_counting(db):
+	_profile_with_contributions(db)
+	source = db.current_profile_id
+	clone = db.clone_profile(source, "Cópia")
+
+	goals, rows = _contributions(db, clone)
+	assert goals == [("Viagem", 440.0)]
+	# transação e cofrinho apontam para as cópias no novo perfil
+	assert rows == [("Viagem", 40.0, "2026-04-01", None, clone), ("Viagem", 300.0, "2026-03-10", clone, None)]
+
+
+@pytest.mark.parametrize("export, restore", [(export_profile, restore_profile), (export_profile_sqlite, restore_profile_sqlite)])
+def test_backup_round_trip_keeps_contributions(db, tmp_path, export, restore):
+	_profile_with_contributions(db)
+	source = db.current_profile_id
+	backup = export(db, tmp_path / "backups", db.current_user_id, source)
+	restored = restore(db, backup, db.current_user_id)
+
+	goals, rows = _contributions(db, restored)
+	assert goals == [("Viagem", 440.0)]
+	assert rows == [("Viagem", 40.0, "2026-04-01", None, restored), ("Viagem", 300.0, "2026-03-10", restored, None)]
+
+	# mesclar no próprio perfil de origem não duplica nada
+	counts = merge_restore_profile(db, backup, db.current_user_id, source)
+	assert counts["aportes_meta"] == {"inseridos": 0, "ignorados": 2, "conflitantes": 0}
+	assert _contributions(db, source)[0] == [("Viagem", 440.0)]
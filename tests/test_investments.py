@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+from dataclasses import astuple
+from datetime import date
+
+import pytest
+from dateutil.relativedelta import relativedelta
+
+from utils.investments import ProjectionPoint, iof_rate_by_days, ir_rate_by_days, monthly_rate_from_annual, project_piggy
+
+
+def _reference_projection(start, principal, aporte_mensal, annual_rate, horizon_months, aplicar_impostos):
+	"""Laço mês a mês da implementação original de project_piggy."""
+	monthly_rate = monthly_rate_from_annual(annual_rate)
+	saldo = total_aportes = float(principal)
+	points = []
+	for m in range(1, horizon_months + 1):
+		if aporte_mensal > 0:
+			saldo += aporte_mensal
+			total_aportes += aporte_mensal
+		saldo *= 1.0 + monthly_rate
+
+		ref = start + relativedelta(months=+m)
+		days = max(1, (ref - start).days)
+		rendimento = max(0.0, saldo - total_aportes)
+		iof = ir = 0.0
+		saldo_liq = saldo
+		if aplicar_impostos and rendimento > 0:
+			iof = rendimento * iof_rate_by_days(days)
+			ir = max(0.0, rendimento - iof) * ir_rate_by_days(days)
+			saldo_liq = total_aportes + max(0.0, rendimento - iof - ir)
+		points.append(ProjectionPoint(ref, m, total_aportes, saldo, rendimento, iof, ir, saldo_liq))
+	return points
+
+
+@pytest.mark.parametrize("aplicar_impostos", [False, True])
+@pytest.mark.parametrize(
+	"start, principal, aporte, rate",
+	[
+		(date(2026, 1, 31), 1000.0, 0.0, 0.1065),
+		(date(2026, 1, 31), 1000.0, 250.0, 0.1065),
+		(date(2025, 3, 15), 0.0, 500.0, 0.14),
+		(date(2025, 3, 15), 5000.0, -100.0, 0.12),
+		(date(2024, 2, 29), 2500.0, 100.0, 0.0),
+	],
+)
+def test_project_piggy_matches_reference_loop(start, principal, aporte, rate, aplicar_impostos):
+	got = project_piggy(start, principal, aporte, rate, horizon_months=60, aplicar_impostos=aplicar_impostos)
+	expected = _reference_projection(start, principal, aporte, rate, 60, aplicar_impostos)
+
+	assert len(got) == len(expected) == 60
+	for g, e in zip(got, expected):
+		assert (g.ref_date, g.months) == (e.ref_date, e.months)
+		assert astuple(g)[2:] == pytest.approx(astuple(e)[2:], rel=1e-12, abs=1e-9)
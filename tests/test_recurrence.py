@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+from datetime import date
+
+import pytest
+
+from database.models import Recurrence
+from utils.backup import export_profile, export_profile_sqlite, merge_restore_profile, restore_profile, restore_profile_sqlite
+from utils.recurrence import expand_rule, materialize_recurrences, occurrence_dates
+
+
+def _rule(**kw):
+	rule = {"id": 1, "tipo": "saida", "categoria": "Contas", "descricao": "Aluguel", "valor": 100.0, "frequencia": "mensal"}
+	rule.update(kw)
+	return rule
+
+
+def _dates(rule, start, end):
+	k, days = occurrence_dates(rule, start, end)
+	return k.tolist(), days.astype(str).tolist()
+
+
+@pytest.mark.parametrize(
+	"inicio, esperado",
+	[
+		("2024-01-31", ["2024-01-31", "2024-02-29", "2024-03-31", "2024-04-30"]),
+		("2025-01-31", ["2025-01-31", "2025-02-28", "2025-03-31", "2025-04-30"]),
+	],
+)
+def test_monthly_day_31_clamps_to_month_end(inicio, esperado):
+	ano = int(inicio[:4])
+	_, days = _dates(_rule(data_inicio=inicio), date(ano, 1, 1), date(ano, 5, 1))
+	assert days == esperado
+
+
+def test_yearly_feb_29_falls_on_feb_28_outside_leap_years():
+	_, days = _dates(_rule(frequencia="anual", data_inicio="2024-02-29"), date(2024, 1, 1), date(2029, 1, 1))
+	assert days == ["2024-02-29", "2025-02-28", "2026-02-28", "2027-02-28", "2028-02-29"]
+
+
+def test_day_before_start_day_begins_next_month():
+	_, days = _dates(_rule(data_inicio="2025-01-20", dia=5), date(2025, 1, 1), date(2025, 4, 1))
+	assert days == ["2025-02-05", "2025-03-05"]
+
+	_, days = _dates(_rule(data_inicio="2025-01-20", dia=25), date(2025, 1, 1), date(2025, 3, 1))
+	assert days == ["2025-01-25", "2025-02-25"]
+
+
+def test_occurrence_limit_keeps_installment_index():
+	rule = _rule(data_inicio="2025-01-10", ocorrencias=3)
+	assert _dates(rule, date(2025, 1, 1), date(2026, 1, 1)) == ([0, 1, 2], ["2025-01-10", "2025-02-10", "2025-03-10"])
+	# janela começando depois das primeiras parcelas mantém a numeração
+	assert _dates(rule, date(2025, 3, 1), date(2026, 1, 1)) == ([2], ["2025-03-10"])
+
+
+def test_end_date_is_inclusive_and_weekly_interval():
+	rule = _rule(frequencia="semanal", intervalo=2, data_inicio="2025-01-06", data_fim="2025-02-03")
+	_, days = _dates(rule, date(2025, 1, 1), date(2025, 12, 31))
+	assert days == ["2025-01-06", "2025-01-20", "2025-02-03"]
+
+
+def test_last_installment_uses_valor_ultima():
+	rule = _rule(descricao="TV", data_inicio="2025-01-10", ocorrencias=3, valor=33.33, valor_ultima=33.34)
+	rows = expand_rule(rule, date(2025, 1, 1), date(2026, 1, 1))
+	assert [r["valor"] for r in rows] == [33.33, 33.33, 33.34]
+	assert [r["descricao"] for r in rows] == ["Parcela 1/3 - TV", "Parcela 2/3 - TV", "Parcela 3/3 - TV"]
+
+
+def _add_rules(db):
+	db.add_recurrence(Recurrence(None, "saida", "Streaming", "Netflix", 39.9, "mensal", date(2025, 1, 31)))
+	db.add_recurrence(Recurrence(None, "saida", "Compras", "TV", 100.0, "mensal", date(2025, 3, 10), ocorrencias=4, valor_ultima=100.5))
+
+
+def _occurrences(db, profile_id: int):
+	with db._connect() as conn:
+		return sorted(
+			tuple(r)
+			for r in conn.execute(
+				"""
+				SELECT r.descricao, t.descricao, t.data, t.valor, r.perfil_id
+				FROM transacoes t LEFT JOIN recorrencias r ON r.id = t.recorrente_id
+				WHERE t.perfil_id = ? AND t.recorrente = 1
+				""",
+				(profile_id,),
+			)
+		)
+
+
+def test_materialize_is_idempotent(db):
+	_add_rules(db)
+	assert materialize_recurrences(db, date(2025, 6, 30)) == 6 + 4
+	before = _occurrences(db, db.current_profile_id)
+
+	assert materialize_recurrences(db, date(2025, 6, 30)) == 0
+	assert _occurrences(db, db.current_profile_id) == before
+
+	# avançar o limite lança só o que falta; as parcelas já terminaram
+	assert materialize_recurrences(db, date(2025, 8, 31)) == 2
+	assert len(_occurrences(db, db.current_profile_id)) == len(before) + 2
+
+
+def _with_profile(rows, profile_id: int):
+	return [r[:4] + (profile_id,) for r in rows]
+
+
+def test_clone_links_occurrences_to_copied_rules(db):
+	_add_rules(db)
+	materialize_recurrences(db, date(2025, 6, 30))
+	source = db.current_profile_id
+	expected = _occurrences(db, source)
+
+	clone = db.clone_profile(source, "Cópia")
+	assert _occurrences(db, clone) == _with_profile(expected, clone)
+
+	db.set_current_profile(clone)
+	assert materialize_recurrences(db, date(2025, 6, 30)) == 0
+
+
+@pytest.mark.parametrize("export, restore", [(export_profile, restore_profile), (export_profile_sqlite, restore_profile_sqlite)])
+def test_backup_round_trip_keeps_rules(db, tmp_path, export, restore):
+	_add_rules(db)
+	materialize_recurrences(db, date(2025, 6, 30))
+	source = db.current_profile_id
+	expected = _occurrences(db, source)
+	backup = export(db, tmp_path / "backups", db.current_user_id, source)
+
+	restored = restore(db, backup, db.current_user_id)
+	assert _occurrences(db, restored) == _with_profile(expected, restored)
+	db.set_current_profile(restored)
+	assert len(db.list_recurrences()) == 2
+	assert materialize_recurrences(db, date(2025, 6, 30)) == 0
+
+	counts = merge_restore_profile(db, backup, db.current_user_id, source)
+	assert counts["recorrencias"] == {"inseridos": 0, "ignorados": 2, "conflitantes": 0}
+	assert _occurrences(db, source) == expected
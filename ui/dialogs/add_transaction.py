@@ -84,6 +84,23 @@ class AddTransactionDialog(QDialog):
 		# Quando a data da transação muda, atualizar também a primeira parcela
 		self.data.dateChanged.connect(lambda qd: self.primeira_parcela.setDate(qd) if self.parcelado.isChecked() else None)
 
+		# Recorrência (assinaturas, salário...): as próximas ocorrências são geradas pela regra
+		self.recorrente = QCheckBox("Repetir")
+		self.recorrente.setChecked(False)
+		self.frequencia = QComboBox()
+		self.frequencia.addItems(["mensal", "semanal", "anual"])
+		self.num_ocorrencias = QSpinBox()
+		self.num_ocorrencias.setRange(0, 999)
+		self.num_ocorrencias.setSpecialValueText("Sem fim")
+		def _toggle_recorrente(state: bool):
+			self.frequencia.setEnabled(state)
+			self.num_ocorrencias.setEnabled(state)
+			if state:
+				self.parcelado.setChecked(False)
+		_toggle_recorrente(False)
+		self.recorrente.toggled.connect(_toggle_recorrente)
+		self.parcelado.toggled.connect(lambda state: self.recorrente.setChecked(False) if state else None)
+
 		self.tags = QLineEdit()
 		self.tags.setPlaceholderText("Separar por vírgula (opcional)")
 
@@ -100,6 +117,9 @@ class AddTransactionDialog(QDialog):
 		form.addRow("", self.parcelado)
 		form.addRow("Nº parcelas:", self.num_parcelas)
 		form.addRow("Primeira parcela em:", self.primeira_parcela)
+		form.addRow("", self.recorrente)
+		form.addRow("Frequência:", self.frequencia)
+		form.addRow("Nº ocorrências:", self.num_ocorrencias)
 		form.addRow("Tags:", self.tags)
 		form.addRow("Notas:", self.notas)
 
@@ -148,6 +168,17 @@ class AddTransactionDialog(QDialog):
 			"first_date": first,
 		}
 
+	def get_recurrence_plan(self):
+		"""Retorna a recorrência se habilitada; caso contrário, None.
+		Estrutura: {frequencia: str, ocorrencias: int | None (None = sem fim)}
+		"""
+		if not self.recorrente.isChecked():
+			return None
+		return {
+			"frequencia": self.frequencia.currentText(),
+			"ocorrencias": int(self.num_ocorrencias.value()) or None,
+		}
+
 	def accept(self) -> None:
 		try:
 			self._tx = self.build_transaction()
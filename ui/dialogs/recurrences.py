@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+from PyQt5.QtCore import Qt
+from PyQt5.QtWidgets import (
+	QDialog,
+	QDialogButtonBox,
+	QHBoxLayout,
+	QHeaderView,
+	QLabel,
+	QMessageBox,
+	QPushButton,
+	QTableWidget,
+	QTableWidgetItem,
+	QVBoxLayout,
+)
+
+from database.db_manager import DbManager
+from utils.formatters import format_brl
+
+
+class RecurrencesDialog(QDialog):
+	"""Regras de recorrência do perfil e até onde cada uma já foi lançada como transação"""
+
+	def __init__(self, parent, db: DbManager):
+		super().__init__(parent)
+		self.db = db
+		self.setWindowTitle("Recorrências")
+		self.resize(820, 420)
+
+		self.table = QTableWidget(0, 6)
+		self.table.setHorizontalHeaderLabels(["Descrição", "Tipo", "Valor", "Frequência", "Ocorrências", "Lançada até"])
+		self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+		for c in range(1, 6):
+			self.table.horizontalHeader().setSectionResizeMode(c, QHeaderView.ResizeToContents)
+		self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+		self.table.setSelectionBehavior(QTableWidget.SelectRows)
+		self.table.setSelectionMode(QTableWidget.SingleSelection)
+
+		note = QLabel("Encerrar apaga a regra e as ocorrências não pagas a partir de hoje; as já pagas são mantidas.")
+		note.setObjectName("Muted")
+		note.setWordWrap(True)
+
+		self.btn_end = QPushButton("Encerrar recorrência")
+		self.btn_end.clicked.connect(self._end_selected)
+		actions = QHBoxLayout()
+		actions.addWidget(self.btn_end)
+		actions.addStretch(1)
+
+		btns = QDialogButtonBox(QDialogButtonBox.Close)
+		btns.rejected.connect(self.reject)
+
+		root = QVBoxLayout()
+		root.addWidget(self.table, stretch=1)
+		root.addWidget(note)
+		root.addLayout(actions)
+		root.addWidget(btns)
+		self.setLayout(root)
+
+		self._refresh()
+
+	def _refresh(self) -> None:
+		rules = self.db.list_recurrences()
+		self.table.setRowCount(len(rules))
+		for r, rule in enumerate(rules):
+			intervalo = int(rule.get("intervalo") or 1)
+			freq = str(rule.get("frequencia"))
+			items = [
+				QTableWidgetItem(str(rule.get("descricao") or rule.get("categoria"))),
+				QTableWidgetItem(str(rule.get("tipo"))),
+				QTableWidgetItem(format_brl(float(rule.get("valor") or 0.0))),
+				QTableWidgetItem(freq if intervalo == 1 else f"{freq} (a cada {intervalo})"),
+				QTableWidgetItem(str(rule.get("ocorrencias") or "Sem fim")),
+				QTableWidgetItem(str(rule.get("gerado_ate") or "—")),
+			]
+			items[0].setData(Qt.UserRole, int(rule["id"]))
+			items[2].setTextAlignment(int(Qt.AlignRight | Qt.AlignVCenter))
+			for c, it in enumerate(items):
+				self.table.setItem(r, c, it)
+
+	def _end_selected(self) -> None:
+		row = self.table.currentRow()
+		if row < 0:
+			QMessageBox.information(self, "Recorrências", "Selecione uma recorrência na tabela.")
+			return
+		rule_id = self.table.item(row, 0).data(Qt.UserRole)
+		nome = self.table.item(row, 0).text()
+		resp = QMessageBox.question(
+			self,
+			"Recorrências",
+			f"Encerrar a recorrência '{nome}'?",
+			QMessageBox.Yes | QMessageBox.No,
+			QMessageBox.No,
+		)
+		if resp != QMessageBox.Yes:
+			return
+		self.db.delete_recurrence(int(rule_id))
+		self._refresh()
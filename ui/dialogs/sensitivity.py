@@ -0,0 +1,201 @@
+from __future__ import annotations
+
+from datetime import date
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+from matplotlib.figure import Figure
+from PyQt5.QtCore import Qt
+from PyQt5.QtWidgets import (
+	QComboBox,
+	QDialog,
+	QDialogButtonBox,
+	QDoubleSpinBox,
+	QFormLayout,
+	QHBoxLayout,
+	QLabel,
+	QLineEdit,
+	QMessageBox,
+	QPushButton,
+	QSpinBox,
+	QTableWidget,
+	QTableWidgetItem,
+	QVBoxLayout,
+	QWidget,
+)
+
+from utils.formatters import format_brl
+from utils.investments import SensitivityGrid, sensitivity_grid
+from utils.report_charts import draw_sensitivity_heatmap
+
+
+def _spin(lo: float, hi: float, value: float, decimals: int = 2, suffix: str = "") -> QDoubleSpinBox:
+	sb = QDoubleSpinBox()
+	sb.setDecimals(decimals)
+	sb.setRange(lo, hi)
+	sb.setValue(value)
+	if suffix:
+		sb.setSuffix(suffix)
+	return sb
+
+
+class _AxisRange(QWidget):
+	"""De / até / número de pontos de um eixo da grade."""
+
+	def __init__(self, lo: float, hi: float, start: float, stop: float, steps: int, suffix: str = "", step: float = 1.0):
+		super().__init__()
+		self.start = _spin(lo, hi, start, suffix=suffix)
+		self.stop = _spin(lo, hi, stop, suffix=suffix)
+		self.start.setSingleStep(step)
+		self.stop.setSingleStep(step)
+		self.steps = QSpinBox()
+		self.steps.setRange(1, 500)
+		self.steps.setValue(steps)
+		self.steps.setSuffix(" pontos")
+
+		row = QHBoxLayout()
+		row.setContentsMargins(0, 0, 0, 0)
+		row.addWidget(self.start)
+		row.addWidget(QLabel("até"))
+		row.addWidget(self.stop)
+		row.addWidget(self.steps)
+		self.setLayout(row)
+
+	def values(self) -> np.ndarray:
+		return np.linspace(float(self.start.value()), float(self.stop.value()), int(self.steps.value()))
+
+
+class SensitivityDialog(QDialog):
+	"""
+	Análise de sensibilidade de um cofrinho: saldo líquido final para a grade
+	CDI x %CDI x aporte x horizonte, calculada de uma vez por sensitivity_grid.
+	"""
+
+	def __init__(self, parent=None, row: Optional[Dict[str, Any]] = None):
+		super().__init__(parent)
+		self.setWindowTitle("Sensibilidade do cofrinho")
+		self.resize(980, 720)
+
+		row = row or {}
+		self._start = date.fromisoformat(str(row.get("data_inicio") or date.today().isoformat()))
+		self._grid: Optional[SensitivityGrid] = None
+		cdi = float(row.get("cdi_aa") or 10.0)
+		pct = float(row.get("percent_cdi") or 100.0)
+		aporte = float(row.get("aporte_mensal") or 0.0)
+
+		self.principal = _spin(0.0, 1_000_000_000.0, float(row.get("principal") or 0.0))
+		self.principal.setSingleStep(100.0)
+		self.cdi_range = _AxisRange(0.0, 50.0, max(0.0, cdi - 4.0), cdi + 4.0, 17, suffix="% a.a.", step=0.25)
+		self.pct_range = _AxisRange(0.0, 300.0, max(0.0, pct - 20.0), pct + 20.0, 9, suffix="%", step=5.0)
+		self.aporte_range = _AxisRange(0.0, 1_000_000_000.0, 0.0, max(aporte * 2.0, 100.0), 5, step=50.0)
+		self.horizons = QLineEdit("12, 36, 60, 120")
+		self.horizons.setToolTip("Horizontes em meses, separados por vírgula")
+
+		form = QFormLayout()
+		form.addRow("Valor inicial (R$):", self.principal)
+		form.addRow("CDI:", self.cdi_range)
+		form.addRow("% do CDI:", self.pct_range)
+		form.addRow("Aporte mensal (R$):", self.aporte_range)
+		form.addRow("Horizontes (meses):", self.horizons)
+
+		self.aplicar_impostos = bool(row.get("aplicar_impostos"))
+
+		self.btn_calc = QPushButton("Calcular")
+		self.btn_calc.clicked.connect(self.compute)
+		self.status = QLabel("")
+		self.status.setObjectName("Muted")
+
+		self.aporte_combo = QComboBox()
+		self.horizon_combo = QComboBox()
+		self.aporte_combo.currentIndexChanged.connect(lambda _i: self._render())
+		self.horizon_combo.currentIndexChanged.connect(lambda _i: self._render())
+
+		pick = QHBoxLayout()
+		pick.addWidget(self.btn_calc)
+		pick.addWidget(self.status, stretch=1)
+		pick.addWidget(QLabel("Aporte:"))
+		pick.addWidget(self.aporte_combo)
+		pick.addWidget(QLabel("Horizonte:"))
+		pick.addWidget(self.horizon_combo)
+
+		self.fig = Figure(figsize=(6.0, 3.2), dpi=100)
+		self.canvas = FigureCanvas(self.fig)
+
+		self.table = QTableWidget(0, 0)
+		self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+
+		btns = QDialogButtonBox(QDialogButtonBox.Close)
+		btns.rejected.connect(self.reject)
+
+		root = QVBoxLayout()
+		root.addLayout(form)
+		root.addLayout(pick)
+		root.addWidget(self.canvas, stretch=2)
+		root.addWidget(self.table, stretch=1)
+		root.addWidget(btns)
+		self.setLayout(root)
+
+		self.compute()
+
+	def _parse_horizons(self) -> List[int]:
+		values = sorted({int(p) for p in self.horizons.text().replace(";", ",").split(",") if p.strip()})
+		if not values or values[0] < 1:
+			raise ValueError("Informe horizontes em meses (ex.: 12, 60, 120)")
+		return values
+
+	def compute(self) -> None:
+		try:
+			horizons = self._parse_horizons()
+		except ValueError as e:
+			QMessageBox.warning(self, "Sensibilidade", str(e))
+			return
+		self._grid = sensitivity_grid(
+			start=self._start,
+			principal=float(self.principal.value()),
+			cdi_values=self.cdi_range.values(),
+			percent_cdi_values=self.pct_range.values(),
+			aporte_values=self.aporte_range.values(),
+			horizons=horizons,
+			aplicar_impostos=self.aplicar_impostos,
+		)
+		self.status.setText(f"{self._grid.saldo_liquido.size:,} cenários".replace(",", "."))
+
+		for combo, labels in (
+			(self.aporte_combo, [format_brl(float(v)) for v in self._grid.aporte_mensal]),
+			(self.horizon_combo, [f"{int(h)} meses" for h in self._grid.horizons]),
+		):
+			combo.blockSignals(True)
+			combo.clear()
+			combo.addItems(labels)
+			combo.setCurrentIndex(len(labels) - 1 if combo is self.horizon_combo else 0)
+			combo.blockSignals(False)
+		self._render()
+
+	def _render(self) -> None:
+		grid = self._grid
+		if grid is None:
+			return
+		a = max(0, self.aporte_combo.currentIndex())
+		h = max(0, self.horizon_combo.currentIndex())
+		values = grid.net_table(a, h)
+
+		self.fig.clear()
+		draw_sensitivity_heatmap(
+			self.fig,
+			grid.cdi_aa,
+			grid.percent_cdi,
+			values,
+			title=f"Saldo líquido em {int(grid.horizons[h])} meses (aporte {format_brl(float(grid.aporte_mensal[a]))})",
+		)
+		self.canvas.draw()
+
+		self.table.setRowCount(len(grid.cdi_aa))
+		self.table.setColumnCount(len(grid.percent_cdi))
+		self.table.setVerticalHeaderLabels([f"{v:.2f}%" for v in grid.cdi_aa.tolist()])
+		self.table.setHorizontalHeaderLabels([f"{v:.1f}% CDI" for v in grid.percent_cdi.tolist()])
+		for i, line in enumerate(values.tolist()):
+			for j, v in enumerate(line):
+				it = QTableWidgetItem(format_brl(v))
+				it.setTextAlignment(int(Qt.AlignRight | Qt.AlignVCenter))
+				self.table.setItem(i, j, it)
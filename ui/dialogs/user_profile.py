@@ -16,6 +16,7 @@ from PyQt5.QtWidgets import (
 	QLineEdit,
 	QSpinBox,
 	QCheckBox,
+	QInputDialog,
 	QWidget,
 )
 from PyQt5.QtCore import Qt
@@ -154,6 +155,11 @@ class UserProfileDialog(QDialog):
 		btn_delete_profile.setMinimumWidth(140)
 		btn_delete_profile.clicked.connect(self._delete_profile)
 
+		btn_clone_profile = QPushButton("📄 Duplicar")
+		btn_clone_profile.setMinimumHeight(40)
+		btn_clone_profile.setMinimumWidth(140)
+		btn_clone_profile.clicked.connect(self._clone_profile)
+
 		profile_form_layout.addWidget(QLabel("Nome:"))
 		profile_form_layout.addWidget(self.input_profile_name)
 		profile_form_layout.addWidget(QLabel("CDI Padrão:"))
@@ -161,6 +167,7 @@ class UserProfileDialog(QDialog):
 		profile_form_layout.addWidget(self.check_ir)
 		profile_form_layout.addWidget(self.check_iof)
 		profile_form_layout.addWidget(btn_add_profile)
+		profile_form_layout.addWidget(btn_clone_profile)
 		profile_form_layout.addWidget(btn_delete_profile)
 
 		layout.addLayout(profile_form_layout)
@@ -280,6 +287,33 @@ class UserProfileDialog(QDialog):
 		except Exception as e:
 			QMessageBox.critical(self, "Erro", f"Falha ao criar perfil: {e}")
 
+	def _clone_profile(self):
+		if not self.selected_profile_id:
+			QMessageBox.warning(self, "Aviso", "Selecione um perfil para duplicar")
+			return
+
+		profile = self.db.get_financial_profile(self.selected_profile_id)
+		name, ok = QInputDialog.getText(self, "Duplicar Perfil", "Nome do novo perfil:", text=f"{profile.nome} (Cópia)")
+		name = (name or "").strip()
+		if not ok or not name:
+			return
+
+		reply = QMessageBox.question(
+			self,
+			"Duplicar Perfil",
+			"Copiar apenas orçamentos, metas e recorrências?\n(Não = copiar também transações e cofrinhos)",
+			QMessageBox.Yes | QMessageBox.No,
+			QMessageBox.No,
+		)
+		filters = {"tabelas": ["orcamentos", "metas_financeiras", "recorrencias"]} if reply == QMessageBox.Yes else None
+
+		try:
+			self.db.clone_profile(self.selected_profile_id, name, filters)
+			self._refresh_profiles()
+			QMessageBox.information(self, "Sucesso", f"Perfil '{name}' criado a partir de '{profile.nome}'")
+		except Exception as e:
+			QMessageBox.critical(self, "Erro", f"Falha ao duplicar perfil: {e}")
+
 	def _delete_profile(self):
 		if not self.selected_profile_id:
 			QMessageBox.warning(self, "Aviso", "Selecione um perfil para deletar")
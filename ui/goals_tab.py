@@ -24,6 +24,7 @@ from PyQt5.QtWidgets import (
 	QComboBox,
 	QDateEdit,
 	QProgressBar,
+	QInputDialog,
 )
 from PyQt5.QtGui import QColor, QFont
 from PyQt5.QtCore import QDate
@@ -31,6 +32,7 @@ from PyQt5.QtCore import QDate
 from database.db_manager import DbManager
 from database.models_budgets import Goal
 from utils.formatters import format_brl
+from utils.goals import goal_plans
 
 
 _PRIORITY_COLORS = {
@@ -56,8 +58,10 @@ class GoalsTab(QWidget):
 		
 		# Tabela de metas
 		self.table = QTableWidget()
-		self.table.setColumnCount(6)
-		self.table.setHorizontalHeaderLabels(["Meta", "Alvo", "Atual", "Progresso", "Prioridade", "Data Alvo"])
+		self.table.setColumnCount(8)
+		self.table.setHorizontalHeaderLabels(
+			["Meta", "Alvo", "Atual", "Progresso", "Prioridade", "Data Alvo", "Aporte/mês necessário", "Conclusão prevista"]
+		)
 		self.table.setAlternatingRowColors(True)
 		
 		# Configurar largura das colunas
@@ -69,11 +73,31 @@ class GoalsTab(QWidget):
 		header.setSectionResizeMode(3, QHeaderView.ResizeToContents)  # Progresso auto
 		header.setSectionResizeMode(4, QHeaderView.ResizeToContents)  # Prioridade auto
 		header.setSectionResizeMode(5, QHeaderView.ResizeToContents)  # Data auto
+		header.setSectionResizeMode(6, QHeaderView.ResizeToContents)  # Aporte necessário
+		header.setSectionResizeMode(7, QHeaderView.ResizeToContents)  # Conclusão prevista
 		header.setMinimumSectionSize(90)
 		
 		# Altura das linhas
 		self.table.verticalHeader().setDefaultSectionSize(40)
 		
+		# Viabilidade: rendimento usado no aporte necessário e ritmo de poupança atual
+		profile = self.db.get_financial_profile(self.db.current_profile_id) if self.db.current_profile_id else None
+		self.rate_input = QDoubleSpinBox()
+		self.rate_input.setDecimals(2)
+		self.rate_input.setRange(0.0, 100.0)
+		self.rate_input.setSingleStep(0.25)
+		self.rate_input.setSuffix("% a.a.")
+		self.rate_input.setValue(float(profile.cdi_aa_padrao) if profile else 10.0)
+		self.rate_input.setToolTip("Rendimento do valor guardado usado no cálculo do aporte mensal necessário")
+		self.rate_input.valueChanged.connect(lambda _v: self._refresh_goals())
+		self.pace_label = QLabel("")
+		self.pace_label.setObjectName("Muted")
+
+		plan_layout = QHBoxLayout()
+		plan_layout.addWidget(QLabel("Rendimento:"))
+		plan_layout.addWidget(self.rate_input)
+		plan_layout.addWidget(self.pace_label, stretch=1)
+
 		# Botões
 		buttons_layout = QHBoxLayout()
 		add_btn = QPushButton("Adicionar Meta")
@@ -82,6 +106,8 @@ class GoalsTab(QWidget):
 		edit_btn.clicked.connect(self._edit_goal)
 		delete_btn = QPushButton("Deletar")
 		delete_btn.clicked.connect(self._delete_goal)
+		contribution_btn = QPushButton("Registrar Aporte")
+		contribution_btn.clicked.connect(self._add_contribution)
 
 		def _auto_size_buttons(btns):
 			for btn in btns:
@@ -90,16 +116,18 @@ class GoalsTab(QWidget):
 				btn.setMinimumHeight(max(34, hint.height() + 4))
 				btn.setSizePolicy(QSizePolicy.MinimumExpanding, QSizePolicy.Fixed)
 
-		_auto_size_buttons([add_btn, edit_btn, delete_btn])
+		_auto_size_buttons([add_btn, edit_btn, delete_btn, contribution_btn])
 		
 		buttons_layout.addWidget(add_btn)
 		buttons_layout.addWidget(edit_btn)
 		buttons_layout.addWidget(delete_btn)
+		buttons_layout.addWidget(contribution_btn)
 		buttons_layout.addStretch()
 		
 		# Layout principal
 		root = QVBoxLayout()
 		root.addWidget(self.title)
+		root.addLayout(plan_layout)
 		root.addWidget(self.table, stretch=1)
 		root.addLayout(buttons_layout)
 		self.setLayout(root)
@@ -108,7 +136,14 @@ class GoalsTab(QWidget):
 	
 	def _refresh_goals(self) -> None:
 		"""Atualiza a tabela com as metas"""
-		goals = self.db.list_goals(ativas_apenas=False)
+		goals = self.db.list_goals_with_progress(ativas_apenas=False)
+		# aporte necessário e conclusão prevista de todas as metas em uma passada
+		plans = goal_plans(self.db, goals, float(self.rate_input.value()) / 100.0)
+		pace = plans["ritmo_mensal"]
+		self.pace_label.setText(
+			f"Ritmo de poupança (média dos últimos 12 meses): {format_brl(pace)}/mês"
+			+ ("" if pace > 0 else " — sem sobra mensal, conclusão não prevista")
+		)
 		
 		self.table.setRowCount(len(goals))
 		
@@ -124,7 +159,7 @@ class GoalsTab(QWidget):
 			atual.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
 			
 			# Barra de progresso
-			percentual = (goal["valor_atual"] / goal["valor_alvo"] * 100) if goal["valor_alvo"] > 0 else 0
+			percentual = goal["progresso_percentual"]
 			progresso = QProgressBar()
 			progresso.setValue(int(min(100, percentual)))
 			progresso.setFormat(f"{percentual:.1f}%")
@@ -164,6 +199,8 @@ class GoalsTab(QWidget):
 			
 			data_alvo = QTableWidgetItem(goal["data_alvo"])
 			data_alvo.setTextAlignment(Qt.AlignCenter)
+			dias = goal["dias_restantes"]
+			data_alvo.setToolTip(f"Faltam {dias} dias" if dias >= 0 else f"Vencida há {-dias} dias")
 			
 			self.table.setItem(row, 0, nome)
 			self.table.setItem(row, 1, alvo)
@@ -172,6 +209,26 @@ class GoalsTab(QWidget):
 			self.table.setItem(row, 4, prioridade)
 			self.table.setItem(row, 5, data_alvo)
 
+			plan = plans["metas"][goal["id"]]
+			aporte = QTableWidgetItem(format_brl(plan["aporte_necessario"]) if percentual < 100 else "—")
+			aporte.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+			if plan["meses_restantes"] == 0 and percentual < 100:
+				aporte.setToolTip("Prazo encerrado: valor que falta")
+
+			conclusao_data = plan["conclusao_prevista"]
+			if percentual >= 100:
+				conclusao = QTableWidgetItem("Concluída")
+			else:
+				conclusao = QTableWidgetItem(conclusao_data.strftime("%m/%Y") if conclusao_data else "—")
+			conclusao.setTextAlignment(Qt.AlignCenter)
+			if conclusao_data and percentual < 100:
+				conclusao.setForeground(QColor("#059669" if plan["no_prazo"] else "#DC2626"))
+			elif not goal["ativo"] and percentual < 100:
+				conclusao.setToolTip("Meta inativa")
+
+			self.table.setItem(row, 6, aporte)
+			self.table.setItem(row, 7, conclusao)
+
 		self.table.resizeColumnsToContents()
 	
 	def _show_add_goal_dialog(self) -> None:
@@ -200,6 +257,25 @@ class GoalsTab(QWidget):
 		if dialog.exec_() == QDialog.Accepted:
 			self._refresh_goals()
 	
+	def _add_contribution(self) -> None:
+		"""Registra um aporte na meta selecionada (o valor atual é atualizado pelo banco)"""
+		current_row = self.table.currentRow()
+		if current_row < 0:
+			QMessageBox.warning(self, "Aviso", "Selecione uma meta para registrar o aporte")
+			return
+
+		goal_id = self.table.item(current_row, 0).data(Qt.UserRole)
+		nome = self.table.item(current_row, 0).text()
+		valor, ok = QInputDialog.getDouble(self, "Registrar Aporte", f"Valor aportado em '{nome}' (R$):", 0.0, 0.01, 9999999.99, 2)
+		if not ok:
+			return
+
+		try:
+			self.db.add_goal_contribution(goal_id, valor=valor, data=date.today())
+			self._refresh_goals()
+		except Exception as e:
+			QMessageBox.critical(self, "Erro", f"Erro ao registrar aporte: {str(e)}")
+	
 	def _delete_goal(self) -> None:
 		"""Deleta meta selecionada"""
 		current_row = self.table.currentRow()
@@ -275,6 +351,10 @@ class GoalDialog(QDialog):
 			self.nome_input.setText(goal_data["nome"])
 			self.alvo_input.setValue(float(goal_data["valor_alvo"]))
 			self.atual_input.setValue(float(goal_data["valor_atual"]))
+			# Na edição o valor atual é mantido pelos aportes: muda só por "Registrar Aporte"
+			self.atual_input.setReadOnly(True)
+			self.atual_input.setButtonSymbols(QDoubleSpinBox.NoButtons)
+			self.atual_input.setToolTip("Atualizado pelos aportes; use \"Registrar Aporte\" para alterar")
 			
 			# Converter strings de data para QDate
 			from datetime import datetime
@@ -1,10 +1,11 @@
 from __future__ import annotations
 
+from dataclasses import replace
 from datetime import date, datetime
 from pathlib import Path
 
 from PyQt5.QtCore import Qt
-from PyQt5.QtGui import QKeySequence
+from PyQt5.QtGui import QColor, QKeySequence
 from PyQt5.QtWidgets import (
 	QAction,
 	QApplication,
@@ -28,15 +29,17 @@ from PyQt5.QtWidgets import (
 )
 
 from database.db_manager import DbManager
-from database.models import Transaction
+from database.models import Recurrence, Transaction
 from ui.charts_tab import ChartsTab
 from ui.budgets_tab import BudgetsTab
 from ui.goals_tab import GoalsTab
 from ui.reports_tab import ReportsTab
 from ui.dialogs.add_transaction import AddTransactionDialog
+from ui.dialogs.recurrences import RecurrencesDialog
 from ui.dialogs.user_profile import UserProfileDialog
 from ui.icons import icon_add, icon_edit, icon_delete, icon_save, icon_moon, icon_sun, make_icon
 from ui.piggy_tab import PiggyTab
+from ui.workers import run_with_progress
 from ui.theme import (
 	apply_theme,
 	get_palette,
@@ -46,9 +49,16 @@ from ui.theme import (
 	toggle_dark_mode,
 )
 from utils.tips import build_feedback
+from utils.recurrence import materialize_recurrences, virtual_occurrences
 from utils.formatters import format_brl
 from utils.reports import generate_monthly_report_pdf
-from utils.backup import export_profile, restore_profile
+from utils.backup import (
+	export_profile,
+	export_profile_sqlite,
+	merge_restore_profile,
+	restore_profile,
+	restore_profile_sqlite,
+)
 
 
 _MONTHS_PT = [
@@ -74,6 +84,8 @@ class MainWindow(QMainWindow):
 		self.exports_dir = exports_dir
 		self.backup_dir = backup_dir
 		self.current_user_id = current_user_id
+		self._backup_job = None
+		self._report_job = None
 
 		self.setWindowTitle("GEFIPS - Gerenciador Financeiro Pessoal Simples")
 		self.resize(980, 620)
@@ -111,7 +123,7 @@ class MainWindow(QMainWindow):
 		self.goals_tab = GoalsTab(db=self.db)
 		self.tabs.addTab(self.goals_tab, "🎯  Metas")
 
-		self.reports_tab = ReportsTab(db=self.db)
+		self.reports_tab = ReportsTab(db=self.db, exports_dir=self.exports_dir)
 		self.tabs.addTab(self.reports_tab, "📋  Relatórios")
 
 		self.piggy_tab = PiggyTab(db=self.db, exports_dir=self.exports_dir)
@@ -220,6 +232,9 @@ class MainWindow(QMainWindow):
 		self.btn_delete.setIcon(make_icon(icon_delete(), 20, ("#F1F5F9" if is_dark_mode() else "#111827")))
 		self.btn_delete.clicked.connect(self.delete_selected)
 
+		self.btn_recurrences = QPushButton("🔁  Recorrências")
+		self.btn_recurrences.clicked.connect(self.open_recurrences_dialog)
+
 		# Ajustar tamanho dos botões conforme texto/ícone
 		def _fit_buttons(btn_list):
 			if not btn_list:
@@ -235,6 +250,7 @@ class MainWindow(QMainWindow):
 			self.btn_add_despesa,
 			self.btn_edit,
 			self.btn_delete,
+			self.btn_recurrences,
 			self.btn_report,
 			self.btn_user_profile,
 			self.btn_backup_export,
@@ -275,6 +291,8 @@ class MainWindow(QMainWindow):
 		btns.addSpacing(10)
 		btns.addWidget(self.btn_edit)
 		btns.addWidget(self.btn_delete)
+		btns.addSpacing(10)
+		btns.addWidget(self.btn_recurrences)
 		btns.addStretch(1)
 
 		root = QVBoxLayout()
@@ -362,7 +380,8 @@ class MainWindow(QMainWindow):
 			plan = None
 
 		if plan and plan.get("enabled") and tx.tipo == "saida":
-			# Gerar N parcelas futuras não pagas
+			# Parcelas viram uma regra mensal com N ocorrências; só as próximas são lançadas
+			# (não pagas) e as demais aparecem como previstas até chegar a vez delas
 			num = int(plan.get("num") or 0)
 			first_date = plan.get("first_date") or tx.data
 			if num <= 1:
@@ -373,30 +392,41 @@ class MainWindow(QMainWindow):
 			total = float(tx.valor)
 			base = round(total / num, 2)
 			resto = round(total - base * num, 2)
-			def _add_months(d: date, m: int) -> date:
-				y = d.year + (d.month - 1 + m) // 12
-				mo = (d.month - 1 + m) % 12 + 1
-				day = min(d.day, [31, 29 if y % 4 == 0 and (y % 100 != 0 or y % 400 == 0) else 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31][mo - 1])
-				return date(y, mo, day)
-			for i in range(1, num + 1):
-				valor_i = base
-				if i == num:
-					valor_i = round(base + resto, 2)
-				dt_i = _add_months(first_date, i - 1)
-				desc = f"Parcela {i}/{num} - {tx.descricao or tx.categoria}"
-				p_tx = Transaction(
+			self.db.add_recurrence(
+				Recurrence(
 					id=None,
 					tipo="saida",
 					categoria=tx.categoria,
-					subcategoria=None,
-					descricao=desc,
-					valor=float(valor_i),
-					data=dt_i,
-					pago=False,
+					descricao=tx.descricao,
+					valor=base,
+					frequencia="mensal",
+					data_inicio=first_date,
+					ocorrencias=num,
+					valor_ultima=round(base + resto, 2),
 					tags_json=tx.tags_json,
-					anexo_caminho=None,
 				)
-				self.db.add_transaction(p_tx)
+			)
+			self.refresh()
+			return
+
+		recurrence = dlg.get_recurrence_plan()
+		if recurrence:
+			# A transação informada é a primeira ocorrência; a regra gera as seguintes
+			rule_id = self.db.add_recurrence(
+				Recurrence(
+					id=None,
+					tipo=tx.tipo,
+					categoria=tx.categoria,
+					descricao=tx.descricao,
+					valor=float(tx.valor),
+					frequencia=recurrence["frequencia"],
+					data_inicio=tx.data,
+					ocorrencias=recurrence.get("ocorrencias"),
+					tags_json=tx.tags_json,
+				),
+				gerado_ate=tx.data,
+			)
+			self.db.add_transaction(replace(tx, recorrente_id=rule_id))
 			self.refresh()
 			return
 
@@ -404,6 +434,10 @@ class MainWindow(QMainWindow):
 		self.db.add_transaction(tx)
 		self.refresh()
 
+	def open_recurrences_dialog(self) -> None:
+		RecurrencesDialog(self, self.db).exec_()
+		self.refresh()
+
 	def _selected_tx_id(self):
 		row = self.table.currentRow()
 		if row < 0:
@@ -483,11 +517,18 @@ class MainWindow(QMainWindow):
 		self.lbl_saldo_mes.style().unpolish(self.lbl_saldo_mes)
 		self.lbl_saldo_mes.style().polish(self.lbl_saldo_mes)
 
+		materialize_recurrences(self.db)
 		rows = self.db.list_month_transactions(year, month)
+		# ocorrências futuras de recorrências ainda não lançadas, só para exibição
+		start = date(year, month, 1)
+		end = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+		previstas = virtual_occurrences(self.db, start, end)
+		if previstas:
+			rows = sorted(rows + previstas, key=lambda r: str(r.get("data", "")), reverse=True)
 		self.section.setText(f"Transações do mês ({len(rows)}):")
 		self.table.setRowCount(len(rows))
 		for r, row in enumerate(rows):
-			tx_id = int(row.get("id") or 0)
+			tx_id = row.get("id")
 			data_txt = str(row.get("data", ""))
 			tipo_txt = str(row.get("tipo", ""))
 			cat_txt = str(row.get("categoria", ""))
@@ -502,9 +543,17 @@ class MainWindow(QMainWindow):
 				QTableWidgetItem(format_brl(valor)),
 			]
 			items[0].setData(Qt.UserRole, tx_id)
+			if row.get("prevista"):
+				items[3].setText(f"{descr_txt} (prevista)".strip())
 			for c, it in enumerate(items):
 				if c == 4:
 					it.setTextAlignment(int(Qt.AlignRight | Qt.AlignVCenter))
+				if row.get("prevista"):
+					font = it.font()
+					font.setItalic(True)
+					it.setFont(font)
+					it.setForeground(QColor("#94A3B8"))
+					it.setToolTip("Ocorrência prevista de uma recorrência")
 				self.table.setItem(r, c, it)
 
 		self.charts_tab.refresh(year, month)
@@ -551,21 +600,54 @@ class MainWindow(QMainWindow):
 		self.lbl_tip_main.setStyleSheet(f"color: {color}; font-weight: 700;")
 
 	def generate_report_for_period(self) -> None:
+		if self._report_job is not None:
+			return
 		year = int(self.period_year.value())
 		month = int(self.period_month.currentIndex() + 1)
-		try:
-			out = generate_monthly_report_pdf(
+
+		# Gráficos (matplotlib/Agg) e PDF são montados fora da thread da interface
+		def _done() -> None:
+			self._report_job = None
+			self.btn_report.setEnabled(True)
+
+		def _on_success(out: object) -> None:
+			_done()
+			QMessageBox.information(self, "Relatório", f"Relatório gerado em:\n{out}")
+
+		def _on_error(msg: str) -> None:
+			_done()
+			QMessageBox.critical(self, "Relatório", f"Falha ao gerar relatório: {msg}")
+
+		self.btn_report.setEnabled(False)
+		self._report_job = run_with_progress(
+			self,
+			"Relatório",
+			"Gerando relatório do mês...",
+			lambda progress: generate_monthly_report_pdf(
 				db=self.db,
 				exports_dir=self.exports_dir,
 				year=year,
 				month=month,
-			)
-		except Exception as e:
-			QMessageBox.critical(self, "Relatório", f"Falha ao gerar relatório: {e}")
-			return
-		QMessageBox.information(self, "Relatório", f"Relatório gerado em:\n{out}")
+				progress=progress,
+			),
+			_on_success,
+			_on_error,
+			on_cancel=_done,
+		)
+
+	def _backup_busy(self) -> bool:
+		"""Há backup/restauração em andamento (o banco fica bloqueado para escrita até o fim)."""
+		if self._backup_job is None:
+			return False
+		QMessageBox.information(self, "Backup", "Aguarde o término do backup ou da restauração em andamento.")
+		return True
+
+	def _clear_backup_job(self) -> None:
+		self._backup_job = None
 
 	def _export_backup(self) -> None:
+		if self._backup_busy():
+			return
 		try:
 			# Sugestão de nome
 			profile = self.db.get_financial_profile(self.db.current_profile_id)
@@ -579,45 +661,122 @@ class MainWindow(QMainWindow):
 
 			# Caixa de diálogo para escolher destino
 			start_dir = str(self.backup_dir)
-			file_path, _ = QFileDialog.getSaveFileName(self, "Salvar Backup", start_dir + ("/" + (default_name or "backup.json")), "JSON (*.json)")
-			if not file_path:
-				return
-			out = export_profile(
-				db=self.db,
-				backup_dir=Path(file_path).parent,
-				user_id=int(self.db.current_user_id),
-				profile_id=int(self.db.current_profile_id),
-				filename=Path(file_path).name,
+			file_path, _ = QFileDialog.getSaveFileName(
+				self,
+				"Salvar Backup",
+				start_dir + ("/" + (default_name or "backup.json")),
+				"JSON (*.json);;Banco SQLite (*.db)",
 			)
 		except Exception as e:
 			QMessageBox.critical(self, "Backup", f"Falha ao exportar backup: {e}")
 			return
-		QMessageBox.information(self, "Backup", f"Backup salvo em:\n{out}")
+		if not file_path:
+			return
 
-	def _import_backup(self) -> None:
-		try:
-			start_dir = str(self.backup_dir)
-			file_path, _ = QFileDialog.getOpenFileName(self, "Selecionar Backup", start_dir, "JSON (*.json)")
-			if not file_path:
-				return
-			# Criar um novo perfil para dados restaurados
-			new_profile_id = restore_profile(
+		exporter = export_profile_sqlite if Path(file_path).suffix.lower() == ".db" else export_profile
+		user_id = int(self.db.current_user_id)
+		profile_id = int(self.db.current_profile_id)
+		self._backup_job = run_with_progress(
+			self,
+			"Backup",
+			"Exportando backup...",
+			lambda progress: exporter(
 				db=self.db,
-				backup_file=Path(file_path),
-				target_user_id=int(self.db.current_user_id),
+				backup_dir=Path(file_path).parent,
+				user_id=user_id,
+				profile_id=profile_id,
+				filename=Path(file_path).name,
+				progress=progress,
+			),
+			on_success=lambda out: QMessageBox.information(self, "Backup", f"Backup salvo em:\n{out}"),
+			on_error=lambda msg: QMessageBox.critical(self, "Backup", f"Falha ao exportar backup: {msg}"),
+			on_cancel=lambda: QMessageBox.information(self, "Backup", "Backup cancelado."),
+			on_finished=self._clear_backup_job,
+		)
+
+	def _import_backup(self) -> None:
+		if self._backup_busy():
+			return
+		start_dir = str(self.backup_dir)
+		file_path, _ = QFileDialog.getOpenFileName(self, "Selecionar Backup", start_dir, "Backups (*.json *.db);;JSON (*.json);;Banco SQLite (*.db)")
+		if not file_path:
+			return
+		resp = QMessageBox.question(
+			self,
+			"Restaurar",
+			"Mesclar o backup no perfil atual, ignorando registros duplicados?\n"
+			"(Não = restaurar em um novo perfil)",
+			QMessageBox.Yes | QMessageBox.No | QMessageBox.Cancel,
+			QMessageBox.No,
+		)
+		if resp == QMessageBox.Cancel:
+			return
+
+		backup_file = Path(file_path)
+		user_id = int(self.db.current_user_id)
+		profile_id = int(self.db.current_profile_id)
+		on_error = lambda msg: QMessageBox.critical(self, "Restaurar", f"Falha ao restaurar backup: {msg}")
+		on_cancel = lambda: QMessageBox.information(self, "Restaurar", "Restauração cancelada. Nenhum dado foi alterado.")
+
+		if resp == QMessageBox.Yes:
+			self._backup_job = run_with_progress(
+				self,
+				"Restaurar",
+				"Mesclando backup no perfil atual...",
+				lambda progress: merge_restore_profile(
+					db=self.db,
+					backup_file=backup_file,
+					target_user_id=user_id,
+					target_profile_id=profile_id,
+					progress=progress,
+				),
+				on_success=self._on_backup_merged,
+				on_error=on_error,
+				on_cancel=on_cancel,
+				on_finished=self._clear_backup_job,
 			)
-			# Alternar para o novo perfil
-			self.db.set_current_profile(new_profile_id)
-			# Atualizar título
-			user = self.db.get_user(int(self.db.current_user_id))
-			profile = self.db.get_financial_profile(int(new_profile_id))
-			self.setWindowTitle(f"GEFIPS - {user.nome} / {profile.nome}")
-			# Atualizar dados
-			self.refresh()
-		except Exception as e:
-			QMessageBox.critical(self, "Restaurar", f"Falha ao restaurar backup: {e}")
 			return
 
+		# Criar um novo perfil para dados restaurados
+		restorer = restore_profile_sqlite if backup_file.suffix.lower() == ".db" else restore_profile
+		self._backup_job = run_with_progress(
+			self,
+			"Restaurar",
+			"Restaurando backup...",
+			lambda progress: restorer(
+				db=self.db,
+				backup_file=backup_file,
+				target_user_id=user_id,
+				progress=progress,
+			),
+			on_success=self._on_backup_restored,
+			on_error=on_error,
+			on_cancel=on_cancel,
+			on_finished=self._clear_backup_job,
+		)
+
+	def _on_backup_merged(self, counts) -> None:
+		self.refresh()
+		inseridos = sum(c["inseridos"] for c in counts.values())
+		ignorados = sum(c["ignorados"] for c in counts.values())
+		conflitantes = sum(c["conflitantes"] for c in counts.values())
+		QMessageBox.information(
+			self,
+			"Restaurar",
+			f"Backup mesclado no perfil atual.\n\nInseridos: {inseridos}\n"
+			f"Ignorados (duplicados): {ignorados}\nConflitantes (não alterados): {conflitantes}",
+		)
+
+	def _on_backup_restored(self, new_profile_id) -> None:
+		# Alternar para o novo perfil
+		self.db.set_current_profile(int(new_profile_id))
+		# Atualizar título
+		user = self.db.get_user(int(self.db.current_user_id))
+		profile = self.db.get_financial_profile(int(new_profile_id))
+		self.setWindowTitle(f"GEFIPS - {user.nome} / {profile.nome}")
+		# Atualizar dados
+		self.refresh()
+
 	def toggle_dark_theme(self) -> None:
 		toggle_dark_mode()
 		self._apply_theme()
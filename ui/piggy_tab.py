@@ -6,10 +6,14 @@ from typing import Any, Dict, List, Optional
 
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.figure import Figure
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QTimer
 from PyQt5.QtWidgets import (
+	QCheckBox,
+	QDoubleSpinBox,
+	QFileDialog,
 	QFrame,
 	QHBoxLayout,
+	QInputDialog,
 	QLabel,
 	QMessageBox,
 	QPushButton,
@@ -24,11 +28,23 @@ from PyQt5.QtWidgets import (
 from database.db_manager import DbManager
 from database.models_investments import PiggyBank
 from ui.dialogs.piggy_bank import PiggyBankDialog
+from ui.dialogs.sensitivity import SensitivityDialog
 from ui.icons import icon_add, icon_edit, icon_delete, icon_save, make_icon
 from ui.theme import is_dark_mode
+from ui.workers import BackgroundJob
+from utils.cdi_history import CdiHistory, import_cdi_csv
+from utils.cdi_simulation import CdiModel, SimulationBands, simulate_piggy
 from utils.formatters import format_brl
-from utils.investments import annual_rate_from_cdi, project_piggy
-from utils.reports_piggy import generate_piggy_projection_report_pdf
+from utils.investments import (
+	ProjectionArrays,
+	annual_rate_from_cdi,
+	monthly_projection,
+)
+from utils.reports_piggy import generate_piggy_projection_report_pdf, generate_portfolio_projection_report_pdf
+
+
+# Pausa (ms) sem alterações nos controles antes de simular os cenários de CDI
+SIMULATION_DELAY_MS = 300
 
 
 _MONTHS_SHORT = ["jan", "fev", "mar", "abr", "mai", "jun", "jul", "ago", "set", "out", "nov", "dez"]
@@ -39,6 +55,15 @@ class PiggyTab(QWidget):
 		super().__init__()
 		self.db = db
 		self.exports_dir = exports_dir
+		self._cdi_history: Optional[CdiHistory] = None
+		# Monte Carlo dos cenários: roda fora da thread da interface, depois de uma pausa
+		# nas alterações dos controles; só o resultado do pedido mais recente é desenhado
+		self._sim_job: Optional[BackgroundJob] = None
+		self._sim_request: Optional[Dict[str, Any]] = None
+		self._sim_timer = QTimer(self)
+		self._sim_timer.setSingleShot(True)
+		self._sim_timer.setInterval(SIMULATION_DELAY_MS)
+		self._sim_timer.timeout.connect(self._start_simulation)
 		style = self.style()
 
 		color = "#F1F5F9" if is_dark_mode() else "#111827"
@@ -55,14 +80,48 @@ class PiggyTab(QWidget):
 		self.btn_delete.clicked.connect(self.delete_selected)
 
 		self.horizon = QSpinBox()
-		self.horizon.setRange(1, 120)
+		self.horizon.setRange(1, 360)
 		self.horizon.setValue(12)
 		self.horizon.valueChanged.connect(lambda _v: self.refresh_projection())
 
+		self.chk_business_days = QCheckBox("Dias úteis (252)")
+		self.chk_business_days.setToolTip("Juros só em dias úteis, com feriados nacionais, como o CDI")
+		self.chk_business_days.toggled.connect(lambda _v: self.refresh_projection())
+
+		self.chk_lots = QCheckBox("IR por aporte")
+		self.chk_lots.setToolTip("IR e IOF regressivos calculados por aporte, cada um com o seu prazo")
+		self.chk_lots.toggled.connect(lambda _v: self.refresh_projection())
+
+		# Cenários de CDI (Monte Carlo): faixas P5-P95 no gráfico e no relatório
+		self.chk_scenarios = QCheckBox("Cenários de CDI")
+		self.chk_scenarios.toggled.connect(lambda _v: self.refresh_projection())
+		self.vol = QDoubleSpinBox()
+		self.vol.setDecimals(2)
+		self.vol.setRange(0.0, 20.0)
+		self.vol.setValue(1.5)
+		self.vol.setSingleStep(0.25)
+		self.vol.setSuffix(" p.p.")
+		self.vol.setToolTip("Volatilidade anual do CDI")
+		self.vol.valueChanged.connect(lambda _v: self._refresh_if_scenarios())
+		self.reversion = QDoubleSpinBox()
+		self.reversion.setDecimals(2)
+		self.reversion.setRange(0.0, 10.0)
+		self.reversion.setValue(0.5)
+		self.reversion.setSingleStep(0.1)
+		self.reversion.setToolTip("Velocidade de reversão do CDI à média (por ano)")
+		self.reversion.valueChanged.connect(lambda _v: self._refresh_if_scenarios())
+
+		self.btn_sensitivity = QPushButton("Sensibilidade")
+		self.btn_sensitivity.clicked.connect(self.open_sensitivity)
+
 		self.btn_report = QPushButton("Gerar relatório")
 		self.btn_report.setIcon(make_icon(icon_save(), 20, color))
 		self.btn_report.clicked.connect(self.generate_report)
 
+		self.btn_portfolio = QPushButton("Relatório da carteira")
+		self.btn_portfolio.setIcon(make_icon(icon_save(), 20, color))
+		self.btn_portfolio.clicked.connect(self.generate_portfolio_report)
+
 		controls = QHBoxLayout()
 		controls.addWidget(self.btn_add)
 		controls.addWidget(self.btn_edit)
@@ -70,7 +129,16 @@ class PiggyTab(QWidget):
 		controls.addSpacing(10)
 		controls.addWidget(QLabel("Projeção (meses):"))
 		controls.addWidget(self.horizon)
+		controls.addWidget(self.chk_business_days)
+		controls.addWidget(self.chk_lots)
+		controls.addWidget(self.chk_scenarios)
+		controls.addWidget(QLabel("Vol.:"))
+		controls.addWidget(self.vol)
+		controls.addWidget(QLabel("Reversão:"))
+		controls.addWidget(self.reversion)
+		controls.addWidget(self.btn_sensitivity)
 		controls.addWidget(self.btn_report)
+		controls.addWidget(self.btn_portfolio)
 		controls.addStretch(1)
 
 		self.table = QTableWidget(0, 6)
@@ -100,6 +168,13 @@ class PiggyTab(QWidget):
 		label2.setObjectName("SectionTitle")
 		left.addWidget(label2)
 		left.addWidget(self.table)
+		self.accrued_label = QLabel("")
+		self.accrued_label.setObjectName("Muted")
+		self.accrued_label.setWordWrap(True)
+		left.addWidget(self.accrued_label)
+		self.btn_import_cdi = QPushButton("Importar CDI histórico (CSV)")
+		self.btn_import_cdi.clicked.connect(self.import_cdi)
+		left.addWidget(self.btn_import_cdi)
 
 		row = QHBoxLayout()
 		row.addLayout(left, stretch=1)
@@ -225,9 +300,11 @@ class PiggyTab(QWidget):
 			self._clear_projection()
 			return
 
+		self._show_accrued(row)
+
 		d0 = date.fromisoformat(str(row.get("data_inicio")))
 		annual = annual_rate_from_cdi(float(row.get("cdi_aa") or 0.0), float(row.get("percent_cdi") or 0.0))
-		points = project_piggy(
+		params = dict(
 			start=d0,
 			principal=float(row.get("principal") or 0.0),
 			aporte_mensal=float(row.get("aporte_mensal") or 0.0),
@@ -235,32 +312,143 @@ class PiggyTab(QWidget):
 			horizon_months=int(self.horizon.value()),
 			aplicar_impostos=bool(row.get("aplicar_impostos")),
 		)
+		proj = monthly_projection(
+			**params,
+			daily=self.chk_business_days.isChecked(),
+			per_lot=self.chk_lots.isChecked(),
+		)
+
+		self._render_projection(proj)
 
-		self._render_projection(points)
+		model = self._scenario_model()
+		if model is None:
+			self._sim_request = None
+			self._sim_timer.stop()
+			return
+		self._sim_request = {
+			"proj": proj,
+			"kwargs": dict(
+				start=d0,
+				principal=float(row.get("principal") or 0.0),
+				aporte_mensal=float(row.get("aporte_mensal") or 0.0),
+				cdi_aa=float(row.get("cdi_aa") or 0.0),
+				percent_cdi=float(row.get("percent_cdi") or 0.0),
+				horizon_months=int(self.horizon.value()),
+				aplicar_impostos=bool(row.get("aplicar_impostos")),
+				model=model,
+			),
+		}
+		self._sim_timer.start()
+
+	def _start_simulation(self) -> None:
+		# com uma simulação em andamento, o pedido pendente é iniciado quando ela terminar
+		request = self._sim_request
+		if request is None or self._sim_job is not None:
+			return
+		kwargs = request["kwargs"]
+		job = BackgroundJob(lambda _progress: simulate_piggy(**kwargs), self)
+		job.succeeded.connect(lambda bands: self._on_simulated(request, bands))
+		job.failed.connect(lambda _msg: self._on_simulated(request, None))
+		job.finished.connect(self._on_simulation_finished)
+		job.finished.connect(job.deleteLater)
+		self._sim_job = job
+		job.start()
+
+	def _on_simulated(self, request: Dict[str, Any], bands: Optional[SimulationBands]) -> None:
+		if request is not self._sim_request:
+			return
+		self._sim_request = None
+		if bands is not None:
+			self._render_projection(request["proj"], bands)
+
+	def _on_simulation_finished(self) -> None:
+		self._sim_job = None
+		if self._sim_request is not None and not self._sim_timer.isActive():
+			self._start_simulation()
+
+	def _scenario_model(self) -> Optional[CdiModel]:
+		if not self.chk_scenarios.isChecked():
+			return None
+		return CdiModel(kappa=float(self.reversion.value()), sigma=float(self.vol.value()))
+
+	def _refresh_if_scenarios(self) -> None:
+		if self.chk_scenarios.isChecked():
+			self.refresh_projection()
+
+	def _history(self) -> CdiHistory:
+		# carregado uma vez; recarregado após cada importação
+		if self._cdi_history is None:
+			self._cdi_history = CdiHistory.load(self.db)
+		return self._cdi_history
+
+	def _show_accrued(self, row: Dict[str, Any]) -> None:
+		history = self._history()
+		if not history:
+			self.accrued_label.setText("Sem CDI histórico: importe um CSV para ver o valor real acumulado.")
+			return
+		acc = history.piggy_accrued(row)
+		text = (
+			f"Acumulado real (CDI histórico) até {acc['ate'].strftime('%d/%m/%Y')}: "
+			f"<b>{format_brl(acc['saldo_bruto'])}</b> bruto, {format_brl(acc['saldo_liquido'])} líquido "
+			f"({format_brl(acc['total_aportes'])} aportados)"
+		)
+		if not acc["coberto_desde"]:
+			text += " — histórico começa depois da data inicial"
+		self.accrued_label.setText(text)
+
+	def import_cdi(self) -> None:
+		path, _ = QFileDialog.getOpenFileName(self, "Importar CDI", str(Path.home()), "CSV (*.csv *.txt)")
+		if not path:
+			return
+		units = {
+			"% ao dia (SGS 12 do Banco Central)": "ad",
+			"% ao ano, base 252 (SGS 4389)": "aa",
+			"% ao mês (SGS 4391)": "am",
+		}
+		label, ok = QInputDialog.getItem(self, "Importar CDI", "Unidade da taxa no arquivo:", list(units), 0, False)
+		if not ok:
+			return
+		try:
+			count = import_cdi_csv(self.db, Path(path), units[label])
+		except Exception as e:
+			QMessageBox.critical(self, "Importar CDI", f"Falha ao importar: {e}")
+			return
+		self._cdi_history = None
+		first, last, total = self.db.get_cdi_range()
+		QMessageBox.information(
+			self, "Importar CDI", f"{count} taxas importadas.\nHistórico: {first} a {last} ({total} dias úteis)."
+		)
+		self.refresh_projection()
 
 	def _clear_projection(self) -> None:
+		self._sim_request = None
+		self.accrued_label.setText("")
 		self.proj_table.setRowCount(0)
 		self.fig.clear()
 		self.canvas.draw()
 
-	def _render_projection(self, points):
-		self.proj_table.setRowCount(len(points))
-		gross_series = []
-		net_series = []
-		labels = []
-		for i, p in enumerate(points):
-			labels.append(f"{_MONTHS_SHORT[p.ref_date.month-1]}/{str(p.ref_date.year)[-2:]}")
-			gross_series.append(p.saldo_bruto)
-			net_series.append(p.saldo_liquido)
-			impostos = p.iof + p.ir
-
+	def _render_projection(self, proj: ProjectionArrays, bands: Optional[SimulationBands] = None):
+		ref_dates = proj.ref_date.astype(object).tolist()
+		impostos = (proj.iof + proj.ir).tolist()
+		labels = [f"{_MONTHS_SHORT[d.month-1]}/{str(d.year)[-2:]}" for d in ref_dates]
+
+		self.proj_table.setRowCount(len(proj))
+		rows = zip(
+			ref_dates,
+			proj.total_aportes.tolist(),
+			proj.saldo_bruto.tolist(),
+			proj.rendimento_bruto.tolist(),
+			impostos,
+			proj.saldo_liquido.tolist(),
+		)
+		for i, (ref, aportes, bruto, rendimento, imp, liquido) in enumerate(rows):
 			items = [
-				QTableWidgetItem(f"{_MONTHS_SHORT[p.ref_date.month-1]}/{p.ref_date.year}"),
-				QTableWidgetItem(format_brl(p.total_aportes)),
-				QTableWidgetItem(format_brl(p.saldo_bruto)),
-				QTableWidgetItem(format_brl(p.rendimento_bruto)),
-				QTableWidgetItem(format_brl(impostos)),
-				QTableWidgetItem(format_brl(p.saldo_liquido)),
+				QTableWidgetItem(f"{_MONTHS_SHORT[ref.month-1]}/{ref.year}"),
+				QTableWidgetItem(format_brl(aportes)),
+				QTableWidgetItem(format_brl(bruto)),
+				QTableWidgetItem(format_brl(rendimento)),
+				QTableWidgetItem(format_brl(imp)),
+				QTableWidgetItem(format_brl(liquido)),
 			]
 			for c, it in enumerate(items):
 				if c >= 1:
@@ -269,8 +457,12 @@ class PiggyTab(QWidget):
 
 		self.fig.clear()
 		ax = self.fig.add_subplot(111)
-		ax.plot(gross_series, label="Bruto")
-		ax.plot(net_series, label="Líquido")
+		ax.plot(proj.saldo_bruto, label="Bruto")
+		ax.plot(proj.saldo_liquido, label="Líquido")
+		if bands is not None:
+			x = range(len(proj))
+			ax.fill_between(x, bands.saldo_liquido[0], bands.saldo_liquido[2], alpha=0.2, label="Líquido P5-P95")
+			ax.plot(bands.saldo_liquido[1], linestyle="--", linewidth=1.0, label="Líquido P50")
 		step = max(1, len(labels) // 6)
 		ticks = list(range(0, len(labels), step))
 		ax.set_xticks(ticks)
@@ -280,6 +472,17 @@ class PiggyTab(QWidget):
 		self.fig.tight_layout()
 		self.canvas.draw()
 
+	def open_sensitivity(self) -> None:
+		pid = self._selected_id()
+		if pid is None:
+			QMessageBox.information(self, "Sensibilidade", "Selecione um cofrinho.")
+			return
+		row = self.db.get_piggy_bank(pid)
+		if not row:
+			QMessageBox.warning(self, "Sensibilidade", "Cofrinho não encontrado.")
+			return
+		SensitivityDialog(self, row).exec_()
+
 	def generate_report(self) -> None:
 		pid = self._selected_id()
 		if pid is None:
@@ -295,6 +498,24 @@ class PiggyTab(QWidget):
 				exports_dir=self.exports_dir,
 				piggy_id=pid,
 				horizon_months=int(self.horizon.value()),
+				model=self._scenario_model(),
+				daily=self.chk_business_days.isChecked(),
+				per_lot=self.chk_lots.isChecked(),
+			)
+		except Exception as e:
+			QMessageBox.critical(self, "Relatório", f"Falha ao gerar relatório: {e}")
+			return
+		QMessageBox.information(self, "Relatório", f"Relatório gerado em:\n{out}")
+
+	def generate_portfolio_report(self) -> None:
+		if not self.db.list_piggy_banks():
+			QMessageBox.information(self, "Relatório", "Nenhum cofrinho cadastrado.")
+			return
+		try:
+			out = generate_portfolio_projection_report_pdf(
+				db=self.db,
+				exports_dir=self.exports_dir,
+				horizon_months=int(self.horizon.value()),
 			)
 		except Exception as e:
 			QMessageBox.critical(self, "Relatório", f"Falha ao gerar relatório: {e}")
@@ -1,15 +1,19 @@
 from __future__ import annotations
 
 from datetime import date, timedelta
-from typing import Any, Dict, List
+from pathlib import Path
+from typing import Any, Dict, List, Optional
 
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.figure import Figure
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import QDate, Qt
 from PyQt5.QtWidgets import (
+	QComboBox,
+	QDateEdit,
 	QFrame,
 	QHBoxLayout,
 	QLabel,
+	QMessageBox,
 	QPushButton,
 	QSpinBox,
 	QVBoxLayout,
@@ -18,6 +22,8 @@ from PyQt5.QtWidgets import (
 )
 
 from database.db_manager import DbManager
+from ui.workers import BackgroundJob, run_with_progress
+from utils.exports import EXPORTERS
 from utils.formatters import format_brl
 
 
@@ -28,9 +34,11 @@ _MUTED = "#6B7280"
 
 
 class ReportsTab(QWidget):
-	def __init__(self, db: DbManager):
+	def __init__(self, db: DbManager, exports_dir: Path):
 		super().__init__()
 		self.db = db
+		self.exports_dir = exports_dir
+		self._export_job: Optional[BackgroundJob] = None
 		
 		self.title = QLabel("Relatórios")
 		self.title.setObjectName("SectionTitle")
@@ -54,6 +62,35 @@ class ReportsTab(QWidget):
 		month_year_layout.addWidget(self.year_spinbox)
 		month_year_layout.addStretch()
 		
+		# Exportação de planilhas (qualquer período)
+		export_layout = QHBoxLayout()
+		export_layout.addWidget(QLabel("Exportar de:"))
+		self.export_start = QDateEdit()
+		self.export_start.setCalendarPopup(True)
+		self.export_start.setDisplayFormat("dd/MM/yyyy")
+		export_layout.addWidget(self.export_start)
+		export_layout.addWidget(QLabel("até:"))
+		self.export_end = QDateEdit()
+		self.export_end.setCalendarPopup(True)
+		self.export_end.setDisplayFormat("dd/MM/yyyy")
+		export_layout.addWidget(self.export_end)
+		self.export_kind = QComboBox()
+		self.export_kind.addItem("Transações", "transacoes")
+		self.export_kind.addItem("Totais por categoria", "categorias")
+		self.export_kind.addItem("Orçamentos", "orcamentos")
+		export_layout.addWidget(self.export_kind)
+		self.export_format = QComboBox()
+		self.export_format.addItem("Excel (XLSX)", "xlsx")
+		self.export_format.addItem("CSV", "csv")
+		export_layout.addWidget(self.export_format)
+		self.btn_export = QPushButton("📤 Exportar planilha")
+		self.btn_export.clicked.connect(self._export_spreadsheet)
+		export_layout.addWidget(self.btn_export)
+		export_layout.addStretch()
+		self._sync_export_period()
+		self.month_spinbox.valueChanged.connect(lambda _v: self._sync_export_period())
+		self.year_spinbox.valueChanged.connect(lambda _v: self._sync_export_period())
+		
 		# Abas de relatórios
 		self.tabs = QTabWidget()
 		
@@ -79,6 +116,7 @@ class ReportsTab(QWidget):
 		root = QVBoxLayout()
 		root.addWidget(self.title)
 		root.addLayout(month_year_layout)
+		root.addLayout(export_layout)
 		root.addWidget(self.tabs, stretch=1)
 		self.setLayout(root)
 		
@@ -229,6 +267,47 @@ class ReportsTab(QWidget):
 		self.summary_layout.addWidget(label)
 		self.summary_layout.addStretch()
 	
+	def _sync_export_period(self) -> None:
+		"""Período de exportação padrão: o mês selecionado"""
+		first = QDate(self.year_spinbox.value(), self.month_spinbox.value(), 1)
+		self.export_start.setDate(first)
+		self.export_end.setDate(first.addMonths(1).addDays(-1))
+	
+	def _export_spreadsheet(self) -> None:
+		"""Exporta a planilha escolhida em segundo plano (transações são lidas em lotes)"""
+		if self._export_job is not None:
+			return
+		start = self.export_start.date().toPyDate()
+		end = self.export_end.date().toPyDate()
+		if end < start:
+			QMessageBox.warning(self, "Exportar", "A data final é anterior à inicial.")
+			return
+		exporter = EXPORTERS[self.export_kind.currentData()]
+		fmt = self.export_format.currentData()
+		
+		def _done() -> None:
+			self._export_job = None
+			self.btn_export.setEnabled(True)
+		
+		def _on_success(out: Any) -> None:
+			_done()
+			QMessageBox.information(self, "Exportar", f"Planilha gerada em:\n{out}")
+		
+		def _on_error(msg: str) -> None:
+			_done()
+			QMessageBox.critical(self, "Exportar", f"Falha ao exportar: {msg}")
+		
+		self.btn_export.setEnabled(False)
+		self._export_job = run_with_progress(
+			self,
+			"Exportar planilha",
+			"Exportando...",
+			lambda progress: exporter(self.db, self.exports_dir, start, end, fmt=fmt, progress=progress),
+			_on_success,
+			_on_error,
+			on_cancel=_done,
+		)
+	
 	def _get_month_name(self, mes: int) -> str:
 		"""Retorna o nome do mês em português"""
 		meses = [
@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+from typing import Any, Callable, Optional
+
+from PyQt5.QtCore import QThread, Qt, pyqtSignal
+from PyQt5.QtWidgets import QProgressDialog, QWidget
+
+from utils.progress import OperationCancelled, ProgressCallback
+
+
+class BackgroundJob(QThread):
+	"""Executa uma operação longa fora da thread da interface.
+
+	A função recebe um callback de progresso (linhas processadas, total); quando o usuário
+	cancela, o callback passa a retornar False e a operação desfaz o que já fez.
+	"""
+
+	progress = pyqtSignal(int, int)
+	succeeded = pyqtSignal(object)
+	failed = pyqtSignal(str)
+	cancelled = pyqtSignal()
+
+	def __init__(self, fn: Callable[[ProgressCallback], Any], parent: Optional[QWidget] = None):
+		super().__init__(parent)
+		self._fn = fn
+
+	def _report(self, done: int, total: int) -> bool:
+		self.progress.emit(int(done), int(total))
+		return not self.isInterruptionRequested()
+
+	def run(self) -> None:
+		try:
+			result = self._fn(self._report)
+		except OperationCancelled:
+			self.cancelled.emit()
+			return
+		except Exception as e:
+			self.failed.emit(str(e))
+			return
+		self.succeeded.emit(result)
+
+
+def run_with_progress(
+	parent: QWidget,
+	title: str,
+	label: str,
+	fn: Callable[[ProgressCallback], Any],
+	on_success: Callable[[Any], None],
+	on_error: Callable[[str], None],
+	on_cancel: Optional[Callable[[], None]] = None,
+	on_finished: Optional[Callable[[], None]] = None,
+) -> BackgroundJob:
+	"""
+	Inicia um BackgroundJob exibindo um QProgressDialog modal com botão de cancelar.
+	on_finished é chamado quando a thread termina, qualquer que seja o resultado.
+	"""
+	dlg = QProgressDialog(label, "Cancelar", 0, 0, parent)
+	dlg.setWindowTitle(title)
+	# modal desde o início: a janela não aceita edições enquanto o job segura o banco
+	dlg.setWindowModality(Qt.WindowModal)
+	dlg.setMinimumDuration(300)
+	dlg.setAutoClose(False)
+	dlg.setAutoReset(False)
+	dlg.setValue(0)
+
+	job = BackgroundJob(fn, parent)
+
+	def _on_progress(done: int, total: int) -> None:
+		if total > 0:
+			dlg.setMaximum(total)
+			dlg.setValue(min(done, total))
+			dlg.setLabelText(f"{label}\n{done} de {total} registros")
+
+	def _finish() -> None:
+		dlg.close()
+
+	def _on_success(result: Any) -> None:
+		_finish()
+		on_success(result)
+
+	def _on_error(msg: str) -> None:
+		_finish()
+		on_error(msg)
+
+	def _on_cancelled() -> None:
+		_finish()
+		if on_cancel:
+			on_cancel()
+
+	job.progress.connect(_on_progress)
+	job.succeeded.connect(_on_success)
+	job.failed.connect(_on_error)
+	job.cancelled.connect(_on_cancelled)
+	dlg.canceled.connect(job.requestInterruption)
+	if on_finished:
+		job.finished.connect(on_finished)
+	job.finished.connect(job.deleteLater)
+
+	job.start()
+	return job
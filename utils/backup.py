@@ -1,32 +1,317 @@
 from __future__ import annotations
 
+import hashlib
 import json
+import re
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from dataclasses import asdict
 from datetime import datetime, date
+from itertools import islice
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
 
-from database.db_manager import DbManager
+from database.db_manager import (
+	GOAL_CONTRIBUTION_COLUMNS,
+	ID_MAPPED_TABLES,
+	PROFILE_TABLES,
+	DbManager,
+	copy_goal_contributions,
+	map_copied_ids,
+	max_table_id,
+	remap_profile_links,
+	start_id_map,
+)
 from database.models_user import FinancialProfile
+from utils.batch import batch_db, init_batch_worker
+from utils.progress import OperationCancelled, ProgressCallback
 
 
-BACKUP_VERSION = 1
+# 2: recorrências, com transacoes.recorrente_id apontando para as regras do próprio backup.
+# Backups da versão 1 continuam aceitos (sem regras; recorrente_id é descartado na restauração).
+BACKUP_VERSION = 2
+READABLE_BACKUP_VERSIONS = (1, 2)
+SQLITE_BACKUP_FORMAT = "gefips-sqlite"
+JSON_BACKUP_FORMAT = "gefips-json"
+_CHECKSUM_CHUNK = 1 << 20  # 1 MiB
+_VERSION_PREFIX = re.compile(rb'\A\s*\{\s*"version"\s*:\s*(\d+)')
+
+_PROGRESS_CHUNK = 500
+
+
+class BackupCancelled(OperationCancelled):
+	"""Operação de backup/restauração cancelada pelo usuário."""
+
+
+class _Progress:
+	def __init__(self, callback: Optional[ProgressCallback], total: int):
+		self.callback = callback
+		self.total = int(total)
+		self.done = 0
+
+	def advance(self, count: int) -> None:
+		self.done += int(count)
+		if self.callback is not None and self.callback(self.done, self.total) is False:
+			raise BackupCancelled("Operação cancelada")
+
+
+# Aportes das metas de um perfil (aportes_meta não tem usuario_id/perfil_id)
+_GOAL_CONTRIBUTIONS_SQL = f"""
+SELECT a.id, {", ".join(f"a.{c}" for c in GOAL_CONTRIBUTION_COLUMNS)}
+FROM main.aportes_meta a JOIN main.metas_financeiras m ON m.id = a.meta_id
+WHERE m.usuario_id = ? AND m.perfil_id = ?
+ORDER BY a.id
+"""
+
+
+def _count_profile_rows(conn: sqlite3.Connection, user_id: int, profile_id: int) -> Dict[str, int]:
+	counts = {
+		table: int(
+			conn.execute(
+				f"SELECT COUNT(*) FROM {table} WHERE usuario_id = ? AND perfil_id = ?",
+				(int(user_id), int(profile_id)),
+			).fetchone()[0]
+		)
+		for table in PROFILE_TABLES
+	}
+	counts["aportes_meta"] = int(
+		conn.execute(f"SELECT COUNT(*) FROM ({_GOAL_CONTRIBUTIONS_SQL})", (int(user_id), int(profile_id))).fetchone()[0]
+	)
+	return counts
+
+
+def _load_temp_rows(conn: sqlite3.Connection, name: str, cols: Sequence[str], rows: Iterable[Dict[str, Any]]) -> None:
+	"""Carrega linhas do backup JSON em uma tabela temporária (rowid = ordem no arquivo)."""
+	conn.execute(f"DROP TABLE IF EXISTS temp.{name}")
+	conn.execute(f"CREATE TEMP TABLE {name} ({', '.join(cols)})")
+	conn.executemany(
+		f"INSERT INTO temp.{name} ({', '.join(cols)}) VALUES ({', '.join('?' for _ in cols)})",
+		([row.get(c) for c in cols] for row in rows),
+	)
+
+
+def _fetch_rows(cur: sqlite3.Cursor, progress: _Progress) -> List[Dict[str, Any]]:
+	rows: List[Dict[str, Any]] = []
+	while True:
+		chunk = cur.fetchmany(_PROGRESS_CHUNK)
+		if not chunk:
+			return rows
+		rows.extend(dict(r) for r in chunk)
+		progress.advance(len(chunk))
+
+
+def _insert_rows(
+	conn: sqlite3.Connection,
+	sql: str,
+	params: Iterable[Sequence[Any]],
+	progress: _Progress,
+) -> None:
+	it = iter(params)
+	while True:
+		chunk = list(islice(it, _PROGRESS_CHUNK))
+		if not chunk:
+			return
+		conn.executemany(sql, chunk)
+		progress.advance(len(chunk))
+
+
+def _free_profile_name(conn: sqlite3.Connection, user_id: int, base: str, suffix: str) -> str:
+	"""
+	"<base> <suffix>" ainda não usado pelo usuário (perfis têm nome único por usuário);
+	se já existir, numera o sufixo: "(Restaurado)" -> "(Restaurado 2)", "(Restaurado 3)"...
+	"""
+	taken = {r[0] for r in conn.execute("SELECT nome FROM main.perfis_financeiros WHERE usuario_id = ?", (int(user_id),))}
+	name, n = f"{base} {suffix}", 2
+	while name in taken:
+		numbered = f"{suffix[:-1]} {n})" if suffix.endswith(")") else f"{suffix} {n}"
+		name, n = f"{base} {numbered}", n + 1
+	return name
 
 
 def _iso_now() -> str:
 	return datetime.utcnow().isoformat()
 
 
+def checksum_path(backup_file: Path) -> Path:
+	"""Arquivo de checksums ao lado do backup JSON (ex.: backup.json.sha256)."""
+	return backup_file.with_name(backup_file.name + ".sha256")
+
+
+def _write_backup_json(out_path: Path, data: Dict[str, Any]) -> None:
+	"""Grava o backup como JSON puro e os hashes (por bloco e do arquivo) em checksum_path."""
+	body = json.dumps(data, ensure_ascii=False, indent=2).encode("utf-8")
+	view = memoryview(body)
+	header = {
+		"format": JSON_BACKUP_FORMAT,
+		"version": BACKUP_VERSION,
+		"file": out_path.name,
+		"algorithm": "sha256",
+		"chunk_size": _CHECKSUM_CHUNK,
+		"size": len(body),
+		"sha256": hashlib.sha256(view).hexdigest(),
+		"chunks": [
+			hashlib.sha256(view[i:i + _CHECKSUM_CHUNK]).hexdigest()
+			for i in range(0, len(body), _CHECKSUM_CHUNK)
+		],
+	}
+	out_path.write_bytes(body)
+	with checksum_path(out_path).open("w", encoding="utf-8") as f:
+		json.dump(header, f, indent=2)
+
+
+def _read_header(f) -> Optional[Dict[str, Any]]:
+	"""Cabeçalho embutido na primeira linha (backups gerados antes do arquivo de checksums)."""
+	line = f.readline()
+	try:
+		header = json.loads(line)
+	except ValueError:
+		return None
+	if isinstance(header, dict) and header.get("format") == JSON_BACKUP_FORMAT:
+		return header
+	return None
+
+
+def _peek_json_version(f) -> Optional[int]:
+	"""
+	Versão de um backup JSON puro lida do início do arquivo: export_profile sempre grava
+	"version" como primeira chave. None se o arquivo não começar assim.
+	"""
+	f.seek(0)
+	match = _VERSION_PREFIX.match(f.read(256))
+	f.seek(0)
+	return int(match.group(1)) if match else None
+
+
+def read_backup_header(backup_file: Path) -> Optional[Dict[str, Any]]:
+	"""Hashes de um backup JSON (arquivo .sha256 ou cabeçalho embutido); None se não houver."""
+	sidecar = checksum_path(backup_file)
+	if sidecar.exists():
+		try:
+			header = json.loads(sidecar.read_text(encoding="utf-8"))
+		except ValueError:
+			return None
+		return header if isinstance(header, dict) and header.get("format") == JSON_BACKUP_FORMAT else None
+	with backup_file.open("rb") as f:
+		return _read_header(f)
+
+
+def verify_backup(backup_file: Path) -> Dict[str, Any]:
+	"""
+	Verifica a integridade de um backup sem carregá-lo na memória.
+
+	JSON: lê o arquivo em blocos de chunk_size, conferindo o hash de cada bloco e o
+	hash do arquivo inteiro contra checksum_path. SQLite: PRAGMA quick_check e backup_info.
+	Retorna {"ok", "format", "verified", "bad_chunks", "error"}. Backups JSON da versão 1,
+	anteriores aos checksums, não podem ser verificados (ok=True, verified=False); um backup
+	de versão posterior sem checksum_path é recusado, pois os hashes foram perdidos.
+	"""
+	report: Dict[str, Any] = {"ok": False, "format": None, "verified": False, "bad_chunks": [], "error": None}
+	if not backup_file.exists():
+		report["error"] = "Arquivo não encontrado"
+		return report
+
+	if backup_file.suffix.lower() == ".db":
+		report["format"] = SQLITE_BACKUP_FORMAT
+		try:
+			conn = sqlite3.connect(f"{backup_file.resolve().as_uri()}?mode=ro", uri=True)
+			try:
+				check = conn.execute("PRAGMA quick_check").fetchone()[0]
+				fmt = conn.execute("SELECT valor FROM backup_info WHERE chave = 'format'").fetchone()
+			finally:
+				conn.close()
+		except sqlite3.DatabaseError as e:
+			report["error"] = f"Banco SQLite inválido: {e}"
+			return report
+		if check != "ok":
+			report["error"] = f"Banco SQLite corrompido: {check}"
+		elif not fmt or fmt[0] != SQLITE_BACKUP_FORMAT:
+			report["error"] = "Arquivo de backup inválido"
+		else:
+			report.update(ok=True, verified=True)
+		return report
+
+	has_sidecar = checksum_path(backup_file).exists()
+	with backup_file.open("rb") as f:
+		# com arquivo de checksums o JSON é lido desde o início; senão, após o cabeçalho embutido
+		header = read_backup_header(backup_file) if has_sidecar else _read_header(f)
+		if header is None:
+			if has_sidecar:
+				report.update(format=JSON_BACKUP_FORMAT, error="Arquivo de checksums inválido")
+			elif (_peek_json_version(f) or 1) > 1:
+				report.update(
+					format=JSON_BACKUP_FORMAT,
+					error=f"Checksums ausentes: {checksum_path(backup_file).name} não encontrado",
+				)
+			else:
+				report.update(ok=True, format="json-legado")
+			return report
+		report["format"] = JSON_BACKUP_FORMAT
+
+		chunk_size = int(header.get("chunk_size") or _CHECKSUM_CHUNK)
+		expected: List[str] = list(header.get("chunks") or [])
+		whole = hashlib.sha256()
+		size = 0
+		index = 0
+		while True:
+			block = f.read(chunk_size)
+			if not block:
+				break
+			whole.update(block)
+			size += len(block)
+			if index >= len(expected) or hashlib.sha256(block).hexdigest() != expected[index]:
+				report["bad_chunks"].append(index)
+			index += 1
+
+	if index < len(expected):
+		report["bad_chunks"].extend(range(index, len(expected)))
+	if size != int(header.get("size") or -1):
+		report["error"] = f"Tamanho inesperado ({size} de {header.get('size')} bytes); arquivo truncado?"
+	elif report["bad_chunks"] or whole.hexdigest() != header.get("sha256"):
+		report["error"] = "Checksum não confere; arquivo corrompido"
+	else:
+		report.update(ok=True, verified=True)
+	return report
+
+
+def _require_valid_backup(backup_file: Path) -> Dict[str, Any]:
+	report = verify_backup(backup_file)
+	if not report["ok"]:
+		raise ValueError(f"Backup corrompido: {report['error']}")
+	return report
+
+
+def _read_backup_json(backup_file: Path) -> Dict[str, Any]:
+	report = _require_valid_backup(backup_file)
+	with backup_file.open("rb") as f:
+		# backups com cabeçalho embutido: o JSON começa na segunda linha
+		if _read_header(f) is None:
+			f.seek(0)
+		payload = json.load(f)
+
+	# Validação básica
+	if not isinstance(payload, dict) or "version" not in payload:
+		raise ValueError("Arquivo de backup inválido")
+	if int(payload.get("version", 0)) not in READABLE_BACKUP_VERSIONS:
+		raise ValueError("Versão de backup incompatível")
+	# só a versão 1 é aceita sem checksums ("version" fora do início escapa de verify_backup)
+	if not report["verified"] and int(payload["version"]) > 1:
+		raise ValueError("Backup corrompido: checksums ausentes")
+	return payload
+
+
 def export_profile(
 	db: DbManager,
 	backup_dir: Path,
 	user_id: int,
 	profile_id: int,
 	filename: Optional[str] = None,
+	progress: Optional[ProgressCallback] = None,
 ) -> Path:
 	"""
 	Exporta todos os dados do perfil financeiro especificado para um arquivo JSON em backup_dir.
-	Retorna o caminho do arquivo gerado.
+	Retorna o caminho do arquivo gerado. Se informado, progress recebe a contagem de linhas
+	lidas e pode cancelar a exportação (nenhum arquivo é gravado nesse caso).
 	"""
 	backup_dir.mkdir(parents=True, exist_ok=True)
 
@@ -38,45 +323,72 @@ def export_profile(
 
 	# Coletar dados das tabelas associadas ao perfil
 	with db._connect() as conn:
+		total = sum(_count_profile_rows(conn, user_id, profile_id).values()) if progress else 0
+		state = _Progress(progress, total)
+
 		# Transações
-		rows_tx = conn.execute(
-			"""
-			SELECT id, usuario_id, perfil_id, tipo, categoria, subcategoria, descricao, valor, data, pago, tags, anexo_caminho, data_registro
-			FROM transacoes WHERE usuario_id = ? AND perfil_id = ? ORDER BY date(data) ASC, datetime(data_registro) ASC
-			""",
-			(user_id, profile_id),
-		).fetchall()
-		transactions: List[Dict[str, Any]] = [dict(r) for r in rows_tx]
+		transactions = _fetch_rows(
+			conn.execute(
+				"""
+				SELECT id, usuario_id, perfil_id, tipo, categoria, subcategoria, descricao, valor, data, pago, tags, anexo_caminho, data_registro,
+					recorrente, recorrente_id
+				FROM transacoes WHERE usuario_id = ? AND perfil_id = ? ORDER BY date(data) ASC, datetime(data_registro) ASC
+				""",
+				(user_id, profile_id),
+			),
+			state,
+		)
 
 		# Cofrinhos
-		rows_piggy = conn.execute(
-			"""
-			SELECT id, usuario_id, perfil_id, nome, instituicao, percent_cdi, cdi_aa, principal, aporte_mensal, data_inicio, aplicar_impostos, created_at
-			FROM cofrinhos WHERE usuario_id = ? AND perfil_id = ? ORDER BY datetime(created_at) ASC
-			""",
-			(user_id, profile_id),
-		).fetchall()
-		piggy_banks: List[Dict[str, Any]] = [dict(r) for r in rows_piggy]
+		piggy_banks = _fetch_rows(
+			conn.execute(
+				"""
+				SELECT id, usuario_id, perfil_id, nome, instituicao, percent_cdi, cdi_aa, principal, aporte_mensal, data_inicio, aplicar_impostos, created_at
+				FROM cofrinhos WHERE usuario_id = ? AND perfil_id = ? ORDER BY datetime(created_at) ASC
+				""",
+				(user_id, profile_id),
+			),
+			state,
+		)
 
 		# Orçamentos
-		rows_budgets = conn.execute(
-			"""
-			SELECT id, usuario_id, perfil_id, categoria, limite_mensal, mes, ano, ativo, descricao, data_criacao
-			FROM orcamentos WHERE usuario_id = ? AND perfil_id = ? ORDER BY ano ASC, mes ASC, categoria ASC
-			""",
-			(user_id, profile_id),
-		).fetchall()
-		budgets: List[Dict[str, Any]] = [dict(r) for r in rows_budgets]
+		budgets = _fetch_rows(
+			conn.execute(
+				"""
+				SELECT id, usuario_id, perfil_id, categoria, limite_mensal, mes, ano, ativo, descricao, data_criacao
+				FROM orcamentos WHERE usuario_id = ? AND perfil_id = ? ORDER BY ano ASC, mes ASC, categoria ASC
+				""",
+				(user_id, profile_id),
+			),
+			state,
+		)
 
 		# Metas
-		rows_goals = conn.execute(
-			"""
-			SELECT id, usuario_id, perfil_id, nome, valor_alvo, valor_atual, data_inicio, data_alvo, ativo, descricao, prioridade, data_criacao
-			FROM metas_financeiras WHERE usuario_id = ? AND perfil_id = ? ORDER BY date(data_alvo) ASC
-			""",
-			(user_id, profile_id),
-		).fetchall()
-		goals: List[Dict[str, Any]] = [dict(r) for r in rows_goals]
+		goals = _fetch_rows(
+			conn.execute(
+				"""
+				SELECT id, usuario_id, perfil_id, nome, valor_alvo, valor_atual, data_inicio, data_alvo, ativo, descricao, prioridade, data_criacao
+				FROM metas_financeiras WHERE usuario_id = ? AND perfil_id = ? ORDER BY date(data_alvo) ASC
+				""",
+				(user_id, profile_id),
+			),
+			state,
+		)
+
+		# Recorrências (transactions.recorrente_id aponta para estes ids)
+		recurrences = _fetch_rows(
+			conn.execute(
+				f"""
+				SELECT id, usuario_id, perfil_id, {", ".join(PROFILE_TABLES["recorrencias"])}
+				FROM recorrencias WHERE usuario_id = ? AND perfil_id = ? ORDER BY id
+				""",
+				(user_id, profile_id),
+			),
+			state,
+		)
+
+		# Aportes das metas (ids de meta, transação e cofrinho do perfil de origem)
+		goal_contributions = _fetch_rows(conn.execute(_GOAL_CONTRIBUTIONS_SQL, (user_id, profile_id)), state)
 
 	data = {
 		"version": BACKUP_VERSION,
@@ -87,6 +399,8 @@ def export_profile(
 		"piggy_banks": piggy_banks,
 		"budgets": budgets,
 		"goals": goals,
+		"recurrences": recurrences,
+		"goal_contributions": goal_contributions,
 	}
 
 	# Nome do arquivo
@@ -97,9 +411,8 @@ def export_profile(
 		filename = f"backup_{username}_{pname}_{ts}.json"
 	out_path = backup_dir / filename
 
-	# Salvar JSON
-	with out_path.open("w", encoding="utf-8") as f:
-		json.dump(data, f, ensure_ascii=False, indent=2)
+	# Salvar JSON (checksums em arquivo separado)
+	_write_backup_json(out_path, data)
 	return out_path
 
 
@@ -108,38 +421,27 @@ def restore_profile(
 	backup_file: Path,
 	target_user_id: int,
 	new_profile_name_suffix: Optional[str] = None,
+	progress: Optional[ProgressCallback] = None,
 ) -> int:
 	"""
 	Restaura um backup JSON criando um novo perfil para o usuário-alvo e inserindo
 	todos os registros associados. Retorna o novo profile_id.
-	Não altera nem remove dados existentes.
+	Não altera nem remove dados existentes. O perfil e os registros são gravados em uma
+	única transação: se progress cancelar a operação, nada é mantido.
 	"""
 	if not backup_file.exists():
 		raise FileNotFoundError(str(backup_file))
 
-	with backup_file.open("r", encoding="utf-8") as f:
-		payload = json.load(f)
-
-	# Validação básica
-	if not isinstance(payload, dict) or "version" not in payload:
-		raise ValueError("Arquivo de backup inválido")
-	if int(payload.get("version", 0)) != BACKUP_VERSION:
-		raise ValueError("Versão de backup incompatível")
+	payload = _read_backup_json(backup_file)
 
 	src_profile = payload.get("profile") or {}
 	src_user = payload.get("user") or {}
 
-	# Preparar novo perfil para o usuário alvo
-	base_name = str(src_profile.get("nome") or "Perfil Restaurado")
-	if new_profile_name_suffix:
-		new_name = f"{base_name} {new_profile_name_suffix}"
-	else:
-		new_name = f"{base_name} (Restaurado)"
-
+	# Preparar novo perfil para o usuário alvo (o nome é escolhido já com a conexão aberta)
 	profile = FinancialProfile(
 		id=None,
 		user_id=int(target_user_id),
-		nome=new_name,
+		nome=str(src_profile.get("nome") or "Perfil Restaurado"),
 		descricao=src_profile.get("descricao"),
 		moeda=str(src_profile.get("moeda") or "BRL"),
 		cdi_aa_padrao=float(src_profile.get("cdi_aa_padrao") or 10.0),
@@ -149,98 +451,671 @@ def restore_profile(
 		data_criacao=None,
 		ativo=True,
 	)
-	new_profile_id = db.add_financial_profile(profile)
 
 	# Inserir dados
 	transactions: List[Dict[str, Any]] = list(payload.get("transactions") or [])
 	piggies: List[Dict[str, Any]] = list(payload.get("piggy_banks") or [])
 	budgets: List[Dict[str, Any]] = list(payload.get("budgets") or [])
 	goals: List[Dict[str, Any]] = list(payload.get("goals") or [])
+	recurrences: List[Dict[str, Any]] = list(payload.get("recurrences") or [])
+	contributions: List[Dict[str, Any]] = list(payload.get("goal_contributions") or [])
+	state = _Progress(
+		progress, len(transactions) + len(piggies) + len(budgets) + len(goals) + len(recurrences) + len(contributions)
+	)
+	sections = {"transacoes": transactions, "cofrinhos": piggies, "metas_financeiras": goals, "recorrencias": recurrences}
 
 	with db._connect() as conn:
-		# Transações
-		for row in transactions:
-			conn.execute(
+		start_id_map(conn)
+		after_ids = {table: max_table_id(conn, table) for table in ID_MAPPED_TABLES}
+		profile.nome = _free_profile_name(conn, profile.user_id, profile.nome, new_profile_name_suffix or "(Restaurado)")
+		try:
+			cur = conn.execute(
 				"""
-				INSERT INTO transacoes (usuario_id, perfil_id, tipo, categoria, subcategoria, descricao, valor, data, pago, tags, anexo_caminho)
-				VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+				INSERT INTO perfis_financeiros
+				(usuario_id, nome, descricao, moeda, cdi_aa_padrao, ir_automatico, iof_automatico, ano_fiscal, ativo)
+				VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
 				""",
 				(
-					int(target_user_id),
-					int(new_profile_id),
-					str(row.get("tipo")),
-					str(row.get("categoria")),
-					row.get("subcategoria"),
-					row.get("descricao"),
-					float(row.get("valor") or 0.0),
-					str(row.get("data")),
-					1 if bool(row.get("pago", True)) else 0,
-					row.get("tags"),
-					row.get("anexo_caminho"),
+					profile.user_id,
+					profile.nome,
+					profile.descricao,
+					profile.moeda,
+					profile.cdi_aa_padrao,
+					1 if profile.ir_automatico else 0,
+					1 if profile.iof_automatico else 0,
+					profile.ano_fiscal,
+					1 if profile.ativo else 0,
 				),
 			)
+			new_profile_id = int(cur.lastrowid)
 
-		# Cofrinhos
-		for row in piggies:
-			conn.execute(
+			# Transações
+			_insert_rows(
+				conn,
+				"""
+				INSERT INTO transacoes (usuario_id, perfil_id, tipo, categoria, subcategoria, descricao, valor, data, pago, tags, anexo_caminho,
+					recorrente, recorrente_id)
+				VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+				""",
+				(
+					(
+						int(target_user_id),
+						new_profile_id,
+						str(row.get("tipo")),
+						str(row.get("categoria")),
+						row.get("subcategoria"),
+						row.get("descricao"),
+						float(row.get("valor") or 0.0),
+						str(row.get("data")),
+						1 if bool(row.get("pago", True)) else 0,
+						row.get("tags"),
+						row.get("anexo_caminho"),
+						1 if row.get("recorrente") else 0,
+						row.get("recorrente_id"),
+					)
+					for row in transactions
+				),
+				state,
+			)
+
+			# Cofrinhos
+			_insert_rows(
+				conn,
 				"""
 				INSERT INTO cofrinhos (usuario_id, perfil_id, nome, instituicao, percent_cdi, cdi_aa, principal, aporte_mensal, data_inicio, aplicar_impostos)
 				VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
 				""",
 				(
-					int(target_user_id),
-					int(new_profile_id),
-					str(row.get("nome")),
-					str(row.get("instituicao")),
-					float(row.get("percent_cdi") or 0.0),
-					float(row.get("cdi_aa") or 0.0),
-					float(row.get("principal") or 0.0),
-					float(row.get("aporte_mensal") or 0.0),
-					str(row.get("data_inicio")),
-					1 if bool(row.get("aplicar_impostos", False)) else 0,
+					(
+						int(target_user_id),
+						new_profile_id,
+						str(row.get("nome")),
+						str(row.get("instituicao")),
+						float(row.get("percent_cdi") or 0.0),
+						float(row.get("cdi_aa") or 0.0),
+						float(row.get("principal") or 0.0),
+						float(row.get("aporte_mensal") or 0.0),
+						str(row.get("data_inicio")),
+						1 if bool(row.get("aplicar_impostos", False)) else 0,
+					)
+					for row in piggies
 				),
+				state,
 			)
 
-		# Orçamentos
-		for row in budgets:
-			conn.execute(
+			# Orçamentos
+			_insert_rows(
+				conn,
 				"""
 				INSERT INTO orcamentos (usuario_id, perfil_id, categoria, limite_mensal, mes, ano, ativo, descricao)
 				VALUES (?, ?, ?, ?, ?, ?, ?, ?)
 				""",
 				(
-					int(target_user_id),
-					int(new_profile_id),
-					str(row.get("categoria")),
-					float(row.get("limite_mensal") or 0.0),
-					int(row.get("mes") or 1),
-					int(row.get("ano") or datetime.now().year),
-					1 if bool(row.get("ativo", True)) else 0,
-					row.get("descricao"),
+					(
+						int(target_user_id),
+						new_profile_id,
+						str(row.get("categoria")),
+						float(row.get("limite_mensal") or 0.0),
+						int(row.get("mes") or 1),
+						int(row.get("ano") or datetime.now().year),
+						1 if bool(row.get("ativo", True)) else 0,
+						row.get("descricao"),
+					)
+					for row in budgets
 				),
+				state,
 			)
 
-		# Metas
-		for row in goals:
-			conn.execute(
+			# Metas
+			_insert_rows(
+				conn,
 				"""
 				INSERT INTO metas_financeiras (usuario_id, perfil_id, nome, valor_alvo, valor_atual, data_inicio, data_alvo, ativo, descricao, prioridade)
 				VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
 				""",
 				(
-					int(target_user_id),
-					int(new_profile_id),
-					str(row.get("nome")),
-					float(row.get("valor_alvo") or 0.0),
-					float(row.get("valor_atual") or 0.0),
-					str(row.get("data_inicio")),
-					str(row.get("data_alvo")),
-					1 if bool(row.get("ativo", True)) else 0,
-					row.get("descricao"),
-					str(row.get("prioridade") or "media"),
+					(
+						int(target_user_id),
+						new_profile_id,
+						str(row.get("nome")),
+						float(row.get("valor_alvo") or 0.0),
+						float(row.get("valor_atual") or 0.0),
+						str(row.get("data_inicio")),
+						str(row.get("data_alvo")),
+						1 if bool(row.get("ativo", True)) else 0,
+						row.get("descricao"),
+						str(row.get("prioridade") or "media"),
+					)
+					for row in goals
 				),
+				state,
+			)
+
+			# Recorrências
+			rec_cols = PROFILE_TABLES["recorrencias"]
+			_insert_rows(
+				conn,
+				f"""
+				INSERT INTO recorrencias (usuario_id, perfil_id, {", ".join(rec_cols)})
+				VALUES (?, ?, {", ".join("COALESCE(?, CURRENT_TIMESTAMP)" if c == "data_criacao" else "?" for c in rec_cols)})
+				""",
+				((int(target_user_id), new_profile_id, *(row.get(c) for c in rec_cols)) for row in recurrences),
+				state,
+			)
+
+			# Ids do backup -> registros inseridos acima: recorrente_id e aportes das metas
+			for table, rows in sections.items():
+				_load_temp_rows(conn, "_restore_ids", ("old_id",), ({"old_id": row.get("id")} for row in rows))
+				map_copied_ids(conn, table, after_ids[table], "SELECT old_id, rowid AS pos FROM temp._restore_ids")
+			remap_profile_links(conn)
+			if contributions:
+				_load_temp_rows(conn, "_restore_aportes", ("id",) + GOAL_CONTRIBUTION_COLUMNS, contributions)
+				copy_goal_contributions(conn, "SELECT * FROM temp._restore_aportes")
+				state.advance(len(contributions))
+
+			conn.commit()
+		except Exception:
+			conn.rollback()
+			raise
+		finally:
+			for name in ("_restore_ids", "_restore_aportes", "profile_id_map"):
+				conn.execute(f"DROP TABLE IF EXISTS temp.{name}")
+
+	return new_profile_id
+
+
+def _backup_filename(db: DbManager, user_id: int, profile_id: int, ext: str) -> str:
+	user = db.get_user(user_id)
+	profile = db.get_financial_profile(profile_id)
+	username = ((user.nome if user else None) or f"user{user_id}").replace(" ", "_")
+	pname = ((profile.nome if profile else None) or f"profile{profile_id}").replace(" ", "_")
+	ts = datetime.now().strftime("%Y%m%d-%H%M%S")
+	return f"backup_{username}_{pname}_{ts}.{ext}"
+
+
+def export_profile_sqlite(
+	db: DbManager,
+	backup_dir: Path,
+	user_id: int,
+	profile_id: int,
+	filename: Optional[str] = None,
+	progress: Optional[ProgressCallback] = None,
+) -> Path:
+	"""
+	Exporta o perfil para um arquivo SQLite independente (ATTACH + CREATE TABLE ... AS SELECT).
+	A cópia é feita inteiramente dentro do SQLite, sem passar os registros pelo Python,
+	e o arquivo gerado pode ser consultado diretamente. O progresso é reportado por tabela;
+	se cancelado, o arquivo parcial é removido.
+	"""
+	backup_dir.mkdir(parents=True, exist_ok=True)
+
+	if not db.get_user(user_id) or not db.get_financial_profile(profile_id):
+		raise ValueError("Usuário ou perfil inválido para backup")
+
+	out_path = backup_dir / (filename or _backup_filename(db, user_id, profile_id, "db"))
+	if out_path.exists():
+		out_path.unlink()
+
+	completed = False
+	with db._connect() as conn:
+		counts = _count_profile_rows(conn, user_id, profile_id)
+		state = _Progress(progress, sum(counts.values()))
+		conn.execute("ATTACH DATABASE ? AS bk", (str(out_path),))
+		try:
+			conn.execute("CREATE TABLE bk.backup_info (chave TEXT PRIMARY KEY, valor TEXT)")
+			conn.executemany(
+				"INSERT INTO bk.backup_info (chave, valor) VALUES (?, ?)",
+				[
+					("format", SQLITE_BACKUP_FORMAT),
+					("version", str(BACKUP_VERSION)),
+					("exported_at", _iso_now()),
+				],
+			)
+			conn.execute(
+				"CREATE TABLE bk.usuario AS SELECT id, nome, email FROM main.usuarios WHERE id = ?",
+				(int(user_id),),
 			)
+			conn.execute(
+				"""
+				CREATE TABLE bk.perfil AS
+				SELECT id, usuario_id, nome, descricao, moeda, cdi_aa_padrao, ir_automatico, iof_automatico, ano_fiscal, data_criacao, ativo
+				FROM main.perfis_financeiros WHERE id = ? AND usuario_id = ?
+				""",
+				(int(profile_id), int(user_id)),
+			)
+			for table, cols in PROFILE_TABLES.items():
+				conn.execute(
+					f"""
+					CREATE TABLE bk.{table} AS
+					SELECT id, {", ".join(cols)} FROM main.{table}
+					WHERE usuario_id = ? AND perfil_id = ?
+					ORDER BY id
+					""",
+					(int(user_id), int(profile_id)),
+				)
+				state.advance(counts[table])
+			conn.execute(f"CREATE TABLE bk.aportes_meta AS {_GOAL_CONTRIBUTIONS_SQL}", (int(user_id), int(profile_id)))
+			state.advance(counts["aportes_meta"])
+			conn.execute("CREATE INDEX bk.idx_transacoes_data ON transacoes(data)")
+			conn.commit()
+			completed = True
+		finally:
+			if not completed:
+				conn.rollback()
+			conn.execute("DETACH DATABASE bk")
+			if not completed:
+				out_path.unlink(missing_ok=True)
+	return out_path
+
+
+def _check_attached_backup(conn: sqlite3.Connection) -> None:
+	try:
+		info = {
+			str(r["chave"]): str(r["valor"])
+			for r in conn.execute("SELECT chave, valor FROM bk.backup_info").fetchall()
+		}
+	except sqlite3.DatabaseError:
+		raise ValueError("Arquivo de backup inválido")
+	if info.get("format") != SQLITE_BACKUP_FORMAT:
+		raise ValueError("Arquivo de backup inválido")
+	if int(info.get("version") or 0) not in READABLE_BACKUP_VERSIONS:
+		raise ValueError("Versão de backup incompatível")
+
+
+def _backup_tables(conn: sqlite3.Connection) -> List[str]:
+	"""Tabelas de dados presentes no backup anexado (recorrencias e aportes_meta só nos mais recentes)."""
+	present = {str(r[0]) for r in conn.execute("SELECT name FROM bk.sqlite_master WHERE type = 'table'")}
+	return [t for t in (*PROFILE_TABLES, "aportes_meta") if t in present]
+
+
+def restore_profile_sqlite(
+	db: DbManager,
+	backup_file: Path,
+	target_user_id: int,
+	new_profile_name_suffix: Optional[str] = None,
+	progress: Optional[ProgressCallback] = None,
+) -> int:
+	"""
+	Restaura um backup SQLite (ver export_profile_sqlite) criando um novo perfil para o
+	usuário-alvo. Os registros são copiados com INSERT ... SELECT, remapeando
+	usuario_id/perfil_id no próprio SQL, em uma única transação. Retorna o novo profile_id.
+	O progresso é reportado por tabela; cancelar desfaz toda a restauração.
+	"""
+	if not backup_file.exists():
+		raise FileNotFoundError(str(backup_file))
+
+	_require_valid_backup(backup_file)
+	with db._connect() as conn:
+		conn.execute("ATTACH DATABASE ? AS bk", (str(backup_file),))
+		try:
+			_check_attached_backup(conn)
+			total = sum(int(conn.execute(f"SELECT COUNT(*) FROM bk.{t}").fetchone()[0]) for t in _backup_tables(conn))
+			state = _Progress(progress, total)
+
+			row = conn.execute("SELECT COALESCE(nome, 'Perfil Restaurado') FROM bk.perfil LIMIT 1").fetchone()
+			if row is None:
+				raise ValueError("Arquivo de backup inválido")
+			new_name = _free_profile_name(conn, target_user_id, str(row[0]), new_profile_name_suffix or "(Restaurado)")
+
+			start_id_map(conn)
+			try:
+				cur = conn.execute(
+					"""
+					INSERT INTO main.perfis_financeiros
+					(usuario_id, nome, descricao, moeda, cdi_aa_padrao, ir_automatico, iof_automatico, ano_fiscal, ativo)
+					SELECT ?, ?, descricao, COALESCE(moeda, 'BRL'),
+						COALESCE(cdi_aa_padrao, 10.0), ir_automatico, iof_automatico, ano_fiscal, 1
+					FROM bk.perfil LIMIT 1
+					""",
+					(int(target_user_id), new_name),
+				)
+				if cur.rowcount != 1:
+					raise ValueError("Arquivo de backup inválido")
+				new_profile_id = int(cur.lastrowid)
+
+				present = _backup_tables(conn)
+				for table, cols in PROFILE_TABLES.items():
+					if table not in present:
+						continue
+					col_list = ", ".join(cols)
+					after_id = max_table_id(conn, table)
+					cur = conn.execute(
+						f"""
+						INSERT INTO main.{table} (usuario_id, perfil_id, {col_list})
+						SELECT ?, ?, {col_list} FROM bk.{table} ORDER BY id
+						""",
+						(int(target_user_id), new_profile_id),
+					)
+					state.advance(cur.rowcount)
+					if table in ID_MAPPED_TABLES:
+						map_copied_ids(conn, table, after_id, f"SELECT id AS old_id, id AS pos FROM bk.{table}")
+				remap_profile_links(conn)
+				if "aportes_meta" in present:
+					state.advance(copy_goal_contributions(conn, "SELECT * FROM bk.aportes_meta"))
+				conn.commit()
+			except Exception:
+				conn.rollback()
+				raise
+		finally:
+			conn.execute("DROP TABLE IF EXISTS temp.profile_id_map")
+			conn.execute("DETACH DATABASE bk")
+
+	return new_profile_id
+
+
+# Chave natural (expressões SQL) usada para detectar duplicatas na restauração com mesclagem
+MERGE_KEYS: Dict[str, Tuple[str, ...]] = {
+	"transacoes": ("date(data)", "round(valor, 2)", "tipo", "categoria", "COALESCE(descricao, '')"),
+	"cofrinhos": ("nome", "instituicao", "date(data_inicio)"),
+	"orcamentos": ("categoria", "mes", "ano"),
+	"metas_financeiras": ("nome", "date(data_alvo)"),
+	"recorrencias": ("tipo", "categoria", "COALESCE(descricao, '')", "round(valor, 2)", "frequencia", "date(data_inicio)"),
+}
+
+# Colunas comparadas quando a chave coincide: se alguma diferir, o registro é um conflito
+MERGE_COMPARE: Dict[str, Tuple[str, ...]] = {
+	"transacoes": ("subcategoria", "pago", "notas", "tags", "anexo_caminho"),
+	"cofrinhos": ("percent_cdi", "cdi_aa", "principal", "aporte_mensal", "aplicar_impostos"),
+	"orcamentos": ("limite_mensal", "ativo", "descricao"),
+	"metas_financeiras": ("valor_alvo", "valor_atual", "data_inicio", "ativo", "descricao", "prioridade"),
+	"recorrencias": ("intervalo", "dia", "data_fim", "ocorrencias", "valor_ultima", "tags", "ativo", "gerado_ate"),
+}
+
+_JSON_SECTIONS = {
+	"transacoes": "transactions",
+	"cofrinhos": "piggy_banks",
+	"orcamentos": "budgets",
+	"metas_financeiras": "goals",
+	"recorrencias": "recurrences",
+}
+
+# Valores padrão para colunas ausentes no backup JSON
+_MERGE_DEFAULTS: Dict[str, Any] = {
+	"recorrente": 0,
+	"frequencia": "mensal",
+	"intervalo": 1,
+	"pago": 1,
+	"ativo": 1,
+	"aplicar_impostos": 0,
+	"aporte_mensal": 0.0,
+	"valor_atual": 0.0,
+	"prioridade": "media",
+}
+
+_TIMESTAMP_COLUMNS = ("data_registro", "created_at", "data_criacao")
+
+
+def merge_restore_profile(
+	db: DbManager,
+	backup_file: Path,
+	target_user_id: int,
+	target_profile_id: int,
+	progress: Optional[ProgressCallback] = None,
+) -> Dict[str, Dict[str, int]]:
+	"""
+	Restaura um backup (JSON ou SQLite) dentro de um perfil existente, sem duplicar registros.
+
+	Os registros do backup são carregados em tabelas temporárias indexadas pela chave natural
+	(MERGE_KEYS) e cruzados em lote com o perfil de destino; cada ocorrência repetida da
+	mesma chave é numerada, então N compras iguais no mesmo dia casam com N registros.
+	Retorna, por tabela, as contagens de inseridos, ignorados (iguais) e conflitantes
+	(mesma chave, demais campos diferentes; não são alterados). Os aportes das metas são
+	traduzidos para as metas, transações e cofrinhos correspondentes no destino e só entram
+	os que ainda não existem nele (aportes_meta nas contagens). O progresso é reportado
+	por tabela; cancelar desfaz toda a mesclagem.
+	"""
+	if not backup_file.exists():
+		raise FileNotFoundError(str(backup_file))
+
+	is_sqlite = backup_file.suffix.lower() == ".db"
+	if is_sqlite:
+		_require_valid_backup(backup_file)
+	payload = None if is_sqlite else _read_backup_json(backup_file)
+
+	result: Dict[str, Dict[str, int]] = {}
+	with db._connect() as conn:
+		owner = conn.execute(
+			"SELECT 1 FROM perfis_financeiros WHERE id = ? AND usuario_id = ?",
+			(int(target_profile_id), int(target_user_id)),
+		).fetchone()
+		if not owner:
+			raise ValueError("Perfil de destino inválido")
+
+		if is_sqlite:
+			conn.execute("ATTACH DATABASE ? AS bk", (str(backup_file),))
+		try:
+			if is_sqlite:
+				_check_attached_backup(conn)
+				total = sum(int(conn.execute(f"SELECT COUNT(*) FROM bk.{t}").fetchone()[0]) for t in _backup_tables(conn))
+			else:
+				total = sum(len(payload.get(section) or []) for section in _JSON_SECTIONS.values())
+				total += len(payload.get("goal_contributions") or [])
+			state = _Progress(progress, total)
+			start_id_map(conn)
+			try:
+				present = _backup_tables(conn) if is_sqlite else list(PROFILE_TABLES)
+				for table, cols in PROFILE_TABLES.items():
+					if payload is not None:
+						rows = list(payload.get(_JSON_SECTIONS[table]) or [])
+					else:
+						# backups antigos sem a tabela: nada a mesclar nela
+						rows = None if table in present else []
+					counts = _merge_table(conn, table, cols, rows, int(target_user_id), int(target_profile_id))
+					result[table] = counts
+					state.advance(sum(counts.values()))
+				# transações inseridas apontam para as regras correspondentes no destino
+				remap_profile_links(conn)
+
+				# Aportes: os das metas novas entram todos; nas metas já existentes, só os que faltam
+				if is_sqlite:
+					source = "SELECT * FROM bk.aportes_meta" if "aportes_meta" in present else None
+				else:
+					contributions = list(payload.get("goal_contributions") or [])
+					_load_temp_rows(conn, "_merge_aportes", ("id",) + GOAL_CONTRIBUTION_COLUMNS, contributions)
+					source = "SELECT * FROM temp._merge_aportes"
+				if source is not None:
+					offered = int(conn.execute(f"SELECT COUNT(*) FROM ({source})").fetchone()[0])
+					inserted = copy_goal_contributions(conn, source, skip_existing=True)
+					result["aportes_meta"] = {"inseridos": inserted, "ignorados": offered - inserted, "conflitantes": 0}
+					state.advance(offered)
+				conn.commit()
+			except Exception:
+				conn.rollback()
+				raise
+		finally:
+			for name in ("_merge_src_raw", "_merge_src", "_merge_dst", "_merge_match", "_merge_aportes", "profile_id_map"):
+				conn.execute(f"DROP TABLE IF EXISTS temp.{name}")
+			if is_sqlite:
+				conn.execute("DETACH DATABASE bk")
+	return result
+
+
+def _merge_table(
+	conn: sqlite3.Connection,
+	table: str,
+	cols: Tuple[str, ...],
+	json_rows: Optional[List[Dict[str, Any]]],
+	user_id: int,
+	profile_id: int,
+) -> Dict[str, int]:
+	col_list = ", ".join(cols)
+	keys = MERGE_KEYS[table]
+	key_cols = ", ".join(f"k{i}" for i in range(len(keys)))
+	key_select = ", ".join(f"{expr} AS k{i}" for i, expr in enumerate(keys))
+	key_join = " AND ".join(f"s.k{i} IS d.k{i}" for i in range(len(keys)))
+
+	for name in ("_merge_src_raw", "_merge_src", "_merge_dst", "_merge_match"):
+		conn.execute(f"DROP TABLE IF EXISTS temp.{name}")
+
+	# 1) Registros do backup, na ordem original (src_id: id no perfil de origem)
+	conn.execute(f"CREATE TEMP TABLE _merge_src_raw (src_id, {col_list})")
+	if json_rows is None:
+		conn.execute(f"INSERT INTO temp._merge_src_raw (src_id, {col_list}) SELECT id, {col_list} FROM bk.{table} ORDER BY id")
+	else:
+		conn.executemany(
+			f"INSERT INTO temp._merge_src_raw (src_id, {col_list}) VALUES (?, {', '.join('?' for _ in cols)})",
+			([row.get("id")] + [row.get(c, _MERGE_DEFAULTS.get(c)) for c in cols] for row in json_rows),
+		)
+
+	# 2) Chaves numeradas (ordinal por chave) dos dois lados, indexadas para o cruzamento
+	conn.execute(
+		f"""
+		CREATE TEMP TABLE _merge_src AS
+		SELECT rowid AS src_rowid, {key_select},
+			row_number() OVER (PARTITION BY {", ".join(keys)} ORDER BY rowid) AS ord
+		FROM temp._merge_src_raw
+		"""
+	)
+	conn.execute(
+		f"""
+		CREATE TEMP TABLE _merge_dst AS
+		SELECT id AS dst_id, {key_select},
+			row_number() OVER (PARTITION BY {", ".join(keys)} ORDER BY id) AS ord
+		FROM main.{table} WHERE usuario_id = ? AND perfil_id = ?
+		""",
+		(user_id, profile_id),
+	)
+	conn.execute(f"CREATE INDEX temp.idx_merge_dst ON _merge_dst ({key_cols}, ord)")
+
+	conn.execute(
+		f"""
+		CREATE TEMP TABLE _merge_match AS
+		SELECT s.src_rowid, d.dst_id
+		FROM temp._merge_src s
+		LEFT JOIN temp._merge_dst d ON {key_join} AND s.ord = d.ord
+		"""
+	)
+
+	# 3) Classificação dos pares encontrados
+	compare = MERGE_COMPARE[table]
+	differs = " OR ".join(f"r.{c} IS NOT t.{c}" for c in compare)
+	row = conn.execute(
+		f"""
+		SELECT
+			COUNT(m.dst_id) AS matched,
+			COALESCE(SUM(CASE WHEN m.dst_id IS NOT NULL AND ({differs}) THEN 1 ELSE 0 END), 0) AS conflicting
+		FROM temp._merge_match m
+		JOIN temp._merge_src_raw r ON r.rowid = m.src_rowid
+		LEFT JOIN main.{table} t ON t.id = m.dst_id
+		"""
+	).fetchone()
+	matched = int(row["matched"])
+	conflicting = int(row["conflicting"])
+
+	# 4) Inserção em lote dos registros sem correspondência
+	insert_cols = ", ".join(
+		f"COALESCE({c}, CURRENT_TIMESTAMP)" if c in _TIMESTAMP_COLUMNS else c for c in cols
+	)
+	after_id = max_table_id(conn, table)
+	cur = conn.execute(
+		f"""
+		INSERT INTO main.{table} (usuario_id, perfil_id, {col_list})
+		SELECT ?, ?, {insert_cols}
+		FROM temp._merge_src_raw
+		WHERE rowid IN (SELECT src_rowid FROM temp._merge_match WHERE dst_id IS NULL)
+		ORDER BY rowid
+		""",
+		(user_id, profile_id),
+	)
+
+	# 5) Ids de origem -> destino: o registro correspondente (não inserido) ou o recém-inserido
+	if table in ID_MAPPED_TABLES:
+		conn.execute(
+			"""
+			INSERT INTO temp.profile_id_map (tabela, old_id, new_id, inserido)
+			SELECT ?, r.src_id, m.dst_id, 0
+			FROM temp._merge_match m JOIN temp._merge_src_raw r ON r.rowid = m.src_rowid
+			WHERE m.dst_id IS NOT NULL AND r.src_id IS NOT NULL
+			""",
+			(table,),
+		)
+		map_copied_ids(
+			conn,
+			table,
+			after_id,
+			"""
+			SELECT src_id AS old_id, rowid AS pos FROM temp._merge_src_raw
+			WHERE rowid IN (SELECT src_rowid FROM temp._merge_match WHERE dst_id IS NULL)
+			""",
+		)
+	return {
+		"inseridos": int(cur.rowcount),
+		"ignorados": matched - conflicting,
+		"conflitantes": conflicting,
+	}
+
+
+def _export_batch_item(backup_dir: str, user_id: int, profile_id: int) -> Dict[str, Any]:
+	entry: Dict[str, Any] = {"user_id": int(user_id), "profile_id": int(profile_id)}
+	started = time.perf_counter()
+	try:
+		out = export_profile(batch_db(), Path(backup_dir), int(user_id), int(profile_id))
+		header = read_backup_header(out) or {}
+		entry.update(status="ok", file=out.name, bytes=out.stat().st_size, sha256=header.get("sha256"))
+	except Exception as e:
+		entry.update(status="erro", error=str(e))
+	entry["seconds"] = round(time.perf_counter() - started, 3)
+	return entry
+
+
+def export_all_profiles(
+	db_path: Path,
+	backup_dir: Path,
+	max_workers: Optional[int] = None,
+) -> Path:
+	"""
+	Exporta (JSON) todos os perfis de todos os usuários, cada um em um processo do pool,
+	com conexões somente leitura. Os arquivos vão para uma subpasta lote_<timestamp> de
+	backup_dir junto com um manifest.json único. Retorna o caminho do manifesto.
+	Deve ser chamado sob `if __name__ == "__main__"` (Windows usa spawn).
+	"""
+	started = time.perf_counter()
+	out_dir = backup_dir / f"lote_{datetime.now().strftime('%Y%m%d-%H%M%S')}"
+	out_dir.mkdir(parents=True, exist_ok=True)
+
+	db = DbManager(db_path, read_only=True)
+	with db._connect() as conn:
+		targets = [
+			dict(r)
+			for r in conn.execute(
+				"""
+				SELECT u.id AS user_id, u.nome AS usuario, p.id AS profile_id, p.nome AS perfil
+				FROM perfis_financeiros p JOIN usuarios u ON u.id = p.usuario_id
+				ORDER BY u.id, p.id
+				"""
+			).fetchall()
+		]
+
+	entries: List[Dict[str, Any]] = []
+	with ProcessPoolExecutor(
+		max_workers=max_workers,
+		initializer=init_batch_worker,
+		initargs=(str(db_path),),
+	) as pool:
+		futures = {
+			pool.submit(_export_batch_item, str(out_dir), t["user_id"], t["profile_id"]): t
+			for t in targets
+		}
+		for fut in as_completed(futures):
+			entries.append({**futures[fut], **fut.result()})
+
+	entries.sort(key=lambda e: (e["user_id"], e["profile_id"]))
+	manifest = {
+		"version": BACKUP_VERSION,
+		"exported_at": _iso_now(),
+		"seconds": round(time.perf_counter() - started, 3),
+		"profiles": entries,
+	}
+	manifest_path = out_dir / "manifest.json"
+	with manifest_path.open("w", encoding="utf-8") as f:
+		json.dump(manifest, f, ensure_ascii=False, indent=2)
+	return manifest_path
+
 
-		conn.commit()
+if __name__ == "__main__":
+	# Backup de todos os perfis (ex.: tarefa agendada): python -m utils.backup
+	from config import ensure_dirs, get_paths
 
-	return int(new_profile_id)
+	paths = get_paths()
+	ensure_dirs(paths)
+	print(export_all_profiles(paths.db_path, paths.backup_dir))
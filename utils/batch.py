@@ -0,0 +1,39 @@
+"""Estado de cada processo dos lotes em ProcessPoolExecutor (backups e relatórios)"""
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from database.db_manager import DbManager
+
+
+# Preenchido por init_batch_worker em cada processo do pool
+_STATE: Dict[str, Any] = {}
+
+
+def init_batch_worker(db_path: str, exports_dir: Optional[str] = None, use_cache: bool = False) -> None:
+	"""
+	Initializer do pool: conexão somente leitura com o banco e, nos lotes de relatórios
+	(exports_dir informado), o índice de cache e a pasta de gráficos. O índice é uma cópia
+	só para consulta; o processo principal grava os novos digests no fim.
+	"""
+	_STATE.clear()
+	_STATE["db"] = DbManager(Path(db_path), read_only=True)
+	if exports_dir is not None:
+		from utils.report_cache import ReportIndex
+		from utils.report_charts import chart_cache_dir
+
+		_STATE["index"] = ReportIndex(Path(exports_dir)) if use_cache else None
+		_STATE["charts"] = chart_cache_dir(Path(exports_dir))
+
+
+def batch_db() -> DbManager:
+	return _STATE["db"]
+
+
+def batch_report_index():
+	return _STATE.get("index")
+
+
+def batch_chart_dir() -> Optional[Path]:
+	return _STATE.get("charts")
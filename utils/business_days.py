@@ -0,0 +1,66 @@
+"""Calendário de dias úteis (feriados nacionais do Brasil) para cálculos na base 252"""
+from __future__ import annotations
+
+from datetime import date, timedelta
+from functools import lru_cache
+from typing import List
+
+import numpy as np
+
+
+# Faixa pré-calculada do calendário; datas fora dela contam só fins de semana
+CALENDAR_FIRST_YEAR = 1990
+CALENDAR_LAST_YEAR = 2100
+
+_FIXED_HOLIDAYS = [(1, 1), (4, 21), (5, 1), (9, 7), (10, 12), (11, 2), (11, 15), (12, 25)]
+
+
+def easter(year: int) -> date:
+	"""Domingo de Páscoa (algoritmo gregoriano anônimo)."""
+	a = year % 19
+	b, c = divmod(year, 100)
+	d, e = divmod(b, 4)
+	f = (b + 8) // 25
+	g = (b - f + 1) // 3
+	h = (19 * a + b - d - g + 15) % 30
+	i, k = divmod(c, 4)
+	l = (32 + 2 * e + 2 * i - h - k) % 7
+	m = (a + 11 * h + 22 * l) // 451
+	month, day = divmod(h + l - 7 * m + 114, 31)
+	return date(year, month, day + 1)
+
+
+def national_holidays(year: int) -> List[date]:
+	"""Feriados nacionais e bancários de um ano (carnaval, Sexta-feira Santa e Corpus Christi incluídos)."""
+	days = [date(year, m, d) for m, d in _FIXED_HOLIDAYS]
+	if year >= 2024:
+		days.append(date(year, 11, 20))  # Consciência Negra (Lei 14.759/2023)
+	p = easter(year)
+	days += [p - timedelta(days=48), p - timedelta(days=47), p - timedelta(days=2), p + timedelta(days=60)]
+	return sorted(days)
+
+
+@lru_cache(maxsize=None)
+def holiday_array() -> np.ndarray:
+	"""Todos os feriados de CALENDAR_FIRST_YEAR a CALENDAR_LAST_YEAR (datetime64[D], ordenado)."""
+	days = [d for y in range(CALENDAR_FIRST_YEAR, CALENDAR_LAST_YEAR + 1) for d in national_holidays(y)]
+	return np.array(days, dtype="datetime64[D]")
+
+
+@lru_cache(maxsize=None)
+def business_calendar() -> np.busdaycalendar:
+	"""Calendário de dias úteis (segunda a sexta, sem feriados) para np.busday_count e afins."""
+	return np.busdaycalendar(weekmask="1111100", holidays=holiday_array())
+
+
+def business_days_between(start, end) -> np.ndarray:
+	"""Dias úteis em [start, end) — aceita datas ou arrays (datetime64[D]), com broadcasting."""
+	return np.busday_count(
+		np.asarray(start, dtype="datetime64[D]"),
+		np.asarray(end, dtype="datetime64[D]"),
+		busdaycal=business_calendar(),
+	)
+
+
+def is_business_day(days) -> np.ndarray:
+	return np.is_busday(np.asarray(days, dtype="datetime64[D]"), busdaycal=business_calendar())
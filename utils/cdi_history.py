@@ -0,0 +1,185 @@
+"""CDI histórico: importação de CSV (sem rede) e fatores acumulados em memória"""
+from __future__ import annotations
+
+import csv
+import re
+from datetime import date
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from database.db_manager import DbManager
+from utils.business_days import is_business_day
+from utils.investments import add_months, net_of_taxes
+
+
+# unidade da taxa no CSV: % ao ano (base 252), % ao dia útil ou % ao mês
+CDI_UNITS = ("aa", "ad", "am")
+
+_DAY_RE = re.compile(r"^(\d{1,2})/(\d{1,2})/(\d{4})$")
+_MONTH_RE = re.compile(r"^(?:(\d{1,2})/(\d{4})|(\d{4})-(\d{1,2}))$")
+
+
+def _parse_number(text: str) -> float:
+	text = text.strip().replace("%", "")
+	if "," in text:
+		text = text.replace(".", "").replace(",", ".")
+	return float(text)
+
+
+def _parse_period(text: str) -> Tuple[date, bool]:
+	"""(data, é_mensal): aceita AAAA-MM-DD, DD/MM/AAAA, MM/AAAA e AAAA-MM."""
+	text = text.strip()
+	m = _DAY_RE.match(text)
+	if m:
+		return date(int(m.group(3)), int(m.group(2)), int(m.group(1))), False
+	m = _MONTH_RE.match(text)
+	if m:
+		if m.group(1):
+			return date(int(m.group(2)), int(m.group(1)), 1), True
+		return date(int(m.group(3)), int(m.group(4)), 1), True
+	return date.fromisoformat(text), False
+
+
+def _annual_from(rate: float, unit: str, business_days: int = 1) -> float:
+	"""Converte a taxa (%) da unidade do arquivo para % a.a. base 252."""
+	if unit == "aa":
+		return rate
+	if unit == "ad":
+		daily = 1.0 + rate / 100.0
+	else:
+		daily = (1.0 + rate / 100.0) ** (1.0 / max(1, business_days))
+	return (daily ** 252 - 1.0) * 100.0
+
+
+def read_cdi_csv(path: Path, unit: str = "ad") -> List[Tuple[date, float]]:
+	"""
+	Lê um CSV de CDI com colunas data e taxa (separador ';' ou ',', vírgula decimal aceita,
+	linhas que não começam com data são ignoradas, como cabeçalhos e rodapés do SGS do
+	Banco Central). Linhas mensais (MM/AAAA ou AAAA-MM) viram uma taxa para cada dia útil
+	do mês, equivalente à taxa do mês. Retorna (dia útil, taxa % a.a.) em ordem de data.
+	"""
+	if unit not in CDI_UNITS:
+		raise ValueError(f"Unidade de taxa não suportada: {unit}")
+	out: Dict[date, float] = {}
+	with Path(path).open("r", encoding="utf-8-sig", newline="") as f:
+		sample = f.read(4096)
+		f.seek(0)
+		delimiter = ";" if sample.count(";") >= sample.count("\n") else ","
+		for row in csv.reader(f, delimiter=delimiter):
+			if len(row) < 2 or not row[0].strip():
+				continue
+			try:
+				day, monthly = _parse_period(row[0])
+				rate = _parse_number(row[1])
+			except ValueError:
+				continue
+			if not monthly:
+				out[day] = _annual_from(rate, unit)
+				continue
+			first = np.datetime64(day, "D")
+			days = np.arange(first, add_months(first, 1))
+			days = days[is_business_day(days)]
+			annual = _annual_from(rate, unit, business_days=len(days))
+			for d in days.astype(object).tolist():
+				out[d] = annual
+	return sorted(out.items())
+
+
+def import_cdi_csv(db: DbManager, path: Path, unit: str = "ad") -> int:
+	rows = read_cdi_csv(path, unit)
+	if not rows:
+		raise ValueError("Nenhuma taxa encontrada no arquivo")
+	return db.import_cdi_rates(rows, fonte=Path(path).name)
+
+
+class CdiHistory:
+	"""
+	Taxas de taxas_cdi carregadas uma vez, com o fator acumulado do CDI por dia útil.
+	O fator de a até b (CDI de cada dia útil em [a, b)) é a razão de dois acumulados, e a
+	posição de cada dia corrido é pré-calculada: cada consulta é O(1).
+	"""
+
+	def __init__(self, dates: np.ndarray, annual_rates: np.ndarray):
+		self.dates = np.asarray(dates, dtype="datetime64[D]")
+		self.daily = (1.0 + np.asarray(annual_rates, dtype=float) / 100.0) ** (1.0 / 252.0) - 1.0
+		self._cumulative: Dict[float, np.ndarray] = {}
+		if self.dates.size:
+			self.first = self.dates[0]
+			self.last = self.dates[-1]
+			# posição (nº de taxas anteriores) de cada dia corrido de first a last + 1
+			self._pos = np.searchsorted(self.dates, np.arange(self.first, self.last + 2))
+		else:
+			self._pos = np.zeros(0, dtype=np.int64)
+
+	@classmethod
+	def load(cls, db: DbManager) -> "CdiHistory":
+		rows = db.list_cdi_rates()
+		return cls(np.array([r[0] for r in rows], dtype="datetime64[D]"), np.array([r[1] for r in rows], dtype=float))
+
+	def __bool__(self) -> bool:
+		return bool(self.dates.size)
+
+	@property
+	def covered_until(self) -> Optional[date]:
+		"""Último dia com fator conhecido (o dia seguinte à última taxa)."""
+		return (self.last + 1).astype(object) if self else None
+
+	def cumulative(self, percent_cdi: float = 100.0) -> np.ndarray:
+		"""Fator acumulado com percent_cdi do CDI (cum[0] = 1); calculado uma vez por percentual."""
+		key = round(float(percent_cdi), 6)
+		cum = self._cumulative.get(key)
+		if cum is None:
+			cum = np.concatenate([[1.0], np.cumprod(1.0 + self.daily * key / 100.0)])
+			self._cumulative[key] = cum
+		return cum
+
+	def positions(self, days) -> np.ndarray:
+		"""Índice em cumulative() de cada data, limitado ao período coberto."""
+		days = np.asarray(days, dtype="datetime64[D]")
+		offset = np.clip((days - self.first).astype(np.int64), 0, self._pos.size - 1)
+		return self._pos[offset]
+
+	def factor(self, start, end, percent_cdi: float = 100.0) -> np.ndarray:
+		"""Fator acumulado de start a end (aceita arrays): razão de dois acumulados."""
+		cum = self.cumulative(percent_cdi)
+		return cum[self.positions(end)] / cum[self.positions(start)]
+
+	def piggy_accrued(self, piggy: Dict[str, object], until: Optional[date] = None) -> Dict[str, object]:
+		"""
+		Valor efetivamente acumulado por um cofrinho (linha de list_piggy_banks) desde
+		data_inicio com o CDI histórico: valor inicial e cada aporte mensal (nas datas de
+		aniversário) rendem percent_cdi do CDI até until (padrão: hoje, limitado aos dados).
+		"""
+		if not self:
+			raise ValueError("Nenhuma taxa de CDI importada")
+		start = np.datetime64(date.fromisoformat(str(piggy.get("data_inicio"))), "D")
+		end = np.datetime64(until or date.today(), "D")
+		end = min(end, self.last + 1)
+		principal = float(piggy.get("principal") or 0.0)
+		aporte = float(piggy.get("aporte_mensal") or 0.0)
+		pct = float(piggy.get("percent_cdi") or 0.0)
+
+		n = max(0, int((end.astype("datetime64[M]") - start.astype("datetime64[M]")).astype(np.int64)) + 1)
+		deposits = add_months(start, np.arange(n))
+		deposits = deposits[deposits < end] if aporte > 0 else deposits[:0]
+
+		cum = self.cumulative(pct)
+		at_end = cum[self.positions(end)]
+		bruto = principal * at_end / cum[self.positions(start)] + float(np.sum(aporte * at_end / cum[self.positions(deposits)]))
+		total = principal + aporte * deposits.size
+		days = max(1, int((end - start).astype(np.int64)))
+		rendimento, iof, ir, liquido = net_of_taxes(
+			np.float64(bruto), np.float64(total), np.int64(days), bool(piggy.get("aplicar_impostos"))
+		)
+		return {
+			"ate": end.astype(object),
+			"coberto_desde": bool(start >= self.first),
+			"total_aportes": total,
+			"saldo_bruto": float(bruto),
+			"rendimento_bruto": float(rendimento),
+			"iof": float(iof),
+			"ir": float(ir),
+			"saldo_liquido": float(liquido),
+		}
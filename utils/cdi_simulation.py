@@ -0,0 +1,142 @@
+"""Simulação de Monte Carlo de trajetórias do CDI para projeções de cofrinhos"""
+from __future__ import annotations
+
+import math
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import date
+from typing import Optional, Tuple
+
+import numpy as np
+
+from utils.investments import add_months, net_of_taxes
+
+
+PERCENTILES = (5, 50, 95)
+# Trajetórias por bloco: cada bloco tem sua própria semente derivada, então o resultado
+# é o mesmo com qualquer número de processos
+CHUNK_PATHS = 2000
+
+
+@dataclass(frozen=True)
+class CdiModel:
+	"""
+	CDI anual (%) com reversão à média (Ornstein-Uhlenbeck discretizado por mês):
+	kappa é a velocidade de reversão (por ano), sigma a volatilidade anual em pontos
+	percentuais e theta a média de longo prazo (None = CDI atual do cofrinho).
+	"""
+
+	kappa: float = 0.5
+	sigma: float = 1.5
+	theta: Optional[float] = None
+	n_paths: int = 2000
+	seed: int = 42
+
+
+@dataclass(frozen=True)
+class SimulationBands:
+	"""Percentis (linhas, na ordem de PERCENTILES) por mês (colunas) de uma simulação."""
+
+	ref_date: np.ndarray  # datetime64[D]
+	months: np.ndarray
+	total_aportes: np.ndarray
+	cdi: np.ndarray
+	saldo_bruto: np.ndarray
+	saldo_liquido: np.ndarray
+	n_paths: int
+
+
+def _simulate_chunk(
+	seed: np.random.SeedSequence,
+	n_paths: int,
+	cdi_aa: float,
+	percent_cdi: float,
+	model: CdiModel,
+	principal: float,
+	aporte_mensal: float,
+	days: np.ndarray,
+	aplicar_impostos: bool,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+	"""(CDI, bruto, líquido) de n_paths trajetórias, cada um com formato (n_paths, meses)."""
+	horizon = days.shape[0]
+	rng = np.random.default_rng(seed)
+	shocks = rng.standard_normal((n_paths, horizon))
+
+	theta = cdi_aa if model.theta is None else float(model.theta)
+	dt = 1.0 / 12.0
+	decay = math.exp(-model.kappa * dt)
+	step_sd = model.sigma * (math.sqrt((1.0 - decay * decay) / (2.0 * model.kappa)) if model.kappa > 0 else math.sqrt(dt))
+
+	# CDI vigente em cada mês: o mês 1 usa o CDI atual, os seguintes evoluem pelo modelo
+	cdi = np.empty((n_paths, horizon))
+	level = np.full(n_paths, float(cdi_aa))
+	for m in range(horizon):
+		cdi[:, m] = level
+		level = theta + (level - theta) * decay + step_sd * shocks[:, m]
+	np.maximum(cdi, 0.0, out=cdi)
+
+	# mesmas regras de project_piggy, com taxa variável: aporte no início do mês e
+	# saldo_m = G_m * (P + A * sum_{k<=m} 1/G_{k-1}), G = produto acumulado de (1 + r)
+	monthly = (1.0 + cdi / 100.0 * max(0.0, percent_cdi) / 100.0) ** (1.0 / 12.0)
+	growth = np.cumprod(monthly, axis=1)
+	prev = np.concatenate([np.ones((n_paths, 1)), growth[:, :-1]], axis=1)
+	saldo = growth * (principal + aporte_mensal * np.cumsum(1.0 / prev, axis=1))
+
+	total_aportes = principal + aporte_mensal * np.arange(1, horizon + 1)
+	_, _, _, liquido = net_of_taxes(saldo, total_aportes, days, aplicar_impostos)
+	return cdi, saldo, liquido
+
+
+def simulate_piggy(
+	start: date,
+	principal: float,
+	aporte_mensal: float,
+	cdi_aa: float,
+	percent_cdi: float,
+	horizon_months: int = 12,
+	aplicar_impostos: bool = False,
+	model: Optional[CdiModel] = None,
+	max_workers: Optional[int] = 1,
+) -> SimulationBands:
+	"""
+	Simula model.n_paths trajetórias do CDI e devolve as faixas P5/P50/P95 do CDI e dos
+	saldos bruto e líquido. Cada bloco de CHUNK_PATHS trajetórias é vetorizado em NumPy;
+	com max_workers diferente de 1 e mais de um bloco, os blocos vão para um
+	ProcessPoolExecutor (chamar sob `if __name__ == "__main__"` no Windows).
+	Mesma semente e parâmetros -> mesmo resultado, independente de max_workers.
+	Aportes mensais negativos são ignorados (tratados como zero), como em project_piggy.
+	"""
+	model = model or CdiModel()
+	aporte_mensal = max(0.0, float(aporte_mensal))
+	horizon = max(1, int(horizon_months))
+	n_paths = max(1, int(model.n_paths))
+
+	start64 = np.datetime64(start, "D")
+	months = np.arange(1, horizon + 1)
+	ref = add_months(start64, months)
+	days = np.maximum(1, (ref - start64).astype(np.int64))
+
+	sizes = [min(CHUNK_PATHS, n_paths - i) for i in range(0, n_paths, CHUNK_PATHS)]
+	seeds = np.random.SeedSequence(int(model.seed)).spawn(len(sizes))
+	args = [
+		(seed, size, float(cdi_aa), float(percent_cdi), model, float(principal), aporte_mensal, days, bool(aplicar_impostos))
+		for seed, size in zip(seeds, sizes)
+	]
+
+	if max_workers == 1 or len(args) == 1:
+		results = [_simulate_chunk(*a) for a in args]
+	else:
+		with ProcessPoolExecutor(max_workers=max_workers) as pool:
+			results = list(pool.map(_simulate_chunk, *zip(*args)))
+
+	cdi, bruto, liquido = (np.concatenate(parts, axis=0) for parts in zip(*results))
+	q = list(PERCENTILES)
+	return SimulationBands(
+		ref_date=ref,
+		months=months,
+		total_aportes=principal + aporte_mensal * months,
+		cdi=np.percentile(cdi, q, axis=0),
+		saldo_bruto=np.percentile(bruto, q, axis=0),
+		saldo_liquido=np.percentile(liquido, q, axis=0),
+		n_paths=n_paths,
+	)
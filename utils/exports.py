@@ -0,0 +1,187 @@
+from __future__ import annotations
+
+import csv
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Sequence
+
+from database.db_manager import DbManager
+from utils.progress import OperationCancelled, ProgressCallback
+
+
+EXPORT_FORMATS = ("xlsx", "csv")
+_PROGRESS_CHUNK = 2000
+
+_TRANSACTION_HEADER = ["Data", "Tipo", "Categoria", "Descrição", "Valor", "Pago"]
+_TRANSACTION_WIDTHS = [12, 9, 20, 45, 14, 6]
+_CATEGORY_HEADER = ["Tipo", "Categoria", "Total", "Quantidade"]
+_CATEGORY_WIDTHS = [9, 24, 14, 12]
+_BUDGET_HEADER = ["Ano", "Mês", "Categoria", "Limite", "Gasto", "Disponível", "Excedido"]
+_BUDGET_WIDTHS = [6, 5, 24, 14, 14, 14, 9]
+
+
+def _as_date(value: Any) -> Any:
+	text = str(value or "")
+	try:
+		return date.fromisoformat(text[:10])
+	except ValueError:
+		return text
+
+
+def _csv_value(value: Any) -> Any:
+	# CSV no padrão do Excel em português: separador ';' e vírgula decimal
+	if isinstance(value, float):
+		return f"{value:.2f}".replace(".", ",")
+	if isinstance(value, date):
+		return value.isoformat()
+	return value
+
+
+def _write_table(
+	out: Path,
+	fmt: str,
+	title: str,
+	header: Sequence[str],
+	widths: Sequence[int],
+	rows: Iterable[Sequence[Any]],
+) -> Path:
+	"""
+	Grava as linhas em XLSX (openpyxl write_only) ou CSV à medida que o iterador as produz:
+	nenhum dos dois formatos mantém as linhas em memória. O arquivo só aparece em out ao
+	final; em erro ou cancelamento o parcial é removido.
+	"""
+	if fmt not in EXPORT_FORMATS:
+		raise ValueError(f"Formato não suportado: {fmt}")
+	out.parent.mkdir(parents=True, exist_ok=True)
+	tmp = out.with_name(out.name + ".part")
+	try:
+		if fmt == "xlsx":
+			from openpyxl import Workbook
+			from openpyxl.cell import WriteOnlyCell
+			from openpyxl.styles import Font
+			from openpyxl.utils import get_column_letter
+
+			wb = Workbook(write_only=True)
+			ws = wb.create_sheet(title)
+			for i, width in enumerate(widths, start=1):
+				ws.column_dimensions[get_column_letter(i)].width = width
+			ws.freeze_panes = "A2"
+			bold = Font(bold=True)
+			head_cells = []
+			for name in header:
+				cell = WriteOnlyCell(ws, value=name)
+				cell.font = bold
+				head_cells.append(cell)
+			ws.append(head_cells)
+			for row in rows:
+				ws.append(row)
+			wb.save(str(tmp))
+		else:
+			with tmp.open("w", encoding="utf-8-sig", newline="") as f:
+				writer = csv.writer(f, delimiter=";")
+				writer.writerow(header)
+				writer.writerows([_csv_value(v) for v in row] for row in rows)
+		tmp.replace(out)
+	except BaseException:
+		tmp.unlink(missing_ok=True)
+		raise
+	return out
+
+
+def _with_progress(rows: Iterable[Any], total: int, progress: Optional[ProgressCallback]) -> Iterator[Any]:
+	done = 0
+	for row in rows:
+		yield row
+		done += 1
+		if progress is not None and done % _PROGRESS_CHUNK == 0 and progress(done, total) is False:
+			raise OperationCancelled()
+	if progress is not None:
+		progress(done, total)
+
+
+def _default_name(kind: str, start: date, end: date, fmt: str) -> str:
+	return f"{kind}_{start.strftime('%Y%m%d')}_{end.strftime('%Y%m%d')}.{fmt}"
+
+
+def export_transactions(
+	db: DbManager,
+	exports_dir: Path,
+	start: date,
+	end: date,
+	fmt: str = "xlsx",
+	filename: Optional[str] = None,
+	progress: Optional[ProgressCallback] = None,
+) -> Path:
+	"""Exporta as transações do perfil atual entre start e end (inclusive), lidas do cursor em lotes."""
+	stop = end + timedelta(days=1)
+	total = db.count_transactions_between(start, stop) if progress is not None else 0
+	rows = (
+		(
+			_as_date(r.get("data")),
+			str(r.get("tipo") or ""),
+			str(r.get("categoria") or ""),
+			str(r.get("descricao") or ""),
+			float(r.get("valor") or 0.0),
+			"sim" if r.get("pago") else "não",
+		)
+		for r in db.iter_transactions_between(start, stop)
+	)
+	out = exports_dir / (filename or _default_name("transacoes", start, end, fmt))
+	return _write_table(out, fmt, "Transações", _TRANSACTION_HEADER, _TRANSACTION_WIDTHS, _with_progress(rows, total, progress))
+
+
+def export_category_totals(
+	db: DbManager,
+	exports_dir: Path,
+	start: date,
+	end: date,
+	fmt: str = "xlsx",
+	filename: Optional[str] = None,
+	progress: Optional[ProgressCallback] = None,
+) -> Path:
+	"""Exporta totais pagos por tipo e categoria entre start e end (inclusive)."""
+	data = db.get_category_totals_between(start, end + timedelta(days=1))
+	rows = (
+		(str(r["tipo"]), str(r["categoria"] or ""), float(r["total"] or 0.0), int(r["quantidade"] or 0))
+		for r in data
+	)
+	out = exports_dir / (filename or _default_name("categorias", start, end, fmt))
+	return _write_table(out, fmt, "Categorias", _CATEGORY_HEADER, _CATEGORY_WIDTHS, _with_progress(rows, len(data), progress))
+
+
+def export_budget_summary(
+	db: DbManager,
+	exports_dir: Path,
+	start: date,
+	end: date,
+	fmt: str = "xlsx",
+	filename: Optional[str] = None,
+	progress: Optional[ProgressCallback] = None,
+) -> Path:
+	"""
+	Exporta limite e gasto de cada orçamento dos meses entre start e end (inclusive); em
+	meses cobertos só em parte, o limite é proporcional aos dias do período.
+	"""
+	data = db.get_budget_summary_between(start, end + timedelta(days=1))
+	rows = (
+		(
+			int(r["ano"]),
+			int(r["mes"]),
+			str(r["categoria"] or ""),
+			float(r["limite_periodo"] or 0.0),
+			float(r["gasto_atual"] or 0.0),
+			float(r["limite_periodo"] or 0.0) - float(r["gasto_atual"] or 0.0),
+			"sim" if r["excedido"] else "não",
+		)
+		for r in data
+	)
+	out = exports_dir / (filename or _default_name("orcamentos", start, end, fmt))
+	return _write_table(out, fmt, "Orçamentos", _BUDGET_HEADER, _BUDGET_WIDTHS, _with_progress(rows, len(data), progress))
+
+
+# nome usado na interface/CLI -> função de exportação
+EXPORTERS: Dict[str, Callable[..., Path]] = {
+	"transacoes": export_transactions,
+	"categorias": export_category_totals,
+	"orcamentos": export_budget_summary,
+}
@@ -0,0 +1,103 @@
+"""Viabilidade das metas financeiras: aporte mensal necessário e conclusão prevista"""
+from __future__ import annotations
+
+from datetime import date
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from database.db_manager import DbManager
+from utils.investments import add_months, monthly_rate_from_annual
+
+
+# Ordem de atendimento das metas com o ritmo de poupança atual
+PRIORITY_RANK = {"alta": 3, "media": 2, "baixa": 1}
+# Meses completos de histórico usados para o ritmo de poupança
+PACE_MONTHS = 12
+
+
+def saving_pace(db: DbManager, today: Optional[date] = None, months: int = PACE_MONTHS) -> float:
+	"""Média de (entradas - saídas) pagas nos últimos meses completos; meses sem movimento contam zero."""
+	today = today or date.today()
+	end = np.datetime64(today, "M")
+	start = end - int(months)
+	balances = db.get_monthly_balances(start.astype("datetime64[D]").astype(object), end.astype("datetime64[D]").astype(object))
+	saldo = np.zeros(int(months))
+	for (ano, mes), (_, _, s) in balances.items():
+		saldo[int((np.datetime64(f"{ano:04d}-{mes:02d}", "M") - start).astype(np.int64))] = s
+	return float(saldo.mean()) if months > 0 else 0.0
+
+
+def solve_goals(
+	goals: Sequence[Dict[str, Any]],
+	annual_rate: float,
+	monthly_saving: float,
+	today: Optional[date] = None,
+) -> List[Dict[str, Any]]:
+	"""
+	Para todas as metas de uma vez (arrays NumPy):
+	- aporte_necessario: aporte mensal (no início de cada mês, como nos cofrinhos) que, com
+	  o valor atual rendendo annual_rate (decimal, como em project_piggy), chega a
+	  valor_alvo em data_alvo (com o prazo vencido, é o que falta);
+	- conclusao_prevista: data em que a meta seria atingida poupando monthly_saving por mês,
+	  aplicado nas metas ativas por prioridade e prazo (uma meta só recebe depois das
+	  anteriores), ou None se o ritmo não for positivo.
+	Retorna um dict por meta, na ordem recebida.
+	"""
+	today = today or date.today()
+	n = len(goals)
+	if n == 0:
+		return []
+	alvo = np.array([float(g.get("valor_alvo") or 0.0) for g in goals])
+	atual = np.array([float(g.get("valor_atual") or 0.0) for g in goals])
+	deadline = np.array([str(g.get("data_alvo"))[:10] for g in goals], dtype="datetime64[D]")
+	ativo = np.array([bool(g.get("ativo", True)) for g in goals])
+	rank = np.array([PRIORITY_RANK.get(str(g.get("prioridade") or ""), 0) for g in goals])
+	remaining = np.maximum(0.0, alvo - atual)
+
+	today64 = np.datetime64(today, "D")
+	months_left = np.maximum(0, (deadline.astype("datetime64[M]") - today64.astype("datetime64[M]")).astype(np.int64))
+	# mês do prazo só conta se o dia do prazo ainda não passou no mês corrente
+	months_left = np.where(add_months(today64, months_left) > deadline, np.maximum(0, months_left - 1), months_left)
+
+	r = monthly_rate_from_annual(annual_rate)
+	growth = (1.0 + r) ** months_left
+	annuity = months_left.astype(float) if r == 0 else (1.0 + r) * (growth - 1.0) / r
+	shortfall = alvo - atual * growth
+	required = np.where(annuity > 0, np.maximum(0.0, shortfall) / np.where(annuity > 0, annuity, 1.0), remaining)
+
+	# ordem de atendimento: prioridade (desc), prazo (asc); metas inativas ou completas não recebem
+	funded = ativo & (remaining > 0)
+	order = np.lexsort((deadline, -rank))
+	queue = order[funded[order]]
+	completion = np.full(n, np.datetime64("NaT"), dtype="datetime64[D]")
+	completion[~funded & (remaining <= 0)] = today64
+	if monthly_saving > 0 and queue.size:
+		# meses até acumular o que falta da meta e das anteriores na fila (anuidade antecipada)
+		cum = np.cumsum(remaining[queue])
+		if r == 0:
+			months = cum / monthly_saving
+		else:
+			months = np.log1p(cum * r / (monthly_saving * (1.0 + r))) / np.log1p(r)
+		completion[queue] = add_months(today64, np.ceil(months - 1e-9).astype(np.int64))
+
+	out: List[Dict[str, Any]] = []
+	for i, g in enumerate(goals):
+		done = completion[i]
+		out.append(
+			{
+				"id": g.get("id"),
+				"meses_restantes": int(months_left[i]),
+				"aporte_necessario": float(required[i]),
+				"conclusao_prevista": None if np.isnat(done) else done.astype(object),
+				"no_prazo": bool(not np.isnat(done) and done <= deadline[i]),
+			}
+		)
+	return out
+
+
+def goal_plans(db: DbManager, goals: Sequence[Dict[str, Any]], annual_rate: float, today: Optional[date] = None) -> Dict[str, Any]:
+	"""Ritmo de poupança do perfil e solve_goals para as metas, indexado por id."""
+	pace = saving_pace(db, today)
+	plans = solve_goals(goals, annual_rate, pace, today)
+	return {"ritmo_mensal": pace, "metas": {p["id"]: p for p in plans}}
@@ -1,10 +1,12 @@
 from __future__ import annotations
 
+import threading
+from collections import OrderedDict
 from dataclasses import dataclass
 from datetime import date
-from typing import List
+from typing import Any, Callable, Dict, List, Sequence, Tuple
 
-from dateutil.relativedelta import relativedelta
+import numpy as np
 
 
 @dataclass(frozen=True)
@@ -42,13 +44,21 @@ def ir_rate_by_days(days: int) -> float:
 	return 0.15
 
 
+# Tabela regressiva do IOF sobre rendimentos (Decreto 6.306/2007): alíquota pelo dia do resgate (dias 1 a 30)
+_IOF_TABLE = np.array(
+	[
+		0.96, 0.93, 0.90, 0.86, 0.83, 0.80, 0.76, 0.73, 0.70, 0.66,
+		0.63, 0.60, 0.56, 0.53, 0.50, 0.46, 0.43, 0.40, 0.36, 0.33,
+		0.30, 0.26, 0.23, 0.20, 0.16, 0.13, 0.10, 0.06, 0.03, 0.0,
+	]
+)
+
+
 def iof_rate_by_days(days: int) -> float:
-	"""IOF regressivo (apenas se resgate <30 dias). Aproximação linear (0->1)."""
+	"""IOF regressivo (apenas se resgate <30 dias), pela tabela oficial dia a dia."""
 	if days >= 30:
 		return 0.0
-	# dia 1 ~ 96%, dia 30 = 0% (tabela real não é linear, mas serve pro MVP)
-	# Mantém simples e previsível.
-	return max(0.0, (30 - max(1, days)) / 29.0)
+	return float(_IOF_TABLE[max(1, int(days)) - 1])
 
 
 def project_piggy(
@@ -64,48 +74,536 @@ def project_piggy(
 	Assunções MVP:
 	- Aporte mensal entra no início de cada mês.
 	- Impostos (IR/IOF) são calculados como se houvesse resgate em cada ponto.
+
+	Adaptador de compatibilidade: o cálculo é feito por project_piggy_arrays; para
+	horizontes longos ou muitos cenários prefira a versão em colunas.
 	"""
-	principal = float(principal)
-	aporte_mensal = float(aporte_mensal)
-	monthly_rate = monthly_rate_from_annual(annual_rate)
-
-	saldo = principal
-	total_aportes = principal
-	points: List[ProjectionPoint] = []
-
-	for m in range(1, int(horizon_months) + 1):
-		# aporte no início do mês
-		if aporte_mensal > 0:
-			saldo += aporte_mensal
-			total_aportes += aporte_mensal
-
-		# juros no mês
-		saldo *= 1.0 + monthly_rate
-
-		ref = start + relativedelta(months=+m)
-		days = max(1, (ref - start).days)
-
-		rendimento = max(0.0, saldo - total_aportes)
-		iof = 0.0
-		ir = 0.0
-		saldo_liq = saldo
-		if aplicar_impostos and rendimento > 0:
-			iof = rendimento * iof_rate_by_days(days)
-			r_base = max(0.0, rendimento - iof)
-			ir = r_base * ir_rate_by_days(days)
-			saldo_liq = total_aportes + max(0.0, rendimento - iof - ir)
-
-		points.append(
-			ProjectionPoint(
-				ref_date=ref,
-				months=m,
-				total_aportes=total_aportes,
-				saldo_bruto=saldo,
-				rendimento_bruto=rendimento,
-				iof=iof,
-				ir=ir,
-				saldo_liquido=saldo_liq,
+	return project_piggy_arrays(start, principal, aporte_mensal, annual_rate, horizon_months, aplicar_impostos).to_points()
+
+
+# ===== PROJEÇÃO EM LOTE (NumPy) =====
+
+_IR_LIMITS = np.array([180, 360, 720])
+_IR_RATES = np.array([0.225, 0.20, 0.175, 0.15])
+
+
+@dataclass(frozen=True)
+class ProjectionArrays:
+	"""Projeção em colunas: cada campo é um array com o mesmo formato (ex.: cofrinhos x meses)."""
+
+	ref_date: np.ndarray  # datetime64[D]
+	months: np.ndarray
+	total_aportes: np.ndarray
+	saldo_bruto: np.ndarray
+	rendimento_bruto: np.ndarray
+	iof: np.ndarray
+	ir: np.ndarray
+	saldo_liquido: np.ndarray
+
+	def __len__(self) -> int:
+		return int(self.months.shape[0]) if self.months.ndim else 1
+
+	def to_points(self) -> List[ProjectionPoint]:
+		"""Converte uma projeção 1-D na lista de ProjectionPoint usada pelo código antigo."""
+		if self.months.ndim != 1:
+			raise ValueError("to_points só se aplica a projeções de um cofrinho (1-D)")
+		return [
+			ProjectionPoint(*fields)
+			for fields in zip(
+				self.ref_date.astype(object).tolist(),
+				self.months.tolist(),
+				self.total_aportes.tolist(),
+				self.saldo_bruto.tolist(),
+				self.rendimento_bruto.tolist(),
+				self.iof.tolist(),
+				self.ir.tolist(),
+				self.saldo_liquido.tolist(),
 			)
-		)
+		]
+
+	def take(self, index: np.ndarray) -> "ProjectionArrays":
+		"""Subconjunto ao longo do último eixo (ex.: pontos mensais de uma projeção diária)."""
+		index = np.asarray(index)
+		return ProjectionArrays(**{f: np.take(getattr(self, f), index, axis=-1) for f in self.__dataclass_fields__})
+
+
+def add_months(starts: np.ndarray, months: np.ndarray) -> np.ndarray:
+	"""start + relativedelta(months=m) vetorizado (dia limitado ao fim do mês), com broadcasting."""
+	starts = np.asarray(starts, dtype="datetime64[D]")
+	first = starts.astype("datetime64[M]")
+	day = (starts - first.astype("datetime64[D]")).astype(np.int64)
+	target = first + np.asarray(months, dtype=np.int64)
+	month_len = ((target + 1).astype("datetime64[D]") - target.astype("datetime64[D]")).astype(np.int64)
+	return target.astype("datetime64[D]") + np.minimum(day, month_len - 1)
+
+
+def ir_rates(days: np.ndarray) -> np.ndarray:
+	"""ir_rate_by_days para um array de prazos."""
+	return _IR_RATES[np.searchsorted(_IR_LIMITS, np.asarray(days), side="left")]
+
 
-	return points
+def iof_rates(days: np.ndarray) -> np.ndarray:
+	"""iof_rate_by_days para um array de prazos (consulta direta na tabela)."""
+	return _IOF_TABLE[np.clip(np.asarray(days), 1, 30) - 1]
+
+
+def net_of_taxes(
+	saldo: np.ndarray,
+	total_aportes: np.ndarray,
+	days: np.ndarray,
+	aplicar_impostos: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+	"""(rendimento, IOF, IR, saldo líquido) como se houvesse resgate após days dias."""
+	rendimento = np.maximum(0.0, saldo - total_aportes)
+	taxed = np.asarray(aplicar_impostos, dtype=bool) & (rendimento > 0)
+	iof = np.where(taxed, rendimento * iof_rates(days), 0.0)
+	ir = np.where(taxed, (rendimento - iof) * ir_rates(days), 0.0)
+	liquido = np.where(taxed, total_aportes + np.maximum(0.0, rendimento - iof - ir), saldo)
+	return rendimento, iof, ir, liquido
+
+
+def project_piggies(
+	starts: np.ndarray,
+	principal: np.ndarray,
+	aporte_mensal: np.ndarray,
+	annual_rate: np.ndarray,
+	months: np.ndarray,
+	aplicar_impostos: np.ndarray,
+) -> ProjectionArrays:
+	"""
+	Mesmas regras de project_piggy, em forma fechada e com broadcasting: cada parâmetro pode
+	ser escalar ou array (ex.: formato (n, 1) por cofrinho e months com formato (1, H)).
+	Com aporte no início do mês e taxa mensal r, após m meses:
+	saldo = P(1+r)^m + A(1+r)((1+r)^m - 1)/r.
+	Aportes mensais negativos são ignorados (tratados como zero), como em project_piggy.
+	"""
+	principal = np.asarray(principal, dtype=float)
+	aporte = np.maximum(np.asarray(aporte_mensal, dtype=float), 0.0)
+	rate = (1.0 + np.asarray(annual_rate, dtype=float)) ** (1.0 / 12.0) - 1.0
+	months = np.asarray(months, dtype=np.int64)
+
+	growth = (1.0 + rate) ** months
+	safe_rate = np.where(rate == 0.0, 1.0, rate)
+	annuity = np.where(rate == 0.0, months, (1.0 + rate) * (growth - 1.0) / safe_rate)
+	saldo = principal * growth + aporte * annuity
+	total_aportes = principal + aporte * months
+
+	starts = np.asarray(starts, dtype="datetime64[D]")
+	ref = add_months(starts, months)
+	days = np.maximum(1, (ref - starts).astype(np.int64))
+	rendimento, iof, ir, liquido = net_of_taxes(saldo, total_aportes, days, aplicar_impostos)
+
+	shape = np.broadcast(saldo, ref).shape
+	return ProjectionArrays(
+		ref_date=np.broadcast_to(ref, shape),
+		months=np.broadcast_to(months, shape),
+		total_aportes=np.broadcast_to(total_aportes, shape),
+		saldo_bruto=np.broadcast_to(saldo, shape),
+		rendimento_bruto=np.broadcast_to(rendimento, shape),
+		iof=np.broadcast_to(iof, shape),
+		ir=np.broadcast_to(ir, shape),
+		saldo_liquido=np.broadcast_to(liquido, shape),
+	)
+
+
+def project_piggy_arrays(
+	start: date,
+	principal: float,
+	aporte_mensal: float,
+	annual_rate: float,
+	horizon_months: int = 12,
+	aplicar_impostos: bool = False,
+) -> ProjectionArrays:
+	"""project_piggy em colunas: arrays de tamanho horizon_months, meses 1..horizon_months."""
+	return project_piggies(
+		starts=np.datetime64(start, "D"),
+		principal=float(principal),
+		aporte_mensal=float(aporte_mensal),
+		annual_rate=float(annual_rate),
+		months=np.arange(1, max(0, int(horizon_months)) + 1),
+		aplicar_impostos=bool(aplicar_impostos),
+	)
+
+
+def project_portfolio(
+	starts: Sequence[date],
+	principal: Sequence[float],
+	aporte_mensal: Sequence[float],
+	annual_rate: Sequence[float],
+	aplicar_impostos: Sequence[bool],
+	first_month: date,
+	horizon_months: int = 12,
+) -> ProjectionArrays:
+	"""
+	Projeta vários cofrinhos no mesmo calendário: linha i = cofrinho, coluna j = mês
+	first_month + (j + 1). Cada cofrinho entra com o número de meses decorridos desde a
+	sua data_inicio; meses anteriores ao início ficam zerados. Uma única chamada a
+	project_piggies calcula a carteira inteira.
+	"""
+	starts_arr = np.array(starts, dtype="datetime64[D]").reshape(-1, 1)
+	base = np.datetime64(first_month, "M")
+	calendar = base + np.arange(1, int(horizon_months) + 1).reshape(1, -1)
+	elapsed = (calendar - starts_arr.astype("datetime64[M]")).astype(np.int64)
+	active = elapsed >= 0
+
+	proj = project_piggies(
+		starts=starts_arr,
+		principal=np.asarray(principal, dtype=float).reshape(-1, 1),
+		aporte_mensal=np.asarray(aporte_mensal, dtype=float).reshape(-1, 1),
+		annual_rate=np.asarray(annual_rate, dtype=float).reshape(-1, 1),
+		months=np.maximum(elapsed, 0),
+		aplicar_impostos=np.asarray(aplicar_impostos, dtype=bool).reshape(-1, 1),
+	)
+
+	def masked(values: np.ndarray) -> np.ndarray:
+		return np.where(active, values, 0.0)
+
+	return ProjectionArrays(
+		ref_date=np.broadcast_to(calendar.astype("datetime64[D]"), active.shape),
+		months=np.where(active, elapsed, 0),
+		total_aportes=masked(proj.total_aportes),
+		saldo_bruto=masked(proj.saldo_bruto),
+		rendimento_bruto=masked(proj.rendimento_bruto),
+		iof=masked(proj.iof),
+		ir=masked(proj.ir),
+		saldo_liquido=masked(proj.saldo_liquido),
+	)
+
+
+# ===== SENSIBILIDADE =====
+
+
+@dataclass(frozen=True)
+class SensitivityGrid:
+	"""Saldo final de cada combinação: eixos (cdi_aa, percent_cdi, aporte_mensal, horizons)."""
+
+	cdi_aa: np.ndarray
+	percent_cdi: np.ndarray
+	aporte_mensal: np.ndarray
+	horizons: np.ndarray
+	saldo_bruto: np.ndarray
+	saldo_liquido: np.ndarray
+
+	def net_table(self, aporte_idx: int, horizon_idx: int) -> np.ndarray:
+		"""Fatia CDI x %CDI do saldo líquido para um aporte e um horizonte."""
+		return self.saldo_liquido[:, :, aporte_idx, horizon_idx]
+
+
+def sensitivity_grid(
+	start: date,
+	principal: float,
+	cdi_values: Sequence[float],
+	percent_cdi_values: Sequence[float],
+	aporte_values: Sequence[float],
+	horizons: Sequence[int],
+	aplicar_impostos: bool = False,
+) -> SensitivityGrid:
+	"""
+	Avalia todas as combinações CDI a.a. (%) x %CDI x aporte mensal x horizonte (meses) numa
+	única chamada de project_piggies: cada eixo ocupa uma dimensão e o broadcasting monta a grade.
+	"""
+	cdi = np.asarray(cdi_values, dtype=float).ravel()
+	pct = np.asarray(percent_cdi_values, dtype=float).ravel()
+	aporte = np.asarray(aporte_values, dtype=float).ravel()
+	months = np.asarray(horizons, dtype=np.int64).ravel()
+	if months.size and months.min() < 1:
+		raise ValueError("Horizontes devem ter pelo menos 1 mês")
+
+	# mesma regra de annual_rate_from_cdi, como produto externo
+	annual = np.maximum(0.0, cdi)[:, None] / 100.0 * np.maximum(0.0, pct)[None, :] / 100.0
+	proj = project_piggies(
+		starts=np.datetime64(start, "D"),
+		principal=float(principal),
+		aporte_mensal=aporte[None, None, :, None],
+		annual_rate=annual[:, :, None, None],
+		months=months[None, None, None, :],
+		aplicar_impostos=bool(aplicar_impostos),
+	)
+	return SensitivityGrid(
+		cdi_aa=cdi,
+		percent_cdi=pct,
+		aporte_mensal=aporte,
+		horizons=months,
+		saldo_bruto=proj.saldo_bruto,
+		saldo_liquido=proj.saldo_liquido,
+	)
+
+
+# ===== ACÚMULO DIÁRIO (dias úteis, base 252) =====
+
+
+def project_piggy_daily(
+	start: date,
+	principal: float,
+	aporte_mensal: float,
+	annual_rate: float,
+	horizon_months: int = 12,
+	aplicar_impostos: bool = False,
+) -> ProjectionArrays:
+	"""
+	Saldo em cada dia corrido de start a start + horizon_months, com juros só nos dias úteis
+	(feriados nacionais, base 252: fator diário (1 + taxa anual)^(1/252)), como o CDI.
+	O aporte de cada mês entra na data de aniversário (start, start + 1 mês, ...) e rende a
+	partir do dia seguinte; o ponto de um dia ainda não inclui o aporte feito nele, então
+	nas datas de aniversário os valores batem com os meses de project_piggy_arrays.
+	Tudo é vetorizado: contagem de dias úteis por np.busday_count e aportes por soma acumulada.
+	"""
+	from utils.business_days import business_days_between
+
+	horizon = max(0, int(horizon_months))
+	start64 = np.datetime64(start, "D")
+	end64 = add_months(start64, horizon)
+	days = np.arange(start64, end64 + 1)
+
+	# índice de dia útil acumulado: juros de a até b = fator ** (idx[b] - idx[a])
+	bd_index = business_days_between(start64, days)
+	factor = (1.0 + float(annual_rate)) ** (1.0 / 252.0)
+
+	deposit_dates = add_months(start64, np.arange(horizon))
+	n_deposits = np.searchsorted(deposit_dates, days, side="left")
+	dep_index = business_days_between(start64, deposit_dates)
+	# valor presente (no dia start) de cada aporte, somado em ordem: saldo = fator^idx * (P + soma)
+	aporte = max(float(aporte_mensal), 0.0)
+	discounted = np.concatenate([[0.0], np.cumsum(aporte * factor ** (-dep_index.astype(float)))])
+	growth = factor ** bd_index.astype(float)
+	saldo = growth * (float(principal) + discounted[n_deposits])
+	total_aportes = float(principal) + aporte * n_deposits
+
+	elapsed = np.maximum(1, (days - start64).astype(np.int64))
+	rendimento, iof, ir, liquido = net_of_taxes(saldo, total_aportes, elapsed, aplicar_impostos)
+	months = np.searchsorted(add_months(start64, np.arange(1, horizon + 1)), days, side="right")
+	return ProjectionArrays(
+		ref_date=days,
+		months=months,
+		total_aportes=total_aportes,
+		saldo_bruto=saldo,
+		rendimento_bruto=rendimento,
+		iof=iof,
+		ir=ir,
+		saldo_liquido=liquido,
+	)
+
+
+def daily_month_points(daily: ProjectionArrays, start: date, horizon_months: int) -> ProjectionArrays:
+	"""Pontos de project_piggy_daily nas datas de aniversário (mesmo formato de project_piggy_arrays)."""
+	ref = add_months(np.datetime64(start, "D"), np.arange(1, int(horizon_months) + 1))
+	return daily.take(np.searchsorted(daily.ref_date, ref))
+
+
+# ===== LOTES POR APORTE (IR/IOF) =====
+
+
+def project_piggy_lots(
+	start: date,
+	principal: float,
+	aporte_mensal: float,
+	annual_rate: float,
+	horizon_months: int = 12,
+	aplicar_impostos: bool = False,
+	daily: bool = False,
+) -> ProjectionArrays:
+	"""
+	Como project_piggy_arrays, mas cada aporte (e o valor inicial) é um lote com o seu
+	prazo: no resgate simulado de cada mês, IOF e IR regressivos são calculados por lote,
+	pelos dias desde o depósito daquele lote, e somados. Matriz lotes x meses em NumPy.
+	Com daily, os lotes rendem por dia útil (base 252), como project_piggy_daily.
+	"""
+	horizon = max(0, int(horizon_months))
+	start64 = np.datetime64(start, "D")
+	months = np.arange(1, horizon + 1)
+	ref = add_months(start64, months)
+
+	# lote 0 = valor inicial; lote k >= 1 = aporte do início do mês k (start + k-1 meses)
+	offsets = np.arange(horizon + 1) - 1
+	offsets[0] = 0
+	lot_dates = add_months(start64, np.maximum(offsets, 0))
+	amounts = np.full(horizon + 1, max(float(aporte_mensal), 0.0))
+	amounts[0] = float(principal)
+
+	active = offsets[:, None] < months[None, :]
+	# o crescimento de cada lote só depende do prazo inteiro: potências pré-calculadas e indexadas
+	if daily:
+		from utils.business_days import business_days_between
+
+		# dias úteis entre depósito e resgate como diferença de dois índices acumulados
+		ref_idx = business_days_between(start64, ref)
+		lot_idx = business_days_between(start64, lot_dates)
+		held = np.where(active, ref_idx[None, :] - lot_idx[:, None], 0)
+		step = (1.0 + float(annual_rate)) ** (1.0 / 252.0)
+	else:
+		held = np.where(active, months[None, :] - offsets[:, None], 0)
+		step = 1.0 + monthly_rate_from_annual(annual_rate)
+	growth = (step ** np.arange(int(held.max(initial=0)) + 1))[held]
+
+	invested = np.where(active, amounts[:, None], 0.0)
+	value = invested * growth
+	total_aportes = invested.sum(axis=0)
+	saldo = value.sum(axis=0)
+	rendimento_lote = np.maximum(0.0, value - invested)
+
+	if aplicar_impostos:
+		days = np.maximum(1, (ref[None, :] - lot_dates[:, None]).astype(np.int64))
+		iof_lote = rendimento_lote * iof_rates(days)
+		ir_lote = (rendimento_lote - iof_lote) * ir_rates(days)
+		iof = iof_lote.sum(axis=0)
+		ir = ir_lote.sum(axis=0)
+	else:
+		iof = np.zeros(horizon)
+		ir = np.zeros(horizon)
+
+	return ProjectionArrays(
+		ref_date=ref,
+		months=months,
+		total_aportes=total_aportes,
+		saldo_bruto=saldo,
+		rendimento_bruto=np.maximum(0.0, saldo - total_aportes),
+		iof=iof,
+		ir=ir,
+		saldo_liquido=saldo - iof - ir,
+	)
+
+
+# ===== CACHE DE PROJEÇÕES =====
+
+
+class ProjectionCache:
+	"""
+	Cache LRU limitado de projeções, compartilhado pela aba de cofrinhos, pelos relatórios e
+	pela carteira. A chave é a tupla normalizada dos parâmetros (datas ISO, valores
+	arredondados ao centavo, taxa a 1e-12), então projeções equivalentes reaproveitam o
+	mesmo resultado. Os arrays guardados são somente leitura: quem precisar alterar copia.
+	"""
+
+	def __init__(self, maxsize: int = 256):
+		self.maxsize = int(maxsize)
+		self.hits = 0
+		self.misses = 0
+		self._data: "OrderedDict[Tuple[Any, ...], ProjectionArrays]" = OrderedDict()
+		self._lock = threading.Lock()
+
+	def get_or_compute(self, key: Tuple[Any, ...], compute: Callable[[], ProjectionArrays]) -> ProjectionArrays:
+		with self._lock:
+			found = self._data.get(key)
+			if found is not None:
+				self._data.move_to_end(key)
+				self.hits += 1
+				return found
+			self.misses += 1
+		value = _read_only(compute())
+		with self._lock:
+			self._data[key] = value
+			self._data.move_to_end(key)
+			while len(self._data) > self.maxsize:
+				self._data.popitem(last=False)
+		return value
+
+	def info(self) -> Dict[str, int]:
+		with self._lock:
+			return {"hits": self.hits, "misses": self.misses, "size": len(self._data), "maxsize": self.maxsize}
+
+	def clear(self) -> None:
+		with self._lock:
+			self._data.clear()
+			self.hits = self.misses = 0
+
+
+def _read_only(proj: ProjectionArrays) -> ProjectionArrays:
+	for name in proj.__dataclass_fields__:
+		arr = getattr(proj, name)
+		if arr.flags.writeable:
+			arr.flags.writeable = False
+	return proj
+
+
+PROJECTION_CACHE = ProjectionCache()
+
+
+def projection_key(
+	kind: str,
+	start: date,
+	principal: float,
+	aporte_mensal: float,
+	annual_rate: float,
+	horizon_months: int,
+	aplicar_impostos: bool,
+) -> Tuple[Any, ...]:
+	return (
+		kind,
+		date.fromisoformat(str(start)[:10]).isoformat(),
+		round(float(principal), 2),
+		round(float(aporte_mensal), 2),
+		round(float(annual_rate), 12),
+		int(horizon_months),
+		bool(aplicar_impostos),
+	)
+
+
+def cached_projection(
+	start: date,
+	principal: float,
+	aporte_mensal: float,
+	annual_rate: float,
+	horizon_months: int = 12,
+	aplicar_impostos: bool = False,
+	daily: bool = False,
+	per_lot: bool = False,
+) -> ProjectionArrays:
+	"""
+	project_piggy_arrays (ou project_piggy_daily, com daily) através de PROJECTION_CACHE.
+	Com per_lot, usa project_piggy_lots: pontos mensais com IR/IOF calculados por aporte.
+	"""
+	kind = ("lotes_" if per_lot else "") + ("diario" if daily else "mensal")
+	key = projection_key(kind, start, principal, aporte_mensal, annual_rate, horizon_months, aplicar_impostos)
+	args = (date.fromisoformat(key[1]), key[2], key[3], key[4], key[5], key[6])
+	if per_lot:
+		return PROJECTION_CACHE.get_or_compute(key, lambda: project_piggy_lots(*args, daily=daily))
+	return PROJECTION_CACHE.get_or_compute(key, lambda: (project_piggy_daily if daily else project_piggy_arrays)(*args))
+
+
+def cached_portfolio(
+	starts: Sequence[date],
+	principal: Sequence[float],
+	aporte_mensal: Sequence[float],
+	annual_rate: Sequence[float],
+	aplicar_impostos: Sequence[bool],
+	first_month: date,
+	horizon_months: int = 12,
+) -> ProjectionArrays:
+	"""project_portfolio através de PROJECTION_CACHE (chave: tupla normalizada de cada cofrinho)."""
+	piggies = tuple(
+		projection_key("carteira", s, p, a, r, horizon_months, t)[1:5] + (bool(t),)
+		for s, p, a, r, t in zip(starts, principal, aporte_mensal, annual_rate, aplicar_impostos)
+	)
+	key = ("carteira", first_month.replace(day=1).isoformat(), int(horizon_months), piggies)
+	return PROJECTION_CACHE.get_or_compute(
+		key,
+		lambda: project_portfolio(
+			[date.fromisoformat(p[0]) for p in piggies],
+			[p[1] for p in piggies],
+			[p[2] for p in piggies],
+			[p[3] for p in piggies],
+			[p[4] for p in piggies],
+			first_month,
+			horizon_months,
+		),
+	)
+
+
+def monthly_projection(
+	start: date,
+	principal: float,
+	aporte_mensal: float,
+	annual_rate: float,
+	horizon_months: int = 12,
+	aplicar_impostos: bool = False,
+	daily: bool = False,
+	per_lot: bool = False,
+) -> ProjectionArrays:
+	"""
+	Pontos mensais (datas de aniversário) da projeção escolhida, via cache: juros mensais ou
+	por dia útil (daily) e IR/IOF sobre o total ou por aporte (per_lot).
+	"""
+	params = (start, principal, aporte_mensal, annual_rate, horizon_months, aplicar_impostos)
+	if daily and not per_lot:
+		return daily_month_points(cached_projection(*params, daily=True), start, horizon_months)
+	return cached_projection(*params, daily=daily, per_lot=per_lot)
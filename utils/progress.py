@@ -0,0 +1,12 @@
+"""Progresso e cancelamento das operações longas (backup, exportações, relatórios)"""
+from __future__ import annotations
+
+from typing import Callable, Optional
+
+
+# Recebe (itens processados, total de itens); retornar False cancela a operação
+ProgressCallback = Callable[[int, int], Optional[bool]]
+
+
+class OperationCancelled(Exception):
+	"""Operação cancelada pelo usuário (o callback de progresso retornou False)."""
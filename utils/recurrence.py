@@ -0,0 +1,167 @@
+"""Transações recorrentes: ocorrências calculadas a partir das regras de recorrencias"""
+from __future__ import annotations
+
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from database.db_manager import DbManager
+from utils.investments import add_months
+
+
+FREQUENCIES = ("semanal", "mensal", "anual")
+# Ocorrências viram transações até hoje + MATERIALIZE_MONTHS; as seguintes ficam só calculadas
+MATERIALIZE_MONTHS = 1
+
+
+def _day(value: Any) -> np.datetime64:
+	return np.datetime64(str(value)[:10], "D")
+
+
+def occurrence_dates(rule: Dict[str, Any], start: date, end: date) -> Tuple[np.ndarray, np.ndarray]:
+	"""
+	(índice da ocorrência, data) de cada ocorrência da regra (linha de list_recurrences)
+	em [start, end), respeitando data_fim e o limite de ocorrências. O índice conta a
+	partir de 0 na primeira ocorrência, para numerar parcelas.
+	"""
+	first = _day(rule["data_inicio"])
+	lo = max(np.datetime64(start, "D"), first)
+	hi = np.datetime64(end, "D")
+	if rule.get("data_fim"):
+		hi = min(hi, _day(rule["data_fim"]) + 1)
+	empty = (np.zeros(0, dtype=np.int64), np.zeros(0, dtype="datetime64[D]"))
+	if hi <= lo:
+		return empty
+
+	step = max(1, int(rule.get("intervalo") or 1))
+	freq = rule.get("frequencia") or "mensal"
+	if freq == "semanal":
+		period = 7 * step
+		k = np.arange(
+			-(-int((lo - first).astype(np.int64)) // period),
+			-(-int((hi - first).astype(np.int64)) // period),
+		)
+		days = first + k * period
+	elif freq in ("mensal", "anual"):
+		period = step * (12 if freq == "anual" else 1)
+		base = first.astype("datetime64[M]")
+		day = int((first - base.astype("datetime64[D]")).astype(np.int64)) + 1
+		if freq == "mensal" and rule.get("dia"):
+			day = int(rule["dia"])
+			# dia anterior ao de data_inicio: a primeira ocorrência cai no mês seguinte
+			if day < int((first - base.astype("datetime64[D]")).astype(np.int64)) + 1:
+				base = base + 1
+		span_lo = int((lo.astype("datetime64[M]") - base).astype(np.int64))
+		span_hi = int((hi.astype("datetime64[M]") - base).astype(np.int64))
+		k = np.arange(max(0, span_lo // period), span_hi // period + 1)
+		months = base + k * period
+		month_len = ((months + 1).astype("datetime64[D]") - months.astype("datetime64[D]")).astype(np.int64)
+		days = months.astype("datetime64[D]") + (np.minimum(day, month_len) - 1)
+	else:
+		raise ValueError(f"Frequência não suportada: {freq}")
+
+	mask = (days >= lo) & (days < hi)
+	if rule.get("ocorrencias"):
+		mask &= k < int(rule["ocorrencias"])
+	return k[mask], days[mask]
+
+
+def _values(rule: Dict[str, Any], k: np.ndarray) -> np.ndarray:
+	"""Valor de cada ocorrência: valor, com valor_ultima na última parcela."""
+	values = np.full(k.shape, float(rule["valor"]))
+	if rule.get("ocorrencias") and rule.get("valor_ultima") is not None:
+		values[k == int(rule["ocorrencias"]) - 1] = float(rule["valor_ultima"])
+	return values
+
+
+def expand_rule(rule: Dict[str, Any], start: date, end: date) -> List[Dict[str, Any]]:
+	"""Ocorrências da regra em [start, end) no formato das linhas de transações (sem id)."""
+	k, days = occurrence_dates(rule, start, end)
+	values = _values(rule, k)
+	n = int(rule.get("ocorrencias") or 0)
+	base = rule.get("descricao") or rule.get("categoria")
+	return [
+		{
+			"id": None,
+			"recorrente_id": rule["id"],
+			"tipo": rule["tipo"],
+			"categoria": rule["categoria"],
+			"descricao": f"Parcela {i + 1}/{n} - {base}" if n else rule.get("descricao"),
+			"valor": v,
+			"data": d,
+			"pago": 0,
+			"tags": rule.get("tags"),
+		}
+		for i, d, v in zip(k.tolist(), days.astype(str).tolist(), values.tolist())
+	]
+
+
+def _pending_since(rule: Dict[str, Any]) -> date:
+	"""Primeiro dia ainda não lançado como transação."""
+	if rule.get("gerado_ate"):
+		return date.fromisoformat(str(rule["gerado_ate"])[:10]) + timedelta(days=1)
+	return date.fromisoformat(str(rule["data_inicio"])[:10])
+
+
+def materialize_recurrences(db: DbManager, until: Optional[date] = None) -> int:
+	"""
+	Lança como transações (não pagas) as ocorrências das regras ativas até until (padrão:
+	hoje + MATERIALIZE_MONTHS), em um único lote. Cada regra guarda até onde já foi gerada,
+	então chamar de novo só lança o que falta. Retorna o número de transações criadas.
+	"""
+	until = until or add_months(np.datetime64(date.today(), "D"), MATERIALIZE_MONTHS).astype(object)
+	rows: List[Dict[str, Any]] = []
+	marks: Dict[int, date] = {}
+	for rule in db.list_recurrences():
+		since = _pending_since(rule)
+		if since > until:
+			continue
+		rows.extend(expand_rule(rule, since, until + timedelta(days=1)))
+		marks[int(rule["id"])] = until
+	if not marks:
+		return 0
+	return db.add_recurrence_occurrences(rows, marks)
+
+
+def virtual_occurrences(
+	db: DbManager, start: date, end: date, rules: Optional[Sequence[Dict[str, Any]]] = None
+) -> List[Dict[str, Any]]:
+	"""Ocorrências previstas em [start, end) ainda não lançadas, sem gravar nada (prevista=True)."""
+	out: List[Dict[str, Any]] = []
+	for rule in db.list_recurrences() if rules is None else rules:
+		for occ in expand_rule(rule, max(start, _pending_since(rule)), end):
+			occ["prevista"] = True
+			out.append(occ)
+	out.sort(key=lambda r: r["data"])
+	return out
+
+
+def forecast_monthly_balances(db: DbManager, start: date, end: date) -> Dict[Tuple[int, int], Tuple[float, float, float]]:
+	"""
+	Entradas, saídas e saldo previstos por mês em [start, end): transações lançadas (pagas ou
+	não) somadas às ocorrências futuras das regras, agregadas por mês em NumPy.
+	"""
+	balances = dict(db.get_monthly_balances(start, end, somente_pagas=False))
+	months: List[np.ndarray] = []
+	entradas: List[np.ndarray] = []
+	saidas: List[np.ndarray] = []
+	for rule in db.list_recurrences():
+		k, days = occurrence_dates(rule, max(start, _pending_since(rule)), end)
+		if not k.size:
+			continue
+		values = _values(rule, k)
+		months.append(days.astype("datetime64[M]"))
+		is_in = rule["tipo"] == "entrada"
+		entradas.append(values if is_in else np.zeros_like(values))
+		saidas.append(np.zeros_like(values) if is_in else values)
+	if not months:
+		return balances
+
+	keys, inverse = np.unique(np.concatenate(months), return_inverse=True)
+	ent = np.bincount(inverse, weights=np.concatenate(entradas), minlength=keys.size)
+	sai = np.bincount(inverse, weights=np.concatenate(saidas), minlength=keys.size)
+	for m, e, s in zip(keys.astype(object).tolist(), ent.tolist(), sai.tolist()):
+		e0, s0, _ = balances.get((m.year, m.month), (0.0, 0.0, 0.0))
+		balances[(m.year, m.month)] = (e0 + e, s0 + s, (e0 + e) - (s0 + s))
+	return balances
@@ -0,0 +1,83 @@
+"""Recursos compartilhados dos relatórios PDF (logo e estilos), carregados uma vez por processo"""
+from __future__ import annotations
+
+import io
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional, Tuple
+
+from reportlab.lib import colors
+from reportlab.lib.styles import ParagraphStyle, StyleSheet1, getSampleStyleSheet
+from reportlab.platypus import Image, TableStyle
+
+
+_ROOT = Path(__file__).resolve().parent.parent
+LOGO_PATH = _ROOT / "logo" / "Gemini_Generated_Image_vwaqrtvwaqrtvwaq(1).png"
+
+LOGO_WIDTH = 120.0
+# Resolução do logo embutido (o PNG original é muito maior do que o desenhado)
+_LOGO_DPI = 200
+
+# Fontes padrão do PDF (não precisam ser embutidas). As Mont de fonts/ são .otf com
+# contornos CFF, que o ReportLab não embute; por isso os relatórios não as usam.
+HEADING_FONT = "Helvetica-Bold"
+LIGHT_FONT = "Helvetica"
+
+
+@lru_cache(maxsize=None)
+def report_styles() -> StyleSheet1:
+	"""Folha de estilos dos relatórios (compartilhada; não alterar os estilos retornados)."""
+	styles = getSampleStyleSheet()
+	styles["Title"].fontName = HEADING_FONT
+	styles.add(ParagraphStyle("Note", parent=styles["Italic"], fontSize=9, leading=11))
+	styles.add(ParagraphStyle("Subtitle", parent=styles["Normal"], fontName=LIGHT_FONT, fontSize=11, leading=14))
+	return styles
+
+
+@lru_cache(maxsize=None)
+def data_table_style(numeric_from: int = 1, valign_top: bool = False) -> TableStyle:
+	"""Estilo padrão das tabelas: cabeçalho cinza e colunas numéricas (a partir de numeric_from) à direita."""
+	cmds = [
+		("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#F3F4F6")),
+		("TEXTCOLOR", (0, 0), (-1, 0), colors.HexColor("#374151")),
+		("FONTNAME", (0, 0), (-1, 0), HEADING_FONT),
+		("FONTSIZE", (0, 0), (-1, 0), 9),
+		("ALIGN", (numeric_from, 1), (-1, -1), "RIGHT"),
+		("GRID", (0, 0), (-1, -1), 0.25, colors.HexColor("#E5E7EB")),
+		("FONTSIZE", (0, 1), (-1, -1), 8),
+	]
+	if valign_top:
+		cmds.append(("VALIGN", (0, 0), (-1, -1), "TOP"))
+	return TableStyle(cmds)
+
+
+@lru_cache(maxsize=None)
+def _logo_png() -> Optional[Tuple[bytes, float]]:
+	"""PNG do logo já reduzido para a largura usada nos PDFs, e a proporção altura/largura."""
+	if not LOGO_PATH.exists():
+		return None
+	try:
+		from PIL import Image as PILImage
+
+		with PILImage.open(LOGO_PATH) as src:
+			w, h = src.size
+			if w <= 0 or h <= 0:
+				return None
+			target_px = int(LOGO_WIDTH / 72.0 * _LOGO_DPI)
+			img = src.convert("RGBA")
+			if w > target_px:
+				img = img.resize((target_px, max(1, round(h * target_px / w))), PILImage.LANCZOS)
+			buf = io.BytesIO()
+			img.save(buf, format="PNG", optimize=True)
+		return buf.getvalue(), h / w
+	except Exception:
+		return None
+
+
+def logo_flowable() -> Optional[Image]:
+	"""Novo flowable do logo (instâncias não são compartilhadas entre documentos)."""
+	cached = _logo_png()
+	if cached is None:
+		return None
+	data, ratio = cached
+	return Image(io.BytesIO(data), width=LOGO_WIDTH, height=LOGO_WIDTH * ratio)
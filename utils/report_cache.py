@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+
+REPORT_INDEX_NAME = ".relatorios_index.json"
+
+
+def _json_default(value: Any) -> Any:
+	if isinstance(value, (date, datetime)):
+		return value.isoformat()
+	if hasattr(value, "__dict__"):
+		return vars(value)
+	return str(value)
+
+
+def report_digest(kind: str, template_version: int, **data: Any) -> str:
+	"""SHA-256 dos dados e parâmetros de um relatório (JSON canônico)."""
+	h = hashlib.sha256()
+	h.update(f"{kind}:{int(template_version)}\n".encode("utf-8"))
+	h.update(json.dumps(data, sort_keys=True, ensure_ascii=False, default=_json_default, separators=(",", ":")).encode("utf-8"))
+	return h.hexdigest()
+
+
+def report_digest_stream(kind: str, template_version: int, params: Dict[str, Any], items: Iterable[Any]) -> str:
+	"""Como report_digest, mas consome items um a um (linhas de um cursor, por exemplo)."""
+	h = hashlib.sha256()
+	h.update(f"{kind}:{int(template_version)}\n".encode("utf-8"))
+	h.update(json.dumps(params, sort_keys=True, ensure_ascii=False, default=_json_default, separators=(",", ":")).encode("utf-8"))
+	for item in items:
+		h.update(b"\n")
+		h.update(json.dumps(item, sort_keys=True, ensure_ascii=False, default=_json_default, separators=(",", ":")).encode("utf-8"))
+	return h.hexdigest()
+
+
+class ReportIndex:
+	"""
+	Índice digest -> PDF gerado, guardado em exports_dir/.relatorios_index.json.
+	Cada entrada registra tamanho e mtime do arquivo: se o PDF foi sobrescrito ou apagado
+	depois de indexado, a entrada deixa de valer.
+	"""
+
+	def __init__(self, exports_dir: Path):
+		self.exports_dir = Path(exports_dir)
+		self.path = self.exports_dir / REPORT_INDEX_NAME
+		self.entries: Dict[str, Dict[str, Any]] = {}
+		try:
+			with self.path.open("r", encoding="utf-8") as f:
+				data = json.load(f)
+			if isinstance(data, dict):
+				self.entries = {k: v for k, v in data.items() if isinstance(v, dict)}
+		except (OSError, ValueError):
+			self.entries = {}
+
+	def lookup(self, digest: str) -> Optional[Path]:
+		entry = self.entries.get(digest)
+		if not entry:
+			return None
+		path = self.exports_dir / str(entry.get("file") or "")
+		try:
+			st = path.stat()
+		except OSError:
+			return None
+		if st.st_size != entry.get("size") or st.st_mtime_ns != entry.get("mtime_ns"):
+			return None
+		return path
+
+	def add(self, digest: str, path: Path) -> None:
+		path = Path(path)
+		rel = path.resolve().relative_to(self.exports_dir.resolve()).as_posix()
+		# o arquivo foi regenerado: digests antigos que apontavam para ele não valem mais
+		self.entries = {k: v for k, v in self.entries.items() if v.get("file") != rel}
+		st = path.stat()
+		self.entries[digest] = {"file": rel, "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+	def save(self) -> None:
+		self.exports_dir.mkdir(parents=True, exist_ok=True)
+		tmp = self.path.with_suffix(".tmp")
+		with tmp.open("w", encoding="utf-8") as f:
+			json.dump(self.entries, f, ensure_ascii=False, indent=1)
+		os.replace(tmp, self.path)
+
+
+def reuse_cached_report(index: ReportIndex, digest: str, out: Path) -> bool:
+	"""Se já existe PDF com este digest, garante uma cópia em out e retorna True."""
+	cached = index.lookup(digest)
+	if cached is None:
+		return False
+	if cached.resolve() != Path(out).resolve():
+		Path(out).parent.mkdir(parents=True, exist_ok=True)
+		shutil.copy2(cached, out)
+		index.add(digest, out)
+	return True
+
+
+def register_reports(exports_dir: Path, items: Iterable[Tuple[str, Path]]) -> None:
+	index = ReportIndex(exports_dir)
+	for digest, path in items:
+		index.add(digest, path)
+	index.save()
@@ -0,0 +1,270 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from matplotlib.ticker import FuncFormatter
+
+from utils.formatters import format_brl
+from utils.report_cache import report_digest
+
+
+_PRIMARY = "#2E86AB"
+_SECONDARY = "#18A999"
+_DANGER = "#DC2626"
+_MUTED = "#6B7280"
+
+# Incrementar ao mudar o desenho dos gráficos: invalida os PNGs em cache
+CHART_VERSION = 1
+CHART_DPI = 150
+CHART_FIGSIZE = (4.5, 3.0)
+PORTFOLIO_FIGSIZE = (8.0, 3.2)
+_PIE_MAX_SLICES = 8
+
+
+def draw_balance_bars(fig: Figure, entradas: float, saidas: float, saldo: float) -> None:
+	"""Barras de entradas x saídas (mesmo desenho da aba Gráficos)."""
+	ax = fig.add_subplot(111)
+
+	labels = ["Entradas", "Saídas"]
+	values = [float(entradas), float(saidas)]
+	colors = [_SECONDARY, _DANGER]
+	bars = ax.bar(labels, values, color=colors)
+
+	ax.set_ylabel("R$")
+	ax.tick_params(axis="x", labelrotation=0)
+	ax.grid(axis="y", alpha=0.2)
+
+	for bar, v in zip(bars, values):
+		ax.text(
+			bar.get_x() + bar.get_width() / 2,
+			bar.get_height(),
+			format_brl(v),
+			ha="center",
+			va="bottom",
+			fontsize=9,
+			color=_MUTED,
+		)
+
+	ax.set_title(f"Saldo: {format_brl(saldo)}", color=_PRIMARY)
+	fig.tight_layout()
+
+
+def draw_category_pie(fig: Figure, rows: Sequence[Dict[str, Any]]) -> None:
+	"""Pizza de saídas por categoria, limitada às maiores fatias (mesmo desenho da aba Gráficos)."""
+	ax = fig.add_subplot(111)
+
+	if not rows:
+		ax.text(0.5, 0.5, "Sem dados no mês", ha="center", va="center", color=_MUTED)
+		ax.set_axis_off()
+		return
+
+	labels = [str(r.get("categoria") or "(sem categoria)") for r in rows]
+	values = [float(r.get("total") or 0.0) for r in rows]
+
+	# Limita para manter legível
+	if len(values) > _PIE_MAX_SLICES:
+		top_labels = labels[:_PIE_MAX_SLICES]
+		top_values = values[:_PIE_MAX_SLICES]
+		others = sum(values[_PIE_MAX_SLICES:])
+		if others > 0:
+			top_labels.append("Outros")
+			top_values.append(others)
+		labels, values = top_labels, top_values
+
+	ax.pie(values, labels=labels, autopct="%1.0f%%", textprops={"fontsize": 9, "color": _MUTED})
+	ax.axis("equal")
+	fig.tight_layout()
+
+
+def normalize_category_totals(rows: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
+	"""Ordem e arredondamento estáveis, para que o digest não dependa da origem dos totais."""
+	items = [
+		{"categoria": str(r.get("categoria") or ""), "total": round(float(r.get("total") or 0.0), 2)}
+		for r in rows
+	]
+	items.sort(key=lambda r: (-r["total"], r["categoria"]))
+	return items
+
+
+def category_totals_from_rows(rows: Sequence[Dict[str, Any]], tipo: str = "saida") -> List[Dict[str, Any]]:
+	"""Equivalente a DbManager.get_month_category_totals sobre linhas já carregadas."""
+	totals: Dict[str, float] = {}
+	for r in rows:
+		if r.get("tipo") == tipo and r.get("pago"):
+			cat = r.get("categoria")
+			totals[cat] = totals.get(cat, 0.0) + float(r.get("valor") or 0.0)
+	return normalize_category_totals([{"categoria": k, "total": v} for k, v in totals.items()])
+
+
+def _cached_chart(
+	cache_dir: Path,
+	kind: str,
+	data: Dict[str, Any],
+	draw: Callable[[Figure], None],
+	figsize: Tuple[float, float] = CHART_FIGSIZE,
+) -> Path:
+	"""PNG renderizado com Agg (sem Qt, seguro fora da thread da interface) e guardado pelo digest dos dados."""
+	digest = report_digest(f"grafico-{kind}", CHART_VERSION, dpi=CHART_DPI, figsize=list(figsize), **data)
+	dest = cache_dir / f"{kind}_{digest[:32]}.png"
+	if dest.exists():
+		return dest
+
+	fig = Figure(figsize=figsize, dpi=CHART_DPI)
+	FigureCanvasAgg(fig)
+	draw(fig)
+	cache_dir.mkdir(parents=True, exist_ok=True)
+	# nome temporário por processo: lotes paralelos podem gerar o mesmo gráfico ao mesmo tempo
+	tmp = dest.with_name(f"{dest.stem}.{os.getpid()}.tmp")
+	fig.savefig(str(tmp), dpi=CHART_DPI, format="png")
+	os.replace(tmp, dest)
+	return dest
+
+
+def monthly_chart_images(
+	cache_dir: Path,
+	balance: Tuple[float, float, float],
+	category_totals: Sequence[Dict[str, Any]],
+) -> List[Path]:
+	"""PNGs do relatório mensal: entradas x saídas e, se houver saídas, a pizza por categoria."""
+	entradas, saidas, saldo = (float(v) for v in balance)
+	images = [
+		_cached_chart(
+			cache_dir,
+			"barras",
+			{"balance": [round(entradas, 2), round(saidas, 2), round(saldo, 2)]},
+			lambda fig: draw_balance_bars(fig, entradas, saidas, saldo),
+		)
+	]
+	cats = normalize_category_totals(category_totals)
+	if cats:
+		images.append(_cached_chart(cache_dir, "pizza", {"rows": cats}, lambda fig: draw_category_pie(fig, cats)))
+	return images
+
+
+def draw_portfolio_projection(
+	fig: Figure,
+	labels: Sequence[str],
+	names: Sequence[str],
+	net_by_piggy: Sequence[Sequence[float]],
+	gross_total: Sequence[float],
+) -> None:
+	"""Líquido de cada cofrinho empilhado, com o bruto total da carteira por cima."""
+	ax = fig.add_subplot(111)
+	x = list(range(len(labels)))
+	if net_by_piggy:
+		ax.stackplot(x, *net_by_piggy, labels=list(names), alpha=0.85)
+	ax.plot(x, list(gross_total), color=_DANGER, linewidth=1.5, linestyle="--", label="Bruto (total)")
+	step = max(1, len(labels) // 8)
+	ticks = list(range(0, len(labels), step))
+	ax.set_xticks(ticks)
+	ax.set_xticklabels([labels[j] for j in ticks], fontsize=8)
+	ax.set_ylabel("R$")
+	ax.grid(alpha=0.2)
+	ax.legend(loc="upper left", fontsize=7, ncol=2)
+	fig.tight_layout()
+
+
+def portfolio_chart_image(
+	cache_dir: Path,
+	labels: Sequence[str],
+	names: Sequence[str],
+	net_by_piggy: Sequence[Sequence[float]],
+	gross_total: Sequence[float],
+) -> Path:
+	data = {
+		"labels": list(labels),
+		"names": list(names),
+		"net": [[round(float(v), 2) for v in row] for row in net_by_piggy],
+		"gross": [round(float(v), 2) for v in gross_total],
+	}
+	return _cached_chart(
+		cache_dir,
+		"carteira",
+		data,
+		lambda fig: draw_portfolio_projection(fig, data["labels"], data["names"], data["net"], data["gross"]),
+		figsize=PORTFOLIO_FIGSIZE,
+	)
+
+
+def draw_projection_bands(
+	fig: Figure,
+	labels: Sequence[str],
+	bands: Sequence[Sequence[float]],
+	deterministic: Sequence[float] = (),
+) -> None:
+	"""Faixa P5-P95 e mediana do saldo líquido simulado, com a projeção de CDI constante para comparação."""
+	ax = fig.add_subplot(111)
+	x = list(range(len(labels)))
+	low, mid, high = bands
+	ax.fill_between(x, list(low), list(high), color=_PRIMARY, alpha=0.2, label="P5-P95")
+	ax.plot(x, list(mid), color=_PRIMARY, linewidth=1.5, label="Mediana")
+	if deterministic:
+		ax.plot(x, list(deterministic), color=_MUTED, linewidth=1.0, linestyle="--", label="CDI constante")
+	step = max(1, len(labels) // 8)
+	ticks = list(range(0, len(labels), step))
+	ax.set_xticks(ticks)
+	ax.set_xticklabels([labels[j] for j in ticks], fontsize=8)
+	ax.set_ylabel("R$")
+	ax.grid(alpha=0.2)
+	ax.legend(loc="upper left", fontsize=7)
+	fig.tight_layout()
+
+
+def bands_chart_image(
+	cache_dir: Path,
+	labels: Sequence[str],
+	bands: Sequence[Sequence[float]],
+	deterministic: Sequence[float] = (),
+) -> Path:
+	data = {
+		"labels": list(labels),
+		"bands": [[round(float(v), 2) for v in row] for row in bands],
+		"deterministic": [round(float(v), 2) for v in deterministic],
+	}
+	return _cached_chart(
+		cache_dir,
+		"faixas",
+		data,
+		lambda fig: draw_projection_bands(fig, data["labels"], data["bands"], data["deterministic"]),
+		figsize=PORTFOLIO_FIGSIZE,
+	)
+
+
+def draw_sensitivity_heatmap(
+	fig: Figure,
+	cdi_values: Sequence[float],
+	percent_cdi_values: Sequence[float],
+	values: Any,
+	title: str = "",
+) -> None:
+	"""Mapa de calor do saldo líquido final: CDI a.a. nas linhas e % do CDI nas colunas."""
+	ax = fig.add_subplot(111)
+	cdi = [float(v) for v in cdi_values]
+	pct = [float(v) for v in percent_cdi_values]
+	# imshow com extent: cada célula centrada no valor do eixo, mesmo com um único ponto
+	half_x = (pct[-1] - pct[0]) / (2 * max(1, len(pct) - 1)) or 0.5
+	half_y = (cdi[-1] - cdi[0]) / (2 * max(1, len(cdi) - 1)) or 0.5
+	im = ax.imshow(
+		values,
+		origin="lower",
+		aspect="auto",
+		cmap="viridis",
+		extent=(pct[0] - half_x, pct[-1] + half_x, cdi[0] - half_y, cdi[-1] + half_y),
+	)
+	cbar = fig.colorbar(im, ax=ax)
+	cbar.ax.tick_params(labelsize=7)
+	cbar.ax.yaxis.set_major_formatter(FuncFormatter(lambda v, _pos: format_brl(v)))
+	ax.set_xlabel("% do CDI")
+	ax.set_ylabel("CDI (% a.a.)")
+	ax.tick_params(labelsize=8)
+	if title:
+		ax.set_title(title, color=_PRIMARY, fontsize=10)
+	fig.tight_layout()
+
+
+def chart_cache_dir(exports_dir: Path) -> Path:
+	return Path(exports_dir) / ".graficos"
@@ -1,92 +1,318 @@
 from __future__ import annotations
 
+import itertools
+from functools import lru_cache
 from datetime import date
 from pathlib import Path
-from typing import Any, Dict, List, Tuple
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
 
-from reportlab.lib import colors
 from reportlab.lib.pagesizes import A4
-from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.platypus import LongTable, Paragraph, SimpleDocTemplate, Spacer, TableStyle, Image
+from reportlab.platypus import Flowable, Image, LongTable, Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
 
 from database.db_manager import DbManager
 from utils.formatters import format_brl
+from utils.progress import OperationCancelled, ProgressCallback
+from utils.report_assets import HEADING_FONT, data_table_style, logo_flowable, report_styles
+from utils.report_charts import CHART_FIGSIZE, chart_cache_dir, monthly_chart_images, normalize_category_totals
+from utils.report_cache import ReportIndex, report_digest, report_digest_stream, reuse_cached_report
 
 
 _MONTHS_SHORT = ["jan", "fev", "mar", "abr", "mai", "jun", "jul", "ago", "set", "out", "nov", "dez"]
 
+# Incrementar ao mudar o layout dos PDFs: invalida os relatórios em cache
+TEMPLATE_VERSION = 4
+# Linhas entre duas chamadas do callback de progresso
+_PROGRESS_CHUNK = 500
+
+
+def monthly_report_digest(
+	year: int,
+	month: int,
+	balance: Tuple[float, float, float],
+	rows: Iterable[Dict[str, Any]],
+	category_totals: Sequence[Dict[str, Any]] = (),
+) -> str:
+	"""Digest do relatório mensal; rows pode ser lista ou iterador de cursor."""
+	params = {
+		"year": int(year),
+		"month": int(month),
+		"balance": [float(v) for v in balance],
+		"categories": normalize_category_totals(category_totals),
+	}
+	return report_digest_stream("mensal", TEMPLATE_VERSION, params, rows)
+
+
+def annual_report_digest(year: int, balances: Dict[Tuple[int, int], Tuple[float, float, float]]) -> str:
+	months = [list(balances.get((int(year), m), (0.0, 0.0, 0.0))) for m in range(1, 13)]
+	return report_digest("anual", TEMPLATE_VERSION, year=int(year), months=months)
+
+
+_TX_HEADER = ["Data", "Tipo", "Categoria", "Descrição", "Valor"]
+_TX_COL_WIDTHS = [70, 55, 120, 210, 70]
+_TX_HEADER_HEIGHT = 17
+_TX_ROW_HEIGHT = 16
+
+
+class _StreamedStory(list):
+	"""
+	Story que se reabastece de um gerador de flowables, para o PDF não montar todas as
+	tabelas de transações antes do build.
+
+	Depende de um detalhe interno (não documentado) do ReportLab (testado na 5.0):
+	BaseDocTemplate.build repete `while len(flowables)` e handle_flowable lê
+	flowables[0], faz `del flowables[0]` e devolve as partes de um split com
+	`flowables[0:0] = ...` ou `insert(0, ...)`. Ou seja, a lista só é consumida pela
+	frente, e basta manter alguns itens à frente em __len__/__getitem__. Se uma versão
+	nova do ReportLab copiar a lista ou iterar sobre ela, o relatório sai truncado.
+	"""
+
+	def __init__(self, head: List[Flowable], tail: Iterator[Flowable], ahead: int = 2):
+		super().__init__(head)
+		self._tail = tail
+		self._ahead = ahead
+
+	def _fill(self) -> None:
+		while self._tail is not None and list.__len__(self) < self._ahead:
+			nxt = next(self._tail, None)
+			if nxt is None:
+				self._tail = None
+			else:
+				self.append(nxt)
+
+	def __len__(self) -> int:
+		self._fill()
+		return list.__len__(self)
+
+	def __getitem__(self, i):
+		self._fill()
+		return list.__getitem__(self, i)
+
+
+def _check_progress(progress: Optional[ProgressCallback], done: int, total: int) -> None:
+	if progress is not None and progress(done, total) is False:
+		raise OperationCancelled("Relatório cancelado")
+
+
+def _with_progress(
+	rows: Iterable[Dict[str, Any]], progress: Optional[ProgressCallback], total: int
+) -> Iterator[Dict[str, Any]]:
+	"""Repassa as linhas avisando progress a cada _PROGRESS_CHUNK; cancela se ele retornar False."""
+	done = 0
+	for row in rows:
+		yield row
+		done += 1
+		if done % _PROGRESS_CHUNK == 0:
+			_check_progress(progress, done, total)
+
+
+def _offset_progress(progress: Optional[ProgressCallback], offset: int) -> Optional[ProgressCallback]:
+	if progress is None:
+		return None
+	return lambda done, total: progress(offset + done, total)
+
+
+def _charts_row(images: List[Path], width: float) -> Table:
+	"""Gráficos lado a lado, ocupando a largura útil da página."""
+	cell_w = width / 2
+	img_w = cell_w - 8
+	img_h = img_w * CHART_FIGSIZE[1] / CHART_FIGSIZE[0]
+	cells = [Image(str(p), width=img_w, height=img_h) for p in images]
+	cells += [""] * (2 - len(cells))
+	table = Table([cells], colWidths=[cell_w, cell_w])
+	table.setStyle(TableStyle([("ALIGN", (0, 0), (-1, -1), "CENTER"), ("VALIGN", (0, 0), (-1, -1), "MIDDLE")]))
+	return table
+
+
+def _rows_per_page(doc: SimpleDocTemplate) -> int:
+	# altura útil do frame (padding de 6pt em cima e embaixo) menos o cabeçalho repetido
+	return max(1, int((doc.height - 12 - _TX_HEADER_HEIGHT) // _TX_ROW_HEIGHT))
+
+
+def _transaction_row(r: Dict[str, Any]) -> List[str]:
+	descr_txt = " ".join(str(r.get("descricao") or "").split())
+	return [
+		str(r.get("data") or ""),
+		str(r.get("tipo") or ""),
+		str(r.get("categoria") or ""),
+		descr_txt,
+		format_brl(float(r.get("valor") or 0.0)),
+	]
+
+
+def _transaction_tables(rows: Iterator[Dict[str, Any]], per_table: int) -> Iterator[Table]:
+	"""Tabelas de até per_table linhas, com larguras, alturas e estilo fixos (sem medir células)."""
+	while True:
+		chunk = [_transaction_row(r) for r in itertools.islice(rows, per_table)]
+		if not chunk:
+			return
+		table = Table(
+			[_TX_HEADER] + chunk,
+			colWidths=_TX_COL_WIDTHS,
+			rowHeights=[_TX_HEADER_HEIGHT] + [_TX_ROW_HEIGHT] * len(chunk),
+			repeatRows=1,
+		)
+		table.setStyle(data_table_style(numeric_from=-1, valign_top=True))
+		yield table
+
 
 def generate_monthly_report_pdf(
 	db: DbManager,
 	exports_dir: Path,
 	year: int,
 	month: int,
+	use_cache: bool = True,
+	progress: Optional[ProgressCallback] = None,
 ) -> Path:
+	"""
+	Gera (ou reaproveita do cache) o relatório mensal. Se informado, progress recebe as
+	linhas já lidas nas passagens de digest e de montagem do PDF e pode cancelar a geração
+	retornando False (OperationCancelled; nenhum PDF parcial fica em exports_dir).
+	"""
 	exports_dir.mkdir(parents=True, exist_ok=True)
 	month_label = _MONTHS_SHORT[month - 1]
 	out = exports_dir / f"relatorio_{month_label}_{year}.pdf"
 
-	entradas, saidas, saldo = db.get_month_balance(year, month)
-	rows = db.list_month_transactions(year, month)
+	# As linhas vêm do cursor nas duas passagens (digest e PDF): memória não cresce com o mês
+	balance = db.get_month_balance(year, month)
+	category_totals = db.get_month_category_totals(year, month, "saida")
+	charts_dir = chart_cache_dir(exports_dir)
+	count = 0
+	if progress is not None:
+		start = date(year, month, 1)
+		count = db.count_transactions_between(start, date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1))
+	if not use_cache:
+		return render_monthly_report_pdf(
+			out, year, month, balance, db.iter_month_transactions(year, month), category_totals, charts_dir,
+			progress=progress, total=count,
+		)
 
-	doc = SimpleDocTemplate(str(out), pagesize=A4, title="Relatório mensal")
-	styles = getSampleStyleSheet()
+	# Mesmos dados e mesmo layout: reaproveita o PDF já gerado
+	index = ReportIndex(exports_dir)
+	rows = _with_progress(db.iter_month_transactions(year, month), progress, 2 * count)
+	digest = monthly_report_digest(year, month, balance, rows, category_totals)
+	if not reuse_cached_report(index, digest, out):
+		render_monthly_report_pdf(
+			out, year, month, balance, db.iter_month_transactions(year, month), category_totals, charts_dir,
+			progress=_offset_progress(progress, count), total=2 * count,
+		)
+		index.add(digest, out)
+	index.save()
+	return out
+
+
+def render_monthly_report_pdf(
+	out: Path,
+	year: int,
+	month: int,
+	balance: Tuple[float, float, float],
+	rows: Iterable[Dict[str, Any]],
+	category_totals: Sequence[Dict[str, Any]] = (),
+	charts_dir: Optional[Path] = None,
+	progress: Optional[ProgressCallback] = None,
+	total: int = 0,
+) -> Path:
+	"""
+	Monta o PDF mensal. rows pode ser uma lista ou um iterador de cursor: a tabela é
+	emitida em blocos do tamanho de uma página, consumidos sob demanda pelo build.
+	Com charts_dir, inclui os gráficos do mês (PNGs em cache nessa pasta).
+	progress é consultado antes dos gráficos e a cada _PROGRESS_CHUNK linhas (de total);
+	o PDF é montado em um arquivo temporário e só substitui out ao final.
+	"""
+	month_label = _MONTHS_SHORT[month - 1]
+	entradas, saidas, saldo = balance
+
+	tmp = out.with_name(out.name + ".part")
+	doc = SimpleDocTemplate(str(tmp), pagesize=A4, title="Relatório mensal")
+	styles = report_styles()
 
 	story = []
 	# Inserir logo no topo
-	logo_path = Path(__file__).resolve().parent.parent / "logo" / "Gemini_Generated_Image_vwaqrtvwaqrtvwaq(1).png"
-	if logo_path.exists():
-		try:
-			img = Image(str(logo_path))
-			w, h = float(getattr(img, "imageWidth", 0) or 0), float(getattr(img, "imageHeight", 0) or 0)
-			if w > 0 and h > 0:
-				target_w = 120.0
-				img.drawWidth = target_w
-				img.drawHeight = target_w * (h / w)
-			story.append(img)
-			story.append(Spacer(1, 8))
-		except Exception:
-			pass
+	logo = logo_flowable()
+	if logo is not None:
+		story.append(logo)
+		story.append(Spacer(1, 8))
 	story.append(Paragraph(f"Relatório mensal — {month_label.upper()}/{year}", styles["Title"]))
 	story.append(Spacer(1, 10))
 	story.append(Paragraph(f"Entradas: <b>{format_brl(entradas)}</b>", styles["Normal"]))
 	story.append(Paragraph(f"Saídas: <b>{format_brl(saidas)}</b>", styles["Normal"]))
 	story.append(Paragraph(f"Saldo: <b>{format_brl(saldo)}</b>", styles["Normal"]))
 	story.append(Spacer(1, 12))
+	try:
+		if charts_dir is not None:
+			_check_progress(progress, 0, total)
+			story.append(_charts_row(monthly_chart_images(charts_dir, balance, category_totals), doc.width))
+			story.append(Spacer(1, 12))
 
-	table_data: List[List[str]] = [["Data", "Tipo", "Categoria", "Descrição", "Valor"]]
-	for r in rows:
-		data_txt = str(r.get("data") or "")
-		tipo_txt = str(r.get("tipo") or "")
-		cat_txt = str(r.get("categoria") or "")
-		descr_txt = str(r.get("descricao") or "")
-		valor = float(r.get("valor") or 0.0)
-		table_data.append([data_txt, tipo_txt, cat_txt, descr_txt, format_brl(valor)])
-
-	if len(table_data) == 1:
-		story.append(Paragraph("Sem transações no período.", styles["Italic"]))
-		doc.build(story)
-		return out
-
-	table = LongTable(
-		table_data,
-		repeatRows=1,
-		colWidths=[70, 55, 120, 210, 70],
-	)
-	table.setStyle(
-		TableStyle(
-			[
-				("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#F3F4F6")),
-				("TEXTCOLOR", (0, 0), (-1, 0), colors.HexColor("#374151")),
-				("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-				("FONTSIZE", (0, 0), (-1, 0), 9),
-				("ALIGN", (-1, 1), (-1, -1), "RIGHT"),
-				("VALIGN", (0, 0), (-1, -1), "TOP"),
-				("GRID", (0, 0), (-1, -1), 0.25, colors.HexColor("#E5E7EB")),
-				("FONTSIZE", (0, 1), (-1, -1), 8),
-			]
-		)
-	)
+		rows = iter(rows)
+		first = next(rows, None)
+		if first is None:
+			story.append(Paragraph("Sem transações no período.", styles["Italic"]))
+			doc.build(story)
+		else:
+			per_table = _rows_per_page(doc)
+			rows = _with_progress(itertools.chain([first], rows), progress, total)
+			doc.build(_StreamedStory(story, _transaction_tables(rows, per_table)))
+		tmp.replace(out)
+	except BaseException:
+		tmp.unlink(missing_ok=True)
+		raise
+	return out
+
+
+@lru_cache(maxsize=None)
+def _annual_table_style() -> TableStyle:
+	return TableStyle([("FONTNAME", (0, -1), (-1, -1), HEADING_FONT), ("FONTSIZE", (0, -1), (-1, -1), 9)], parent=data_table_style())
+
+
+def generate_annual_report_pdf(
+	db: DbManager,
+	exports_dir: Path,
+	year: int,
+	use_cache: bool = True,
+) -> Path:
+	exports_dir.mkdir(parents=True, exist_ok=True)
+	out = exports_dir / f"relatorio_anual_{year}.pdf"
+	balances = db.get_monthly_balances(date(year, 1, 1), date(year + 1, 1, 1))
+	if not use_cache:
+		return render_annual_report_pdf(out, year, balances)
+
+	index = ReportIndex(exports_dir)
+	digest = annual_report_digest(year, balances)
+	if not reuse_cached_report(index, digest, out):
+		render_annual_report_pdf(out, year, balances)
+		index.add(digest, out)
+	index.save()
+	return out
+
+
+def render_annual_report_pdf(
+	out: Path,
+	year: int,
+	balances: Dict[Tuple[int, int], Tuple[float, float, float]],
+) -> Path:
+	"""Resumo anual (uma linha por mês) a partir de get_monthly_balances."""
+	doc = SimpleDocTemplate(str(out), pagesize=A4, title="Relatório anual")
+	styles = report_styles()
+
+	story = []
+	logo = logo_flowable()
+	if logo is not None:
+		story.append(logo)
+		story.append(Spacer(1, 8))
+	story.append(Paragraph(f"Relatório anual — {year}", styles["Title"]))
+	story.append(Spacer(1, 12))
+
+	table_data: List[List[str]] = [["Mês", "Entradas", "Saídas", "Saldo"]]
+	tot_e = tot_s = 0.0
+	for month in range(1, 13):
+		entradas, saidas, saldo = balances.get((year, month), (0.0, 0.0, 0.0))
+		tot_e += entradas
+		tot_s += saidas
+		table_data.append([_MONTHS_SHORT[month - 1].upper(), format_brl(entradas), format_brl(saidas), format_brl(saldo)])
+	table_data.append(["Total", format_brl(tot_e), format_brl(tot_s), format_brl(tot_e - tot_s)])
+
+	table = LongTable(table_data, repeatRows=1, colWidths=[80, 120, 120, 120])
+	table.setStyle(_annual_table_style())
 	story.append(table)
 
 	doc.build(story)
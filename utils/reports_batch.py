@@ -0,0 +1,199 @@
+from __future__ import annotations
+
+import json
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from database.db_manager import DbManager
+from utils.batch import batch_chart_dir, batch_db, batch_report_index, init_batch_worker
+from utils.report_cache import register_reports, reuse_cached_report
+from utils.report_charts import category_totals_from_rows
+from utils.reports import (
+	_MONTHS_SHORT,
+	annual_report_digest,
+	monthly_report_digest,
+	render_annual_report_pdf,
+	render_monthly_report_pdf,
+)
+
+
+def month_range(start: Tuple[int, int], end: Tuple[int, int]) -> List[Tuple[int, int]]:
+	"""Lista (ano, mês) de start até end, inclusive."""
+	(y, m), months = start, []
+	while (y, m) <= end:
+		months.append((y, m))
+		y, m = (y + 1, 1) if m == 12 else (y, m + 1)
+	return months
+
+
+def _render_chunk(
+	out_dir: str,
+	user_id: int,
+	profile_id: int,
+	months: Sequence[Tuple[int, int]],
+	annual: bool,
+) -> List[Dict[str, Any]]:
+	"""Gera os PDFs de um perfil em um ano com duas consultas (saldos agrupados + transações)."""
+	db = batch_db()
+	index = batch_report_index()
+	db.set_current_user(int(user_id))
+	db.set_current_profile(int(profile_id))
+
+	year = months[0][0]
+	last_m = months[-1][1]
+	start = date(year, 1, 1) if annual else date(year, months[0][1], 1)
+	end = date(year + 1, 1, 1) if annual or last_m == 12 else date(year, last_m + 1, 1)
+
+	balances = db.get_monthly_balances(start, end)
+	by_month: Dict[int, List[Dict[str, Any]]] = defaultdict(list)
+	for r in db.list_transactions_between(start, end):
+		by_month[int(str(r.get("data") or "")[5:7])].append(r)
+
+	target = Path(out_dir) / f"{int(user_id)}_{int(profile_id)}"
+	target.mkdir(parents=True, exist_ok=True)
+
+	def emit(out: Path, month: Optional[int], digest: str, render: Callable[[], Any]) -> None:
+		cached = index is not None and reuse_cached_report(index, digest, out)
+		if not cached:
+			render()
+		files.append(
+			{
+				"year": year,
+				"month": month,
+				"file": out.relative_to(out_dir).as_posix(),
+				"bytes": out.stat().st_size,
+				"digest": digest,
+				"cached": cached,
+			}
+		)
+
+	files: List[Dict[str, Any]] = []
+	for _, month in months:
+		out = target / f"relatorio_{_MONTHS_SHORT[month - 1]}_{year}.pdf"
+		balance = balances.get((year, month), (0.0, 0.0, 0.0))
+		rows = by_month.get(month, [])
+		cats = category_totals_from_rows(rows)
+		emit(
+			out,
+			month,
+			monthly_report_digest(year, month, balance, rows, cats),
+			lambda: render_monthly_report_pdf(out, year, month, balance, rows, cats, batch_chart_dir()),
+		)
+	if annual:
+		out = target / f"relatorio_anual_{year}.pdf"
+		emit(out, None, annual_report_digest(year, balances), lambda: render_annual_report_pdf(out, year, balances))
+	return files
+
+
+def _render_batch_item(
+	out_dir: str,
+	user_id: int,
+	profile_id: int,
+	months: Sequence[Tuple[int, int]],
+	annual: bool,
+) -> Dict[str, Any]:
+	entry: Dict[str, Any] = {"files": []}
+	started = time.perf_counter()
+	try:
+		entry.update(status="ok", files=_render_chunk(out_dir, user_id, profile_id, months, annual))
+	except Exception as e:
+		entry.update(status="erro", error=str(e))
+	entry["seconds"] = round(time.perf_counter() - started, 3)
+	return entry
+
+
+def generate_reports_batch(
+	db_path: Path,
+	exports_dir: Path,
+	start: Tuple[int, int],
+	end: Tuple[int, int],
+	targets: Optional[Sequence[Tuple[int, int]]] = None,
+	annual: bool = False,
+	max_workers: Optional[int] = None,
+	use_cache: bool = True,
+) -> Path:
+	"""
+	Gera os relatórios mensais de start a end (ano, mês), inclusive, e opcionalmente os
+	anuais, para os perfis em targets [(user_id, profile_id)] ou para todos os perfis.
+	Cada (perfil, ano) é um item do pool de processos, com conexão somente leitura por
+	processo e uma única busca agrupada dos dados do ano.
+	Os PDFs vão para exports_dir/lote_relatorios_<timestamp>/<usuario>_<perfil>/ junto com
+	um manifest.json. Com use_cache, meses cujos dados não mudaram desde a última geração
+	são copiados do PDF em cache (índice de digests em exports_dir) em vez de renderizados.
+	Retorna o caminho do manifesto.
+	Deve ser chamado sob `if __name__ == "__main__"` (Windows usa spawn).
+	"""
+	months = month_range(start, end)
+	if not months:
+		raise ValueError("Período vazio: o mês inicial é posterior ao final")
+
+	started = time.perf_counter()
+	out_dir = exports_dir / f"lote_relatorios_{datetime.now().strftime('%Y%m%d-%H%M%S')}"
+	out_dir.mkdir(parents=True, exist_ok=True)
+
+	db = DbManager(db_path, read_only=True)
+	with db._connect() as conn:
+		profiles = [
+			dict(r)
+			for r in conn.execute(
+				"""
+				SELECT u.id AS user_id, u.nome AS usuario, p.id AS profile_id, p.nome AS perfil
+				FROM perfis_financeiros p JOIN usuarios u ON u.id = p.usuario_id
+				ORDER BY u.id, p.id
+				"""
+			).fetchall()
+		]
+	if targets is not None:
+		wanted = {(int(u), int(p)) for u, p in targets}
+		profiles = [t for t in profiles if (t["user_id"], t["profile_id"]) in wanted]
+
+	by_year: Dict[int, List[Tuple[int, int]]] = defaultdict(list)
+	for year, month in months:
+		by_year[year].append((year, month))
+
+	entries = {
+		(t["user_id"], t["profile_id"]): {**t, "status": "ok", "seconds": 0.0, "files": []}
+		for t in profiles
+	}
+	with ProcessPoolExecutor(
+		max_workers=max_workers,
+		initializer=init_batch_worker,
+		initargs=(str(db_path), str(exports_dir), use_cache),
+	) as pool:
+		futures = {
+			pool.submit(_render_batch_item, str(out_dir), t["user_id"], t["profile_id"], chunk, annual): (t["user_id"], t["profile_id"])
+			for t in profiles
+			for chunk in by_year.values()
+		}
+		for fut in as_completed(futures):
+			entry, result = entries[futures[fut]], fut.result()
+			entry["files"].extend(result["files"])
+			entry["seconds"] = round(entry["seconds"] + result["seconds"], 3)
+			if result["status"] != "ok":
+				entry.update(status="erro", error=result["error"])
+
+	for entry in entries.values():
+		entry["files"].sort(key=lambda f: (f["year"], f["month"] or 13))
+	if use_cache:
+		register_reports(
+			exports_dir,
+			[(f["digest"], out_dir / f["file"]) for e in entries.values() for f in e["files"]],
+		)
+	manifest = {
+		"generated_at": datetime.now().isoformat(timespec="seconds"),
+		"start": "%04d-%02d" % start,
+		"end": "%04d-%02d" % end,
+		"annual": bool(annual),
+		"rendered": sum(1 for e in entries.values() for f in e["files"] if not f["cached"]),
+		"cached": sum(1 for e in entries.values() for f in e["files"] if f["cached"]),
+		"seconds": round(time.perf_counter() - started, 3),
+		"profiles": [entries[k] for k in sorted(entries)],
+	}
+	manifest_path = out_dir / "manifest.json"
+	with manifest_path.open("w", encoding="utf-8") as f:
+		json.dump(manifest, f, ensure_ascii=False, indent=2)
+	return manifest_path
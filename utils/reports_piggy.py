@@ -1,27 +1,45 @@
 from __future__ import annotations
 
+from dataclasses import asdict
 from datetime import date
 from pathlib import Path
+from typing import Optional
 
-from reportlab.lib import colors
+import numpy as np
 from reportlab.lib.pagesizes import A4
-from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.platypus import LongTable, Paragraph, SimpleDocTemplate, Spacer, TableStyle, Image
+from reportlab.platypus import Image, LongTable, Paragraph, SimpleDocTemplate, Spacer
 
 from database.db_manager import DbManager
 from utils.formatters import format_brl
-from utils.investments import annual_rate_from_cdi, project_piggy
+from utils.cdi_simulation import CdiModel, simulate_piggy
+from utils.investments import annual_rate_from_cdi, cached_portfolio, monthly_projection
+from utils.report_assets import data_table_style, logo_flowable, report_styles
+from utils.report_cache import ReportIndex, report_digest, reuse_cached_report
+from utils.report_charts import PORTFOLIO_FIGSIZE, bands_chart_image, chart_cache_dir, portfolio_chart_image
 
 
 _MONTHS_SHORT = ["jan", "fev", "mar", "abr", "mai", "jun", "jul", "ago", "set", "out", "nov", "dez"]
 
+# Incrementar ao mudar o layout do PDF: invalida os relatórios em cache
+TEMPLATE_VERSION = 3
+
 
 def generate_piggy_projection_report_pdf(
 	db: DbManager,
 	exports_dir: Path,
 	piggy_id: int,
 	horizon_months: int = 12,
+	use_cache: bool = True,
+	model: Optional[CdiModel] = None,
+	simulation_workers: Optional[int] = 1,
+	daily: bool = False,
+	per_lot: bool = False,
 ) -> Path:
+	"""
+	Projeção de um cofrinho com CDI constante (juros mensais ou, com daily, por dia útil;
+	com per_lot, IR/IOF por aporte). Com model, inclui também as faixas P5/P50/P95 do
+	saldo líquido simuladas por Monte Carlo (gráfico e tabela).
+	"""
 	exports_dir.mkdir(parents=True, exist_ok=True)
 
 	row = db.get_piggy_bank(int(piggy_id))
@@ -38,38 +56,62 @@ def generate_piggy_projection_report_pdf(
 	aplicar = bool(row.get("aplicar_impostos"))
 
 	annual = annual_rate_from_cdi(cdi_aa, percent_cdi)
-	points = project_piggy(
+	points = monthly_projection(
 		start=inicio,
 		principal=principal,
 		aporte_mensal=aporte,
 		annual_rate=annual,
 		horizon_months=int(horizon_months),
 		aplicar_impostos=aplicar,
-	)
+		daily=daily,
+		per_lot=per_lot,
+	).to_points()
 
 	month_label = _MONTHS_SHORT[inicio.month - 1]
-	out = exports_dir / f"cofrinho_{piggy_id}_{month_label}_{inicio.year}_proj_{horizon_months}m.pdf"
+	suffix = ("_du" if daily else "") + ("_lotes" if per_lot else "") + ("_mc" if model is not None else "")
+	out = exports_dir / f"cofrinho_{piggy_id}_{month_label}_{inicio.year}_proj_{horizon_months}m{suffix}.pdf"
+
+	index = ReportIndex(exports_dir) if use_cache else None
+	if index is not None:
+		# Parâmetros e pontos projetados: qualquer mudança no cofrinho ou no cálculo gera outro digest.
+		# A simulação é determinística (semente no modelo), então basta o modelo no digest: com
+		# o PDF em cache, o Monte Carlo nem chega a rodar
+		digest = report_digest(
+			"cofrinho",
+			TEMPLATE_VERSION,
+			nome=nome,
+			instituicao=inst,
+			percent_cdi=percent_cdi,
+			cdi_aa=cdi_aa,
+			principal=principal,
+			aporte=aporte,
+			inicio=inicio,
+			aplicar_impostos=aplicar,
+			horizon_months=int(horizon_months),
+			points=points,
+			model=None if model is None else asdict(model),
+		)
+		if reuse_cached_report(index, digest, out):
+			index.save()
+			return out
+
+	bands = None
+	if model is not None:
+		bands = simulate_piggy(
+			inicio, principal, aporte, cdi_aa, percent_cdi, int(horizon_months), aplicar, model, max_workers=simulation_workers
+		)
 
 	doc = SimpleDocTemplate(str(out), pagesize=A4, title="Relatório de cofrinho")
-	styles = getSampleStyleSheet()
+	styles = report_styles()
 
 	story = []
 	# Inserir logo no topo
-	logo_path = Path(__file__).resolve().parent.parent / "logo" / "Gemini_Generated_Image_vwaqrtvwaqrtvwaq(1).png"
-	if logo_path.exists():
-		try:
-			img = Image(str(logo_path))
-			w, h = float(getattr(img, "imageWidth", 0) or 0), float(getattr(img, "imageHeight", 0) or 0)
-			if w > 0 and h > 0:
-				target_w = 120.0
-				img.drawWidth = target_w
-				img.drawHeight = target_w * (h / w)
-			story.append(img)
-			story.append(Spacer(1, 8))
-		except Exception:
-			pass
+	logo = logo_flowable()
+	if logo is not None:
+		story.append(logo)
+		story.append(Spacer(1, 8))
 	story.append(Paragraph(f"Cofrinho — {nome}", styles["Title"]))
-	story.append(Paragraph(f"Instituição: <b>{inst}</b>", styles["Normal"]))
+	story.append(Paragraph(f"Instituição: <b>{inst}</b>", styles["Subtitle"]))
 	story.append(
 		Paragraph(
 			f"Parâmetros: <b>{percent_cdi:.2f}%</b> do CDI | CDI <b>{cdi_aa:.2f}% a.a.</b> | Impostos: <b>{'sim' if aplicar else 'não'}</b>",
@@ -80,8 +122,11 @@ def generate_piggy_projection_report_pdf(
 	story.append(Spacer(1, 10))
 	story.append(
 		Paragraph(
-			"Observação: projeção é uma aproximação (juros compostos mensais). IR/IOF são estimados como se houvesse resgate em cada mês.",
-			styles["Italic"],
+			"Observação: projeção é uma aproximação "
+			+ ("(juros por dia útil, base 252). " if daily else "(juros compostos mensais). ")
+			+ "IR/IOF são estimados como se houvesse resgate em cada mês"
+			+ (", por aporte (cada um com o seu prazo)." if per_lot else "."),
+			styles["Note"],
 		)
 	)
 	story.append(Spacer(1, 12))
@@ -102,20 +147,203 @@ def generate_piggy_projection_report_pdf(
 		)
 
 	table = LongTable(table_data, repeatRows=1, colWidths=[70, 78, 78, 78, 78, 78])
-	table.setStyle(
-		TableStyle(
+	table.setStyle(data_table_style())
+	story.append(table)
+
+	if bands is not None:
+		story.append(Spacer(1, 14))
+		story.append(Paragraph("Cenários de CDI (Monte Carlo)", styles["Heading2"]))
+		theta = cdi_aa if model.theta is None else model.theta
+		story.append(
+			Paragraph(
+				f"{bands.n_paths} trajetórias | média de longo prazo <b>{theta:.2f}% a.a.</b> | "
+				f"reversão <b>{model.kappa:.2f}</b>/ano | volatilidade <b>{model.sigma:.2f}</b> p.p./ano | semente {model.seed}",
+				styles["Normal"],
+			)
+		)
+		story.append(Spacer(1, 6))
+		labels = [f"{_MONTHS_SHORT[p.ref_date.month - 1]}/{str(p.ref_date.year)[-2:]}" for p in points]
+		chart = bands_chart_image(
+			chart_cache_dir(exports_dir),
+			labels,
+			bands.saldo_liquido.tolist(),
+			[p.saldo_liquido for p in points],
+		)
+		story.append(Image(str(chart), width=doc.width, height=doc.width * PORTFOLIO_FIGSIZE[1] / PORTFOLIO_FIGSIZE[0]))
+		story.append(Spacer(1, 8))
+
+		band_data = [["Mês", "CDI P50", "Líquido P5", "Líquido P50", "Líquido P95"]]
+		for j, p in enumerate(points):
+			band_data.append(
+				[
+					f"{_MONTHS_SHORT[p.ref_date.month - 1]}/{p.ref_date.year}",
+					f"{bands.cdi[1, j]:.2f}%",
+					format_brl(float(bands.saldo_liquido[0, j])),
+					format_brl(float(bands.saldo_liquido[1, j])),
+					format_brl(float(bands.saldo_liquido[2, j])),
+				]
+			)
+		table = LongTable(band_data, repeatRows=1, colWidths=[70, 70, 96, 96, 96])
+		table.setStyle(data_table_style())
+		story.append(table)
+
+	doc.build(story)
+	if index is not None:
+		index.add(digest, out)
+		index.save()
+	return out
+
+
+def generate_portfolio_projection_report_pdf(
+	db: DbManager,
+	exports_dir: Path,
+	horizon_months: int = 12,
+	first_month: Optional[date] = None,
+	use_cache: bool = True,
+) -> Path:
+	"""
+	Relatório consolidado de todos os cofrinhos do perfil atual: uma projeção em lote no
+	mesmo calendário (a partir do mês atual), com aportes, bruto, IOF, IR e líquido somados
+	por mês, a posição final de cada cofrinho e um gráfico da evolução da carteira.
+	"""
+	exports_dir.mkdir(parents=True, exist_ok=True)
+	rows = db.list_piggy_banks()
+	if not rows:
+		raise ValueError("Nenhum cofrinho no perfil")
+	rows.sort(key=lambda r: int(r.get("id") or 0))
+	first_month = (first_month or date.today()).replace(day=1)
+	horizon_months = int(horizon_months)
+
+	names = [str(r.get("nome") or "") for r in rows]
+	params = [
+		{
+			"nome": names[i],
+			"instituicao": str(r.get("instituicao") or ""),
+			"percent_cdi": float(r.get("percent_cdi") or 0.0),
+			"cdi_aa": float(r.get("cdi_aa") or 0.0),
+			"principal": float(r.get("principal") or 0.0),
+			"aporte": float(r.get("aporte_mensal") or 0.0),
+			"inicio": date.fromisoformat(str(r.get("data_inicio"))),
+			"aplicar_impostos": bool(r.get("aplicar_impostos")),
+		}
+		for i, r in enumerate(rows)
+	]
+	proj = cached_portfolio(
+		starts=[p["inicio"] for p in params],
+		principal=[p["principal"] for p in params],
+		aporte_mensal=[p["aporte"] for p in params],
+		annual_rate=[annual_rate_from_cdi(p["cdi_aa"], p["percent_cdi"]) for p in params],
+		aplicar_impostos=[p["aplicar_impostos"] for p in params],
+		first_month=first_month,
+		horizon_months=horizon_months,
+	)
+	totals = {
+		field: getattr(proj, field).sum(axis=0)
+		for field in ("total_aportes", "saldo_bruto", "rendimento_bruto", "iof", "ir", "saldo_liquido")
+	}
+	months = [d.astype(object) for d in proj.ref_date[0]]
+	labels = [f"{_MONTHS_SHORT[d.month - 1]}/{str(d.year)[-2:]}" for d in months]
+
+	out = exports_dir / f"carteira_cofrinhos_{_MONTHS_SHORT[first_month.month - 1]}_{first_month.year}_proj_{horizon_months}m.pdf"
+	index = ReportIndex(exports_dir) if use_cache else None
+	if index is not None:
+		digest = report_digest(
+			"carteira",
+			TEMPLATE_VERSION,
+			cofrinhos=params,
+			first_month=first_month,
+			horizon_months=horizon_months,
+			liquido=np.round(proj.saldo_liquido, 2).tolist(),
+			bruto=np.round(proj.saldo_bruto, 2).tolist(),
+		)
+		if reuse_cached_report(index, digest, out):
+			index.save()
+			return out
+
+	doc = SimpleDocTemplate(str(out), pagesize=A4, title="Carteira de cofrinhos")
+	styles = report_styles()
+
+	story = []
+	logo = logo_flowable()
+	if logo is not None:
+		story.append(logo)
+		story.append(Spacer(1, 8))
+	story.append(Paragraph("Carteira de cofrinhos", styles["Title"]))
+	story.append(
+		Paragraph(
+			f"{len(rows)} cofrinho(s) | Projeção de {horizon_months} meses a partir de "
+			f"{_MONTHS_SHORT[first_month.month - 1]}/{first_month.year}",
+			styles["Subtitle"],
+		)
+	)
+	story.append(Spacer(1, 6))
+	story.append(
+		Paragraph(
+			f"Líquido ao final: <b>{format_brl(float(totals['saldo_liquido'][-1]))}</b> | "
+			f"Bruto: <b>{format_brl(float(totals['saldo_bruto'][-1]))}</b> | "
+			f"Aportes: <b>{format_brl(float(totals['total_aportes'][-1]))}</b>",
+			styles["Normal"],
+		)
+	)
+	story.append(Spacer(1, 10))
+
+	chart = portfolio_chart_image(
+		chart_cache_dir(exports_dir),
+		labels,
+		names,
+		proj.saldo_liquido.tolist(),
+		totals["saldo_bruto"].tolist(),
+	)
+	chart_w = doc.width
+	story.append(Image(str(chart), width=chart_w, height=chart_w * PORTFOLIO_FIGSIZE[1] / PORTFOLIO_FIGSIZE[0]))
+	story.append(Spacer(1, 10))
+
+	# Posição de cada cofrinho no último mês
+	piggy_table = [["Cofrinho", "Instituição", "%CDI", "Aportes", "Bruto", "Impostos", "Líquido"]]
+	for i, p in enumerate(params):
+		piggy_table.append(
 			[
-				("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#F3F4F6")),
-				("TEXTCOLOR", (0, 0), (-1, 0), colors.HexColor("#374151")),
-				("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-				("FONTSIZE", (0, 0), (-1, 0), 9),
-				("ALIGN", (1, 1), (-1, -1), "RIGHT"),
-				("GRID", (0, 0), (-1, -1), 0.25, colors.HexColor("#E5E7EB")),
-				("FONTSIZE", (0, 1), (-1, -1), 8),
+				p["nome"],
+				p["instituicao"],
+				f"{p['percent_cdi']:.0f}%",
+				format_brl(float(proj.total_aportes[i, -1])),
+				format_brl(float(proj.saldo_bruto[i, -1])),
+				format_brl(float(proj.iof[i, -1] + proj.ir[i, -1])),
+				format_brl(float(proj.saldo_liquido[i, -1])),
 			]
 		)
-	)
+	table = LongTable(piggy_table, repeatRows=1, colWidths=[90, 80, 40, 66, 66, 66, 66])
+	table.setStyle(data_table_style(numeric_from=2))
 	story.append(table)
+	story.append(Spacer(1, 12))
+
+	month_table = [["Mês", "Aportes", "Bruto", "Rend.", "IOF", "IR", "Líquido"]]
+	for j, d in enumerate(months):
+		month_table.append(
+			[
+				f"{_MONTHS_SHORT[d.month - 1]}/{d.year}",
+				format_brl(float(totals["total_aportes"][j])),
+				format_brl(float(totals["saldo_bruto"][j])),
+				format_brl(float(totals["rendimento_bruto"][j])),
+				format_brl(float(totals["iof"][j])),
+				format_brl(float(totals["ir"][j])),
+				format_brl(float(totals["saldo_liquido"][j])),
+			]
+		)
+	table = LongTable(month_table, repeatRows=1, colWidths=[60, 70, 70, 66, 56, 66, 72])
+	table.setStyle(data_table_style())
+	story.append(table)
+	story.append(Spacer(1, 8))
+	story.append(
+		Paragraph(
+			"Observação: cada cofrinho segue a mesma aproximação do relatório individual (juros compostos "
+			"mensais, IR/IOF como se houvesse resgate no mês). Cofrinhos que ainda não começaram entram zerados.",
+			styles["Note"],
+		)
+	)
 
 	doc.build(story)
+	if index is not None:
+		index.add(digest, out)
+		index.save()
 	return out